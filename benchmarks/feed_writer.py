@@ -0,0 +1,143 @@
+"""Compare the streaming feed writer with the previous in-memory ElementTree build.
+
+Builds a synthetic 1,000-episode channel in a temporary DATA_DIR, generates its feed
+with both implementations, checks that the outputs are byte-identical and reports
+wall time and peak Python heap usage (tracemalloc) for each. Only the XML is timed:
+generate_rss also writes the pre-compressed variants, which the ElementTree build
+never did, so that step is stubbed out while measuring.
+
+    python -m benchmarks.feed_writer [--episodes 1000] [--rounds 5]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+from unittest import mock
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+def build_channel(podcast_dir: Path, episodes: int):
+    from podqueue.core.episodes import save_episode_index
+
+    rng = random.Random(42)
+    index = {"channel": {"title": "Synthetic & <Channel>", "image_url": None}, "episodes": {}}
+    for i in range(episodes):
+        video_id = f"vid{i:08d}"
+        (podcast_dir / f"{video_id}.m4a").write_bytes(b"\0" * 64)
+        chapters = "\n".join(f"{m:02d}:{s:02d} Chapter \"{m}\" <part>" for m, s in ((n * 3, n * 7 % 60) for n in range(8)))
+        body = " ".join(rng.choice(["lorem", "ipsum", "dolor", "&", "sit", "amet", "<b>"]) for _ in range(400))
+        index["episodes"][video_id] = {
+            "title": f"Episode {i}: a | b / c",
+            "description": f"{chapters}\n\n{body}",
+            "upload_date": (datetime.date(2020, 1, 1) + datetime.timedelta(days=i)).strftime("%Y%m%d"),
+            "duration": 600 + i,
+            "thumbnail": f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg?a=1&b=2",
+        }
+    save_episode_index(podcast_dir, index)
+
+def generate_rss_etree(feed_name: str, podcast_dir: Path, output_path: Path):
+    """The previous implementation: whole document as an ElementTree, written in place"""
+    from podqueue.config import settings
+    from podqueue.core.episodes import load_episode_index, sorted_episode_files
+    from podqueue.utils.media import (
+        rfc2822_format, format_duration, parse_upload_date, sanitize_title, parse_chapters_from_description
+    )
+
+    index = load_episode_index(podcast_dir)
+    channel_title = index["channel"].get("title") or feed_name
+    channel_desc = f"A podcast stream of audio from the Youtube Channel {channel_title}"
+
+    ET.register_namespace("itunes", "http://www.itunes.com/dtds/podcast-1.0.dtd")
+    ET.register_namespace("psc", "http://podlove.org/simple-chapters")
+    rss = ET.Element("rss", version="2.0", attrib={
+        "xmlns:itunes": "http://www.itunes.com/dtds/podcast-1.0.dtd",
+        "xmlns:psc": "http://podlove.org/simple-chapters"
+    })
+    channel = ET.SubElement(rss, "channel")
+    ET.SubElement(channel, "title").text = channel_title
+    ET.SubElement(channel, "link").text = f"{settings.BASE_URL}/feeds/{feed_name}.xml"
+    ET.SubElement(channel, "description").text = channel_desc
+    ET.SubElement(channel, "language").text = "en-US"
+    ET.SubElement(channel, "lastBuildDate").text = rfc2822_format(datetime.datetime.now(datetime.timezone.utc))
+    ET.SubElement(channel, "itunes:author").text = channel_title
+
+    for file_path in sorted_episode_files(podcast_dir, index):
+        episode_info = index["episodes"][file_path.stem]
+        file_url = f"{settings.BASE_URL}/downloads/{feed_name}/{file_path.name}"
+        stat = file_path.stat()
+        item = ET.SubElement(channel, "item")
+        ET.SubElement(item, "title").text = sanitize_title(episode_info.get("title") or file_path.stem)
+        pub_date = parse_upload_date(episode_info.get("upload_date"))
+        if not pub_date:
+            pub_date = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc)
+        ET.SubElement(item, "pubDate").text = rfc2822_format(pub_date)
+        ET.SubElement(item, "guid", isPermaLink="false").text = file_url
+        ET.SubElement(item, "enclosure", url=file_url, length=str(stat.st_size), type="audio/mp4")
+        description = episode_info.get("description", "")
+        if description:
+            ET.SubElement(item, "description").text = description
+        if episode_info.get("duration"):
+            ET.SubElement(item, "itunes:duration").text = format_duration(episode_info["duration"])
+        if episode_info.get("thumbnail"):
+            ET.SubElement(item, "itunes:image", href=episode_info["thumbnail"])
+        chapters = parse_chapters_from_description(description)
+        if chapters:
+            chapters_element = ET.SubElement(item, "psc:chapters", attrib={"version": "1.2"})
+            for ch in chapters:
+                ET.SubElement(chapters_element, "psc:chapter", attrib={"start": ch['time'], "title": ch['title']})
+
+    ET.ElementTree(rss).write(output_path, encoding="utf-8", xml_declaration=True)
+
+def measure(func, rounds: int) -> tuple:
+    times = []
+    peak = 0
+    for _ in range(rounds):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(times), peak
+
+def strip_build_date(data: bytes) -> bytes:
+    return re.sub(rb"<lastBuildDate>[^<]*</lastBuildDate>", b"", data)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Settings create their directories at import time, so point them away from ./data first
+        os.environ["DATA_DIR"] = data_dir
+        from podqueue.config import settings
+        from podqueue.core import rss
+
+        podcast_dir = settings.DOWNLOADS_DIR / "bench"
+        podcast_dir.mkdir(parents=True)
+        build_channel(podcast_dir, args.episodes)
+        reference_path = Path(data_dir) / "reference.xml"
+        streamed_path = settings.FEEDS_DIR / "bench.xml"
+
+        etree_time, etree_peak = measure(lambda: generate_rss_etree("bench", podcast_dir, reference_path), args.rounds)
+        with mock.patch.object(rss, "write_compressed_variants", lambda path: []):
+            stream_time, stream_peak = measure(lambda: rss.generate_rss("bench", podcast_dir), args.rounds)
+
+        identical = strip_build_date(reference_path.read_bytes()) == strip_build_date(streamed_path.read_bytes())
+        size_kb = streamed_path.stat().st_size / 1024
+
+    print(f"{args.episodes} episodes, {size_kb:.0f} KB feed, best of {args.rounds} rounds")
+    print(f"  ElementTree : {etree_time * 1000:8.1f} ms   peak heap {etree_peak / 1024 / 1024:6.2f} MB")
+    print(f"  FeedWriter  : {stream_time * 1000:8.1f} ms   peak heap {stream_peak / 1024 / 1024:6.2f} MB")
+    print(f"  Output identical (ignoring lastBuildDate): {identical}")
+    return 0 if identical else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
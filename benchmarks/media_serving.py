@@ -0,0 +1,133 @@
+"""Compare episode serving through the old StaticFiles mount with the /downloads endpoint.
+
+Starts each implementation in its own uvicorn process on a temporary DATA_DIR holding a
+synthetic episode, then runs many concurrent keep-alive clients issuing random range
+requests (the pattern players produce while seeking and preloading). Reports requests/s,
+throughput and server CPU seconds (Linux only) for each.
+
+    python -m benchmarks.media_serving [--clients 32] [--requests 200] [--size-mb 50]
+"""
+import os
+import sys
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from pathlib import Path
+
+def baseline_app():
+    """The previous serving path: a plain StaticFiles mount"""
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from starlette.staticfiles import StaticFiles
+    from podqueue.config import settings
+    return Starlette(routes=[Mount("/downloads", StaticFiles(directory=str(settings.DOWNLOADS_DIR)))])
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def process_cpu_seconds(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def client(port: int, path: str, file_size: int, requests: int, seed: int, totals: list, lock: threading.Lock):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    received = 0
+    for _ in range(requests):
+        length = rng.choice((64 * 1024, 256 * 1024, 1024 * 1024))
+        start = rng.randrange(0, file_size - length)
+        if rng.random() < 0.1:
+            # Occasional multi-range request
+            second = rng.randrange(0, file_size - 4096)
+            range_header = f"bytes={start}-{start + 4095},{second}-{second + 4095}"
+        else:
+            range_header = f"bytes={start}-{start + length - 1}"
+        conn.request("GET", path, headers={"Range": range_header})
+        response = conn.getresponse()
+        received += len(response.read())
+        if response.status != 206:
+            raise RuntimeError(f"Unexpected status {response.status}")
+    conn.close()
+    with lock:
+        totals.append(received)
+
+def run_server(target: str, data_dir: str, args) -> dict:
+    port = free_port()
+    env = {**os.environ, "DATA_DIR": data_dir}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        file_size = args.size_mb * 1024 * 1024
+        totals = []
+        lock = threading.Lock()
+        cpu_before = process_cpu_seconds(server.pid)
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=client, args=(port, "/downloads/bench/episode.m4a", file_size, args.requests, i, totals, lock))
+            for i in range(args.clients)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        cpu_after = process_cpu_seconds(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    return {"elapsed": elapsed, "bytes": sum(totals), "requests": args.clients * args.requests, "cpu": cpu}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--size-mb", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        episode_dir = Path(data_dir) / "downloads" / "bench"
+        episode_dir.mkdir(parents=True)
+        with open(episode_dir / "episode.m4a", "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        results = {
+            "StaticFiles mount": run_server("benchmarks.media_serving:baseline_app", data_dir, args),
+            "/downloads endpoint": run_server("podqueue.api.main:app", data_dir, args),
+        }
+
+    print(f"{args.clients} clients x {args.requests} range requests on a {args.size_mb} MB episode")
+    for name, r in results.items():
+        cpu = f"{r['cpu']:6.2f} s" if r["cpu"] is not None else "   n/a"
+        print(
+            f"  {name:<20}: {r['requests'] / r['elapsed']:8.0f} req/s   "
+            f"{r['bytes'] / r['elapsed'] / 1024 / 1024:8.1f} MB/s   server CPU {cpu}"
+        )
+
+if __name__ == "__main__":
+    main()
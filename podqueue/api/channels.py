@@ -1,53 +1,62 @@
+import time
 import shutil
 import asyncio
 import logging
 from typing import List, Union
 from fastapi import APIRouter, Request, HTTPException, status
+from filelock import Timeout
 from pydantic import BaseModel, Field
 from podqueue.config import settings
-from podqueue.core.channels import Channel, load_channels, add_channel, update_channel, delete_channel
+from podqueue.core.adaptive import next_check_time
+from podqueue.core.channels import Channel, load_channels, get_channel, add_channel, update_channel, delete_channel
 from podqueue.api.auth import require_auth
 from podqueue.core.downloader import resolve_channel_url
+from podqueue.core.governor import RequestBudgetExhausted
+from podqueue.core.scheduler import due_scheduler
+from podqueue.core.job_queue import job_queue
+from podqueue.core.job_runner import get_channel_lock
+from podqueue.core.state import delete_channel_state
+from podqueue.core.status_cache import channel_status
+from podqueue.utils.feed_writer import remove_compressed_variants
 
 router = APIRouter(prefix="/api")
 logger = logging.getLogger("podqueue")
 
+# Longest a channel deletion waits for another process to release the channel's lock
+CHANNEL_LOCK_WAIT_SECONDS = 60
+# Longest an add-channel request waits for the YouTube request budget before answering 503
+RESOLVE_MAX_WAIT_SECONDS = 10
+
 class ChannelCreate(BaseModel):
     id: str = Field(..., min_length=1)
     url: str = Field(..., min_length=1)
     limit: int = Field(default=5, ge=1)
     sponsorblock: Union[bool, str] = False
     check_interval_hours: int = Field(default=1, ge=1)
+    adaptive: bool = False
 
 class ChannelUpdate(BaseModel):
     limit: int = Field(..., ge=1)
     sponsorblock: Union[bool, str] = False
     check_interval_hours: int = Field(..., ge=1)
+    adaptive: bool = False
 
 @router.get("/channels")
 async def list_channels(request: Request):
     require_auth(request)
     channels = await load_channels()
+    now = int(time.time())
     result = []
     for c in channels:
-        # Check files count
-        downloads_subdir = settings.DOWNLOADS_DIR / c.id
-        audio_count = 0
-        if downloads_subdir.exists():
-            audio_count = len(list(downloads_subdir.glob("*.m4a")))
-            
-        last_check = None
-        next_check = None
-        last_check_file = settings.STATE_DIR / f"{c.id}.last_check"
-        if last_check_file.exists():
-            try:
-                val = last_check_file.read_text().strip()
-                if val.isdigit():
-                    t = int(val)
-                    last_check = t
-                    next_check = t + (c.check_interval_hours * 3600)
-            except Exception:
-                pass
+        # Counts, check times and errors come from the in-memory status cache
+        channel_state = channel_status.get(c.id)
+        last_check = channel_state.get("last_check")
+        next_check = due_scheduler.next_due(c.id)
+        if next_check is None and last_check:
+            next_check = next_check_time(c, last_check)
+        # Interval in effect: the manual one, or the one learned from the upload history
+        start = last_check or now
+        interval_hours = round((next_check_time(c, start) - start) / 3600, 1)
                 
         result.append({
             "id": c.id,
@@ -55,9 +64,14 @@ async def list_channels(request: Request):
             "limit": c.limit,
             "sponsorblock": c.sponsorblock,
             "check_interval_hours": c.check_interval_hours,
-            "audio_count": audio_count,
+            "adaptive": c.adaptive,
+            "interval_hours": interval_hours,
+            "audio_count": channel_state.get("audio_count", 0),
+            "total_bytes": channel_state.get("total_bytes", 0),
+            "feed_title": channel_state.get("feed_title"),
             "last_check": last_check,
-            "next_check": next_check
+            "next_check": next_check,
+            "last_error": channel_state.get("last_error")
         })
     return result
 
@@ -67,7 +81,14 @@ async def create_channel(request: Request, data: ChannelCreate):
     
     # Auto convert @username URLs in a thread pool
     try:
-        resolved_url = await asyncio.to_thread(resolve_channel_url, data.url, settings.COOKIES_FILE)
+        resolved_url = await asyncio.to_thread(resolve_channel_url, data.url, settings.COOKIES_FILE, RESOLVE_MAX_WAIT_SECONDS)
+    except RequestBudgetExhausted as e:
+        # Throttling cooldowns last up to THROTTLE_MAX_BACKOFF_SECONDS; don't hold the request that long
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
     except Exception as e:
         logger.error(f"Failed to resolve channel URL {data.url}: {e}")
         resolved_url = data.url
@@ -77,7 +98,8 @@ async def create_channel(request: Request, data: ChannelCreate):
         url=resolved_url,
         limit=data.limit,
         sponsorblock=data.sponsorblock,
-        check_interval_hours=data.check_interval_hours
+        check_interval_hours=data.check_interval_hours,
+        adaptive=data.adaptive
     )
     
     success = await add_channel(new_chan)
@@ -86,8 +108,12 @@ async def create_channel(request: Request, data: ChannelCreate):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Channel with ID '{data.id}' already exists."
         )
+    channel_status.invalidate(new_chan.id)
+    due_scheduler.reschedule(new_chan.id, new_chan)
+    # Fetch the first episodes right away instead of waiting for the schedule
+    job = job_queue.enqueue("sync", channel_ids=[new_chan.id], force=True)
         
-    return {"status": "ok", "channel": new_chan}
+    return {"status": "ok", "channel": new_chan, "job": job}
 
 @router.put("/channels/{channel_id}")
 async def edit_channel(request: Request, channel_id: str, data: ChannelUpdate):
@@ -96,14 +122,40 @@ async def edit_channel(request: Request, channel_id: str, data: ChannelUpdate):
         channel_id,
         data.limit,
         data.sponsorblock,
-        data.check_interval_hours
+        data.check_interval_hours,
+        data.adaptive
     )
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Channel not found"
         )
-    return {"status": "ok", "message": f"Channel '{channel_id}' updated successfully."}
+    due_scheduler.reschedule(channel_id, await get_channel(channel_id))
+    # Apply a changed limit or SponsorBlock setting now (forced: the uploads feed may be unchanged)
+    job = job_queue.enqueue("sync", channel_ids=[channel_id], force=True)
+    return {"status": "ok", "message": f"Channel '{channel_id}' updated successfully.", "job": job}
+
+@router.post("/channels/{channel_id}/sync")
+async def sync_channel(request: Request, channel_id: str):
+    require_auth(request)
+    if await get_channel(channel_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Channel not found"
+        )
+    job = job_queue.enqueue("sync", channel_ids=[channel_id], force=True)
+    return {"status": "ok", "message": f"Sync of '{channel_id}' queued.", "job": job}
+
+@router.post("/channels/{channel_id}/rss")
+async def rebuild_channel_rss(request: Request, channel_id: str):
+    require_auth(request)
+    if await get_channel(channel_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Channel not found"
+        )
+    job = job_queue.enqueue("rss", channel_ids=[channel_id])
+    return {"status": "ok", "message": f"RSS generation for '{channel_id}' queued.", "job": job}
 
 @router.delete("/channels/{channel_id}")
 async def remove_channel_api(request: Request, channel_id: str):
@@ -114,20 +166,34 @@ async def remove_channel_api(request: Request, channel_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Channel not found"
         )
-        
-    # Clean up physical files
+    due_scheduler.remove(channel_id)
+    # A sync still running (e.g. the one queued when the channel was added) would recreate
+    # its files and state after the cleanup below
+    await job_queue.cancel_channel_jobs(channel_id)
+    try:
+        await asyncio.to_thread(_remove_channel_data, channel_id)
+    except Timeout:
+        logger.error(f"Channel '{channel_id}' deleted, but another process still holds its lock; its files were kept.")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Channel '{channel_id}' deleted, but its files are in use by another process and were kept."
+        )
+    channel_status.remove(channel_id)
+
+    return {"status": "ok", "message": f"Channel '{channel_id}' and all associated files deleted."}
+
+def _remove_channel_data(channel_id: str):
+    """Delete a removed channel's files and state while holding its channel lock"""
     download_dir = settings.DOWNLOADS_DIR / channel_id
     feed_file = settings.FEEDS_DIR / f"{channel_id}.xml"
-    state_file = settings.STATE_DIR / f"{channel_id}.last_check"
     artwork_file = settings.ARTWORK_DIR / f"{channel_id}.jpg"
-    
-    if download_dir.exists():
-        shutil.rmtree(download_dir, ignore_errors=True)
-    if feed_file.exists():
-        feed_file.unlink(missing_ok=True)
-    if state_file.exists():
-        state_file.unlink(missing_ok=True)
-    if artwork_file.exists():
-        artwork_file.unlink(missing_ok=True)
-        
-    return {"status": "ok", "message": f"Channel '{channel_id}' and all associated files deleted."}
+
+    with get_channel_lock(channel_id).acquire(timeout=CHANNEL_LOCK_WAIT_SECONDS):
+        if download_dir.exists():
+            shutil.rmtree(download_dir, ignore_errors=True)
+        if feed_file.exists():
+            feed_file.unlink(missing_ok=True)
+        remove_compressed_variants(feed_file)
+        if artwork_file.exists():
+            artwork_file.unlink(missing_ok=True)
+        delete_channel_state(channel_id)
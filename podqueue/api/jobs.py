@@ -1,13 +1,16 @@
-import os
+import json
 import asyncio
 import logging
-from fastapi import APIRouter, Request, HTTPException, status
+from fastapi import APIRouter, Request, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from podqueue.config import settings
 from podqueue.api.auth import require_auth
-from podqueue.core.job_runner import run_job_safely, sync_pipeline, update_ytdlp, state
-from podqueue.core.rss import run_rss_job
+from podqueue.utils.log_stream import log_broadcaster
+from podqueue.core.events import job_status
+from podqueue.core.governor import governor
+from podqueue.core.retries import list_retries, clear_retries
+from podqueue.core.job_queue import HISTORY_SIZE, job_queue
+from podqueue.core.job_runner import state
 
 router = APIRouter(prefix="/api")
 logger = logging.getLogger("podqueue")
@@ -20,21 +23,46 @@ async def trigger_download(request: Request, data: DownloadTriggerRequest = None
     require_auth(request)
     force = data.force if data else False
     
-    # Run in background task
-    asyncio.create_task(run_job_safely("Sync", sync_pipeline, force=force))
-    return {"status": "ok", "message": "Download and RSS sync job triggered."}
+    job = job_queue.enqueue("sync", force=force)
+    return {"status": "ok", "message": "Download and RSS sync job queued.", "job": job}
 
 @router.post("/jobs/rss")
 async def trigger_rss(request: Request):
     require_auth(request)
-    asyncio.create_task(run_job_safely("RSS Generation", run_rss_job))
-    return {"status": "ok", "message": "RSS generation job triggered."}
+    job = job_queue.enqueue("rss")
+    return {"status": "ok", "message": "RSS generation job queued.", "job": job}
 
 @router.post("/jobs/update-ytdlp")
 async def trigger_update(request: Request):
     require_auth(request)
-    asyncio.create_task(run_job_safely("Update yt-dlp", update_ytdlp))
-    return {"status": "ok", "message": "yt-dlp update job triggered."}
+    job = job_queue.enqueue("update")
+    return {"status": "ok", "message": "yt-dlp update job queued.", "job": job}
+
+@router.get("/jobs")
+async def list_jobs(request: Request, history: bool = False):
+    """Running and queued jobs in execution order (plus recently finished ones with ?history=true)"""
+    require_auth(request)
+    return job_queue.list_jobs(include_history=history)
+
+@router.get("/jobs/history")
+async def get_job_history(request: Request, limit: int = Query(50, ge=1, le=HISTORY_SIZE), kind: str | None = None):
+    """Finished jobs with their duration and per-stage / per-channel timings, bytes and errors"""
+    require_auth(request)
+    return job_queue.job_history(limit, kind)
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(request: Request, job_id: int):
+    require_auth(request)
+    try:
+        job = job_queue.cancel(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return {"status": "ok", "job": job}
 
 @router.get("/jobs/status")
 async def get_jobs_status(request: Request):
@@ -43,49 +71,88 @@ async def get_jobs_status(request: Request):
         "running": state.running,
         "current_job": state.current_job,
         "last_run": state.last_run,
-        "last_exit_code": state.last_exit_code
+        "last_exit_code": state.last_exit_code,
+        "progress": job_status.snapshot()[1]["progress"],
+        "queue": job_queue.list_jobs()
     }
 
+@router.get("/governor")
+async def get_governor_stats(request: Request):
+    """YouTube request budget, throttling cooldown and per-kind request/throttle counts"""
+    require_auth(request)
+    return governor.stats()
+
+@router.get("/retries")
+async def get_retries(request: Request, status_filter: str | None = Query(None, alias="status")):
+    """Failed downloads waiting for a retry ('pending') or given up ('dead')"""
+    require_auth(request)
+    return list_retries(status_filter)
+
+@router.delete("/retries")
+async def clear_all_retries(request: Request, status_filter: str | None = Query(None, alias="status")):
+    require_auth(request)
+    cleared = clear_retries(status=status_filter)
+    return {"status": "ok", "cleared": cleared}
+
+@router.delete("/retries/{channel_id}/{video_id}")
+async def clear_retry(request: Request, channel_id: str, video_id: str):
+    """Forget a failed download so the next scan of its channel attempts it afresh"""
+    require_auth(request)
+    if not clear_retries(channel_id=channel_id, video_id=video_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No failed download recorded for this video"
+        )
+    return {"status": "ok"}
+
+@router.get("/jobs/status/stream")
+async def stream_status(request: Request):
+    """Push job state changes and live sync progress instead of having clients poll"""
+    require_auth(request)
+    
+    async def status_generator():
+        subscription = job_status.subscribe()
+        try:
+            version = None
+            while True:
+                current, status_data = job_status.snapshot()
+                if current != version:
+                    version = current
+                    yield f"data: {json.dumps(status_data)}\n\n"
+                    # Coalesce bursts of progress updates into a few events per second
+                    await asyncio.sleep(0.25)
+                    continue
+                if not await subscription.wait(timeout=15.0):
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            job_status.unsubscribe(subscription)
+
+    return StreamingResponse(status_generator(), media_type="text/event-stream")
+
 @router.get("/jobs/logs/stream")
 async def stream_logs(request: Request):
     require_auth(request)
+    last_id = request.headers.get("last-event-id")
     
     async def log_generator():
-        log_file_path = settings.LOGS_DIR / "last_job.log"
-        last_id = request.headers.get("last-event-id")
-        offset = 0
-        
-        if last_id and last_id.isdigit():
-            offset = int(last_id)
-            
-        while True:
-            if await request.is_disconnected():
-                break
-                
-            if not log_file_path.exists():
-                await asyncio.sleep(1.0)
-                continue
-                
-            try:
-                # Open with ignore to handle any weird encoding issues gracefully
-                with open(log_file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    file_size = os.path.getsize(log_file_path)
-                    if offset > file_size:
-                        # File rotated/truncated
-                        offset = 0
-                        
-                    f.seek(offset)
-                    
-                    while True:
-                        line = f.readline()
-                        if not line:
-                            break
-                        offset = f.tell()
-                        # Send line inside EventSource data field
-                        yield f"id: {offset}\ndata: {line.rstrip()}\n\n"
-            except Exception as e:
-                logger.error(f"Error reading last_job.log in SSE: {e}")
-                
-            await asyncio.sleep(0.5)
+        subscription, backlog = log_broadcaster.subscribe(int(last_id) if last_id and last_id.isdigit() else None)
+        try:
+            for seq, line in backlog:
+                yield f"id: {seq}\ndata: {line}\n\n"
+            while True:
+                lines = await subscription.next_lines(timeout=15.0)
+                if not lines:
+                    if await request.is_disconnected():
+                        break
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                for seq, line in lines:
+                    # Send line inside EventSource data field
+                    yield f"id: {seq}\ndata: {line}\n\n"
+        finally:
+            log_broadcaster.unsubscribe(subscription)
 
     return StreamingResponse(log_generator(), media_type="text/event-stream")
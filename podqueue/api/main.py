@@ -1,5 +1,4 @@
 import logging
-import xml.etree.ElementTree as ET
 from contextlib import asynccontextmanager
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
@@ -11,7 +10,11 @@ from podqueue.config import settings, ROOT_DIR
 from podqueue.api.auth import router as auth_router, require_auth
 from podqueue.api.channels import router as channels_router
 from podqueue.api.jobs import router as jobs_router
+from podqueue.api.metrics import router as metrics_router
+from podqueue.api.public import router as public_router
+from podqueue.core.job_queue import job_queue
 from podqueue.core.scheduler import init_scheduler, shutdown_scheduler
+from podqueue.core.status_cache import channel_status
 
 logger = logging.getLogger("podqueue")
 
@@ -23,13 +26,15 @@ async def lifespan(app: FastAPI):
     executor = ThreadPoolExecutor(max_workers=1)
     loop.set_default_executor(executor)
     
-    # Initialize background scheduler
+    # Start the job queue (resuming jobs queued before a restart), then the scheduler feeding it
+    job_queue.start()
     init_scheduler(loop)
     
     yield
     
     # Shutdown actions
     shutdown_scheduler()
+    await job_queue.stop()
     executor.shutdown(wait=True)
 
 app = FastAPI(
@@ -52,6 +57,8 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(channels_router)
 app.include_router(jobs_router)
+app.include_router(metrics_router)
+app.include_router(public_router)
 
 # GET /api/feeds - lists generated RSS feeds with metadata
 @app.get("/api/feeds")
@@ -61,36 +68,16 @@ async def list_feeds(request: Request):
     
     if settings.FEEDS_DIR.exists():
         for file_path in settings.FEEDS_DIR.glob("*.xml"):
-            try:
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-                channel = root.find("channel")
-                title = channel.find("title").text if channel is not None and channel.find("title") is not None else file_path.stem
-                
-                downloads_subdir = settings.DOWNLOADS_DIR / file_path.stem
-                audio_count = len(list(downloads_subdir.glob("*.m4a"))) if downloads_subdir.exists() else 0
-                
-                feeds.append({
-                    "name": file_path.stem,
-                    "title": title,
-                    "url": f"{settings.BASE_URL}/feeds/{file_path.name}",
-                    "audio_count": audio_count
-                })
-            except Exception as e:
-                logger.error(f"Error parsing feed {file_path.name}: {e}")
-                feeds.append({
-                    "name": file_path.stem,
-                    "title": file_path.stem,
-                    "url": f"{settings.BASE_URL}/feeds/{file_path.name}",
-                    "audio_count": 0
-                })
+            # Title and episode count come from the in-memory channel status cache
+            channel_state = channel_status.get(file_path.stem)
+            feeds.append({
+                "name": file_path.stem,
+                "title": channel_state.get("feed_title") or file_path.stem,
+                "url": f"{settings.BASE_URL}/feeds/{file_path.name}",
+                "audio_count": channel_state.get("audio_count", 0)
+            })
     return feeds
 
-# Public static mounts (without auth) supporting range requests
-app.mount("/feeds", StaticFiles(directory=str(settings.FEEDS_DIR)), name="feeds")
-app.mount("/downloads", StaticFiles(directory=str(settings.DOWNLOADS_DIR)), name="downloads")
-app.mount("/artwork", StaticFiles(directory=str(settings.ARTWORK_DIR)), name="artwork")
-
 # Serve frontend at root last
 static_dir = ROOT_DIR / "static"
 static_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,39 @@
+import secrets
+from fastapi import APIRouter, Request, Response
+from podqueue.config import settings
+from podqueue.api.auth import require_auth
+from podqueue.core.db import get_db
+from podqueue.core.governor import governor
+from podqueue.core.metrics import metrics
+from podqueue.utils.process import get_rss_bytes
+
+router = APIRouter()
+
+def _authorize(request: Request):
+    if settings.METRICS_TOKEN:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if token and secrets.compare_digest(token, settings.METRICS_TOKEN):
+            return
+    require_auth(request)
+
+@router.get("/metrics")
+async def get_metrics(request: Request):
+    """Prometheus text exposition: stage timings, bytes, errors, serve counts and process state"""
+    _authorize(request)
+    stats = governor.stats()
+    queued = get_db().execute("SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY status").fetchall()
+    # Computed at scrape time; the rest comes from events recorded by the registry
+    gauges = {
+        "process_resident_memory_bytes": ("Resident memory of the API process", [({}, get_rss_bytes())]),
+        "jobs": ("Queued and running jobs", [({"status": row[0]}, row[1]) for row in queued]),
+        "youtube_backoff_level": ("Current throttling backoff level", [({}, stats["backoff_level"])]),
+        "youtube_cooldown_seconds": ("Seconds left in the current throttling cooldown", [({}, stats["cooldown_remaining"])]),
+    }
+    # Kept in the database, so these only grow (across restarts too)
+    counters = {
+        "youtube_requests_total": ("YouTube requests sent since the database was created, by kind",
+                                   [({"kind": kind}, count) for kind, count in stats["requests"].items()]),
+        "youtube_throttles_total": ("Throttled YouTube requests since the database was created, by kind",
+                                    [({"kind": kind}, count) for kind, count in stats["throttles"].items()]),
+    }
+    return Response(metrics.render(gauges, counters), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,31 @@
+import asyncio
+from fastapi import APIRouter, Request, Response
+from podqueue.config import settings
+from podqueue.core.metrics import inc
+from podqueue.utils.http_cache import cached_file_response
+from podqueue.utils.media_response import media_file_response
+
+# Public (no auth) endpoints polled by podcast apps
+router = APIRouter()
+
+@router.api_route("/feeds/{filename}", methods=["GET", "HEAD"])
+async def serve_feed(request: Request, filename: str):
+    # Clients must revalidate, which is a cheap 304 while the feed is unchanged. Serving stats
+    # files (and hashes a changed one), so it runs in a thread to keep the event loop free
+    response = await asyncio.to_thread(cached_file_response, request, settings.FEEDS_DIR, filename, "no-cache", compressed=True)
+    # Only served files get their own label, so unknown paths cannot grow the label set
+    feed = filename.removesuffix(".xml") if response.status_code < 400 else ""
+    inc("feed_requests_total", feed=feed, status=response.status_code)
+    return response
+
+@router.api_route("/artwork/{filename}", methods=["GET", "HEAD"])
+async def serve_artwork(request: Request, filename: str):
+    return await asyncio.to_thread(cached_file_response, request, settings.ARTWORK_DIR, filename, "public, max-age=86400")
+
+@router.api_route("/downloads/{channel_id}/{filename}", methods=["GET", "HEAD"])
+async def serve_episode(request: Request, channel_id: str, filename: str):
+    if channel_id.startswith(".") or filename.startswith("."):
+        return Response(status_code=404)
+    response = await asyncio.to_thread(media_file_response, request, settings.DOWNLOADS_DIR / channel_id / filename)
+    inc("episode_requests_total", channel=channel_id if response.status_code < 400 else "", status=response.status_code)
+    return response
@@ -25,24 +25,76 @@ class Settings:
         self.PORT = int(os.getenv("PORT", "8000"))
         self.HOST = os.getenv("HOST", "0.0.0.0")
         self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+        # Channels are synced when their own interval elapses; this only controls how often the
+        # schedule is reloaded from the database, and the jitter spreads due times apart
         self.SCHEDULE_INTERVAL_MINUTES = int(os.getenv("SCHEDULE_INTERVAL_MINUTES", "60"))
-        # Optional proxy for yt-dlp (e.g. socks5://127.0.0.1:40000 for Cloudflare Warp)
+        self.SCHEDULE_JITTER_PERCENT = max(0, int(os.getenv("SCHEDULE_JITTER_PERCENT", "10")))
+        # Adaptive channels are checked about ADAPTIVE_CHECKS_PER_UPLOAD times per typical gap
+        # between their uploads (more often around their usual upload hour), within these bounds
+        self.ADAPTIVE_MIN_HOURS = max(1, int(os.getenv("ADAPTIVE_MIN_HOURS", "1")))
+        self.ADAPTIVE_MAX_HOURS = max(self.ADAPTIVE_MIN_HOURS, int(os.getenv("ADAPTIVE_MAX_HOURS", "48")))
+        self.ADAPTIVE_CHECKS_PER_UPLOAD = max(1, int(os.getenv("ADAPTIVE_CHECKS_PER_UPLOAD", "4")))
+        # Optional proxy for yt-dlp and the uploads feed check (e.g. socks5://127.0.0.1:40000 for Cloudflare Warp)
         self.YTDLP_PROXY = os.getenv("YTDLP_PROXY", "").strip() or None
+        # Number of channels whose playlists are scanned concurrently (downloads stay sequential)
+        self.SCAN_CONCURRENCY = max(1, int(os.getenv("SCAN_CONCURRENCY", "4")))
+        # Stop a playlist scan after this many already-archived videos in a row (0 scans the full window)
+        self.SCAN_ARCHIVED_RUN = max(0, int(os.getenv("SCAN_ARCHIVED_RUN", "3")))
+        # Parallel download workers, their shared bandwidth cap (e.g. 5M, empty = unlimited)
+        # and how many ffmpeg post-processing runs may overlap
+        self.DOWNLOAD_WORKERS = max(1, int(os.getenv("DOWNLOAD_WORKERS", "1")))
+        self.DOWNLOAD_RATE_LIMIT = os.getenv("DOWNLOAD_RATE_LIMIT", "").strip() or None
+        self.FFMPEG_CONCURRENCY = max(1, int(os.getenv("FFMPEG_CONCURRENCY", "1")))
+        # Run syncs in a child process that is recycled after N videos or above an RSS ceiling,
+        # so the API process's memory stays flat
+        self.WORKER_ISOLATION = os.getenv("WORKER_ISOLATION", "true").strip().lower() in ("1", "true", "yes", "on")
+        self.WORKER_MAX_VIDEOS = max(1, int(os.getenv("WORKER_MAX_VIDEOS", "20")))
+        self.WORKER_MAX_RSS_MB = max(0, int(os.getenv("WORKER_MAX_RSS_MB", "400")))
+        # Jobs over disjoint sets of channels (e.g. a new channel's first sync next to a
+        # scheduled one) may run side by side, each in its own worker process. The download,
+        # ffmpeg, scan and bandwidth limits and WORKER_MAX_RSS_MB apply per job, so more than
+        # one multiplies them; the default keeps them global for a 1 GB machine
+        self.JOB_CONCURRENCY = max(1, int(os.getenv("JOB_CONCURRENCY", "1")))
+        # Budget shared by all YouTube requests (scans, URL resolution, extraction, downloads)
+        # across processes (0 = unlimited), and the cooldown after a 429 or bot check, doubled
+        # per consecutive throttle up to the maximum
+        self.YOUTUBE_REQUESTS_PER_MINUTE = max(0, int(os.getenv("YOUTUBE_REQUESTS_PER_MINUTE", "60")))
+        self.YOUTUBE_REQUEST_BURST = max(1, int(os.getenv("YOUTUBE_REQUEST_BURST", "10")))
+        self.THROTTLE_BACKOFF_SECONDS = max(1, int(os.getenv("THROTTLE_BACKOFF_SECONDS", "120")))
+        self.THROTTLE_MAX_BACKOFF_SECONDS = max(1, int(os.getenv("THROTTLE_MAX_BACKOFF_SECONDS", "3600")))
+        # Failed downloads are retried after RETRY_BASE_MINUTES, doubling per attempt up to
+        # RETRY_MAX_HOURS, and listed as dead after RETRY_MAX_ATTEMPTS (permanent errors at once)
+        self.RETRY_MAX_ATTEMPTS = max(1, int(os.getenv("RETRY_MAX_ATTEMPTS", "5")))
+        self.RETRY_BASE_MINUTES = max(1, int(os.getenv("RETRY_BASE_MINUTES", "15")))
+        self.RETRY_MAX_HOURS = max(1, int(os.getenv("RETRY_MAX_HOURS", "24")))
+        # Check the lightweight uploads Atom feed (conditional GET) before running a full playlist scan
+        self.FEED_PRECHECK = os.getenv("FEED_PRECHECK", "true").strip().lower() in ("1", "true", "yes", "on")
+        self.YOUTUBE_FEED_URL = os.getenv("YOUTUBE_FEED_URL", "https://www.youtube.com/feeds/videos.xml").rstrip("/")
+        # Lets a Prometheus scraper read /metrics with "Authorization: Bearer <token>"
+        # (without it, /metrics needs a logged-in session like the rest of the API)
+        self.METRICS_TOKEN = os.getenv("METRICS_TOKEN", "").strip() or None
+        # Vertical videos up to this many seconds are treated as Shorts and skipped
+        self.SHORTS_MAX_DURATION = int(os.getenv("SHORTS_MAX_DURATION", "180"))
         
         # Deduced paths inside DATA_DIR
         self.DOWNLOADS_DIR = self.DATA_DIR / "downloads"
         self.FEEDS_DIR = self.DATA_DIR / "feeds"
         self.ARTWORK_DIR = self.DATA_DIR / "artwork"
         self.LOGS_DIR = self.DATA_DIR / "logs"
+        # Legacy per-channel state files, imported into the database on first start
         self.STATE_DIR = self.DATA_DIR / "state" / "channel_checks"
         self.LOCK_FILE = self.DATA_DIR / "podqueue.lock"
+        # Per-channel job locks
+        self.LOCKS_DIR = self.DATA_DIR / "locks"
+        # Only read once, to migrate into the database
         self.CHANNELS_FILE = self.DATA_DIR / "channels.json"
+        self.DB_FILE = self.DATA_DIR / "podqueue.db"
         
         # Ensure dirs exist
         self.DOWNLOADS_DIR.mkdir(parents=True, exist_ok=True)
         self.FEEDS_DIR.mkdir(parents=True, exist_ok=True)
         self.ARTWORK_DIR.mkdir(parents=True, exist_ok=True)
         self.LOGS_DIR.mkdir(parents=True, exist_ok=True)
-        self.STATE_DIR.mkdir(parents=True, exist_ok=True)
+        self.LOCKS_DIR.mkdir(parents=True, exist_ok=True)
 
 settings = Settings()
@@ -0,0 +1,131 @@
+import time
+import logging
+import datetime
+import statistics
+from podqueue.config import settings
+from podqueue.core.channels import Channel
+from podqueue.core.db import get_db, transaction
+
+logger = logging.getLogger("podqueue")
+
+# Uploads remembered per channel; older ones say little about the current schedule
+HISTORY_SIZE = 50
+# Below this many known uploads the manual interval is used
+MIN_SAMPLES = 4
+
+def _date_timestamp(upload_date: str) -> int | None:
+    """Noon UTC of a YYYYMMDD upload date (the date has no time of day)"""
+    try:
+        day = datetime.datetime.strptime(upload_date, "%Y%m%d").replace(tzinfo=datetime.timezone.utc)
+    except (TypeError, ValueError):
+        return None
+    return int(day.timestamp()) + 12 * 3600
+
+def record_uploads(channel_id: str, uploads: list):
+    """Remember (video_id, upload_date, timestamp) of a channel's uploads; either may be None"""
+    uploads = [u for u in uploads if u[1] or u[2]]
+    if not uploads:
+        return
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO upload_history (channel_id, video_id, upload_date, timestamp) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(channel_id, video_id) DO UPDATE SET "
+            "upload_date = COALESCE(excluded.upload_date, upload_date), timestamp = COALESCE(excluded.timestamp, timestamp)",
+            [(channel_id, video_id, upload_date, timestamp) for video_id, upload_date, timestamp in uploads]
+        )
+        conn.execute(
+            "DELETE FROM upload_history WHERE channel_id = ? AND video_id NOT IN ("
+            "SELECT video_id FROM upload_history WHERE channel_id = ? "
+            "ORDER BY COALESCE(upload_date, strftime('%Y%m%d', timestamp, 'unixepoch')) DESC, timestamp DESC LIMIT ?)",
+            (channel_id, channel_id, HISTORY_SIZE)
+        )
+
+def record_episode_upload(channel_id: str, video_id: str, info: dict):
+    timestamp = info.get("timestamp") or info.get("release_timestamp")
+    record_uploads(channel_id, [(video_id, info.get("upload_date"), int(timestamp) if timestamp else None)])
+
+def upload_profile(channel_id: str) -> dict | None:
+    """Median gap between uploads and the share of uploads per UTC hour of day.
+
+    Uploads known only by date count towards the gap but not the hourly pattern,
+    which stays flat until enough exact times (from the uploads feed) are known.
+    """
+    rows = get_db().execute(
+        "SELECT upload_date, timestamp FROM upload_history WHERE channel_id = ?", (channel_id,)
+    ).fetchall()
+    times = []
+    hours = [0] * 24
+    timed = 0
+    for row in rows:
+        if row["timestamp"]:
+            times.append(row["timestamp"])
+            hours[time.gmtime(row["timestamp"]).tm_hour] += 1
+            timed += 1
+        else:
+            ts = _date_timestamp(row["upload_date"])
+            if ts is not None:
+                times.append(ts)
+    if len(times) < MIN_SAMPLES:
+        return None
+    times.sort()
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    if timed >= MIN_SAMPLES:
+        # Add-one smoothing so a quiet hour is unlikely, never impossible; weights average 1
+        weights = [(count + 1) * 24 / (timed + 24) for count in hours]
+    else:
+        weights = [1.0] * 24
+    return {
+        "samples": len(times),
+        "last_upload": times[-1],
+        # Same-day uploads known only by date have a gap of 0
+        "median_gap": max(statistics.median(gaps), 3600),
+        "hour_weights": weights,
+    }
+
+def adaptive_next_check(channel_id: str, start: int) -> int | None:
+    """Next check after `start`, or None while the channel's upload history is too short.
+
+    Checks are spaced so that about 1/ADAPTIVE_CHECKS_PER_UPLOAD of an upload is expected
+    between two of them: the expected-upload rate follows the median gap, weighted by how
+    often the channel uploads in each hour of the day, so checks bunch up right after the
+    usual upload time and thin out overnight. A channel silent for more than twice its
+    usual gap backs off gradually. The result is clamped to ADAPTIVE_MIN/MAX_HOURS.
+    """
+    profile = upload_profile(channel_id)
+    if profile is None:
+        return None
+    gap = profile["median_gap"]
+    silence = start - profile["last_upload"]
+    if silence > 2 * gap:
+        gap = silence / 2
+    rate = 3600 / gap  # expected uploads per hour
+    weights = profile["hour_weights"]
+    target = 1 / settings.ADAPTIVE_CHECKS_PER_UPLOAD
+
+    earliest = start + settings.ADAPTIVE_MIN_HOURS * 3600
+    latest = start + settings.ADAPTIVE_MAX_HOURS * 3600
+    t = float(start)
+    expected = 0.0
+    while t < latest:
+        hour_rate = rate * weights[time.gmtime(t).tm_hour]
+        segment_end = min((t // 3600 + 1) * 3600, latest)
+        segment = hour_rate * (segment_end - t) / 3600
+        if expected + segment >= target:
+            t += (target - expected) / hour_rate * 3600
+            break
+        expected += segment
+        t = segment_end
+    return int(min(max(t, earliest), latest))
+
+def next_check_time(channel: Channel, last_check: int) -> int:
+    """When a channel checked at `last_check` is due again: learned from its uploads when
+    adaptive (and enough are known), otherwise its manual check interval"""
+    if channel.adaptive:
+        try:
+            due = adaptive_next_check(channel.id, last_check)
+        except Exception as e:
+            logger.error(f"Error estimating adaptive interval of {channel.id}: {e}")
+            due = None
+        if due is not None:
+            return due
+    return last_check + channel.check_interval_hours * 3600
@@ -1,9 +1,9 @@
 import json
+import sqlite3
 import logging
 from typing import List, Union
 from pydantic import BaseModel, Field
-import asyncio
-from podqueue.config import settings
+from podqueue.core.db import get_db, transaction
 
 logger = logging.getLogger("podqueue")
 
@@ -13,78 +13,64 @@ class Channel(BaseModel):
     limit: int = Field(default=5, ge=1)
     sponsorblock: Union[bool, str] = False
     check_interval_hours: int = Field(default=1, ge=1)
+    # Learn the interval from the channel's upload history (check_interval_hours until enough is known)
+    adaptive: bool = False
 
-# In-process asyncio Lock for serializing CRUD
-_channels_lock = asyncio.Lock()
+_COLUMNS = 'id, url, "limit", sponsorblock, check_interval_hours, adaptive'
 
-def _load_channels_raw() -> list:
-    if not settings.CHANNELS_FILE.exists():
-        return []
-    try:
-        with open(settings.CHANNELS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading channels.json: {e}")
-        return []
+def _row_to_channel(row: sqlite3.Row) -> Channel:
+    # Records were validated when written, so skip re-validating on every read
+    return Channel.model_construct(
+        id=row["id"],
+        url=row["url"],
+        limit=row["limit"],
+        sponsorblock=json.loads(row["sponsorblock"]),
+        check_interval_hours=row["check_interval_hours"],
+        adaptive=bool(row["adaptive"])
+    )
 
-def _save_channels_raw(channels_data: list):
-    try:
-        settings.CHANNELS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(settings.CHANNELS_FILE, "w", encoding="utf-8") as f:
-            json.dump(channels_data, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving channels.json: {e}")
-        raise
+def _channel_params(channel: Channel) -> tuple:
+    return (channel.id, channel.url, channel.limit, json.dumps(channel.sponsorblock), channel.check_interval_hours, int(channel.adaptive))
 
 async def load_channels() -> List[Channel]:
-    async with _channels_lock:
-        raw = _load_channels_raw()
-        channels = []
-        for item in raw:
-            try:
-                channels.append(Channel(**item))
-            except Exception as e:
-                logger.error(f"Error parsing channel record {item}: {e}")
-        return channels
+    rows = get_db().execute(f"SELECT {_COLUMNS} FROM channels ORDER BY rowid").fetchall()
+    return [_row_to_channel(row) for row in rows]
+
+async def get_channel(channel_id: str) -> Channel | None:
+    row = get_db().execute(f"SELECT {_COLUMNS} FROM channels WHERE id = ?", (channel_id,)).fetchone()
+    return _row_to_channel(row) if row else None
 
 async def save_channels(channels: List[Channel]):
-    async with _channels_lock:
-        data = [c.model_dump() if hasattr(c, "model_dump") else c.dict() for c in channels]
-        _save_channels_raw(data)
+    with transaction() as conn:
+        conn.execute("DELETE FROM channels")
+        conn.executemany(f"INSERT INTO channels ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", [_channel_params(c) for c in channels])
 
 async def add_channel(channel: Channel) -> bool:
-    async with _channels_lock:
-        raw = _load_channels_raw()
-        # Check if already exists
-        for item in raw:
-            if item.get("id") == channel.id:
-                return False
-        
-        raw.append(channel.model_dump() if hasattr(channel, "model_dump") else channel.dict())
-        _save_channels_raw(raw)
-        return True
+    try:
+        get_db().execute(f"INSERT INTO channels ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", _channel_params(channel))
+    except sqlite3.IntegrityError:
+        # Already exists
+        return False
+    return True
+
+async def update_channel(channel_id: str, limit: int, sponsorblock: Union[bool, str], check_interval_hours: int,
+                         adaptive: bool = False) -> bool:
+    cursor = get_db().execute(
+        'UPDATE channels SET "limit" = ?, sponsorblock = ?, check_interval_hours = ?, adaptive = ? WHERE id = ?',
+        (limit, json.dumps(sponsorblock), check_interval_hours, int(adaptive), channel_id)
+    )
+    return cursor.rowcount > 0
 
-async def update_channel(channel_id: str, limit: int, sponsorblock: Union[bool, str], check_interval_hours: int) -> bool:
-    async with _channels_lock:
-        raw = _load_channels_raw()
-        updated = False
-        for item in raw:
-            if item.get("id") == channel_id:
-                item["limit"] = limit
-                item["sponsorblock"] = sponsorblock
-                item["check_interval_hours"] = check_interval_hours
-                updated = True
-                break
-        if updated:
-            _save_channels_raw(raw)
+async def update_channel_urls(urls: dict) -> int:
+    """Write resolved canonical URLs back into the channel records (channel ID -> URL)"""
+    with transaction() as conn:
+        updated = 0
+        for channel_id, new_url in urls.items():
+            if new_url:
+                cursor = conn.execute("UPDATE channels SET url = ? WHERE id = ? AND url != ?", (new_url, channel_id, new_url))
+                updated += cursor.rowcount
         return updated
 
 async def delete_channel(channel_id: str) -> bool:
-    async with _channels_lock:
-        raw = _load_channels_raw()
-        initial_len = len(raw)
-        raw = [item for item in raw if item.get("id") != channel_id]
-        if len(raw) < initial_len:
-            _save_channels_raw(raw)
-            return True
-        return False
+    cursor = get_db().execute("DELETE FROM channels WHERE id = ?", (channel_id,))
+    return cursor.rowcount > 0
@@ -0,0 +1,250 @@
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from podqueue.config import settings
+
+logger = logging.getLogger("podqueue")
+
+# Ordered schema migrations; PRAGMA user_version records how many have been applied
+MIGRATIONS = [
+    """
+    CREATE TABLE channels (
+        id TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        "limit" INTEGER NOT NULL DEFAULT 5,
+        sponsorblock TEXT NOT NULL DEFAULT 'false',
+        check_interval_hours INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE TABLE channel_state (
+        channel_id TEXT PRIMARY KEY,
+        last_check INTEGER,
+        last_success INTEGER,
+        error_count INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        last_error_at INTEGER,
+        feed_etag TEXT,
+        feed_last_modified TEXT,
+        feed_newest_id TEXT,
+        feed_seen_id TEXT,
+        rss_dirty INTEGER NOT NULL DEFAULT 0,
+        feed_title TEXT,
+        feed_image_url TEXT
+    );
+    CREATE TABLE episodes (
+        channel_id TEXT NOT NULL,
+        video_id TEXT NOT NULL,
+        title TEXT,
+        description TEXT NOT NULL DEFAULT '',
+        upload_date TEXT,
+        duration NUMERIC NOT NULL DEFAULT 0,
+        thumbnail TEXT,
+        PRIMARY KEY (channel_id, video_id)
+    );
+    """,
+    """
+    CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        channel_ids TEXT,
+        force INTEGER NOT NULL DEFAULT 0,
+        priority INTEGER NOT NULL DEFAULT 0,
+        source TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        merged_into INTEGER,
+        created_at INTEGER NOT NULL,
+        started_at INTEGER,
+        finished_at INTEGER,
+        exit_code INTEGER
+    );
+    CREATE INDEX jobs_status ON jobs (status, priority DESC, id);
+    """,
+    """
+    CREATE TABLE governor (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        cooldown_until REAL NOT NULL DEFAULT 0,
+        backoff_level INTEGER NOT NULL DEFAULT 0,
+        waited_seconds REAL NOT NULL DEFAULT 0,
+        last_throttle_at REAL,
+        last_throttle_error TEXT
+    );
+    CREATE TABLE governor_counts (
+        kind TEXT PRIMARY KEY,
+        requests INTEGER NOT NULL DEFAULT 0,
+        throttles INTEGER NOT NULL DEFAULT 0
+    );
+    """,
+    """
+    CREATE TABLE download_retries (
+        channel_id TEXT NOT NULL,
+        video_id TEXT NOT NULL,
+        video_url TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error_class TEXT NOT NULL,
+        last_error TEXT,
+        first_failed_at INTEGER NOT NULL,
+        last_failed_at INTEGER NOT NULL,
+        next_retry_at INTEGER,
+        PRIMARY KEY (channel_id, video_id)
+    );
+    """,
+    """
+    ALTER TABLE channels ADD COLUMN adaptive INTEGER NOT NULL DEFAULT 0;
+    CREATE TABLE upload_history (
+        channel_id TEXT NOT NULL,
+        video_id TEXT NOT NULL,
+        upload_date TEXT,
+        timestamp INTEGER,
+        PRIMARY KEY (channel_id, video_id)
+    );
+    INSERT INTO upload_history (channel_id, video_id, upload_date)
+        SELECT channel_id, video_id, upload_date FROM episodes WHERE upload_date IS NOT NULL;
+    """,
+    """
+    ALTER TABLE jobs ADD COLUMN metrics TEXT;
+    """,
+]
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def _connect() -> sqlite3.Connection:
+    # Autocommit mode; multi-statement updates use transaction()
+    conn = sqlite3.connect(settings.DB_FILE, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the API process read while a sync worker process writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def get_db() -> sqlite3.Connection:
+    """The calling thread's connection to the PodQueue database (created on first use)"""
+    global _schema_ready
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _connect()
+        _local.conn = conn
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                _migrate(conn)
+                _schema_ready = True
+    return conn
+
+@contextmanager
+def transaction():
+    """Run statements atomically; IMMEDIATE takes the write lock up front so
+    concurrent writers wait on busy_timeout instead of failing mid-transaction."""
+    conn = get_db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _migrate(conn: sqlite3.Connection):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < len(MIGRATIONS):
+            for i in range(version, len(MIGRATIONS)):
+                for statement in MIGRATIONS[i].split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+            if version == 0:
+                _import_legacy_files(conn)
+            conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+# Legacy per-channel state JSON keys that map onto channel_state columns
+_LEGACY_STATE_KEYS = (
+    "feed_etag", "feed_last_modified", "feed_newest_id", "feed_seen_id",
+    "rss_dirty", "last_error", "last_error_at",
+)
+
+def _import_legacy_files(conn: sqlite3.Connection):
+    """One-time import of channels.json, .last_check files, state JSON and episodes.json"""
+    channels_file = settings.CHANNELS_FILE
+    if channels_file.exists():
+        try:
+            with open(channels_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except Exception as e:
+            raise RuntimeError(f"Cannot migrate {channels_file}: {e}") from e
+        for item in records:
+            conn.execute(
+                'INSERT OR IGNORE INTO channels (id, url, "limit", sponsorblock, check_interval_hours) VALUES (?, ?, ?, ?, ?)',
+                (item["id"], item["url"], item.get("limit", 5),
+                 json.dumps(item.get("sponsorblock", False)), item.get("check_interval_hours", 1))
+            )
+        logger.info(f"Migrated {len(records)} channel(s) from {channels_file.name}")
+
+    state_rows = {}
+    if settings.STATE_DIR.exists():
+        for check_file in settings.STATE_DIR.glob("*.last_check"):
+            value = check_file.read_text().strip()
+            if value.isdigit():
+                state_rows.setdefault(check_file.name[:-len(".last_check")], {})["last_check"] = int(value)
+        for state_file in settings.STATE_DIR.glob("*.json"):
+            try:
+                with open(state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.error(f"Skipping unreadable state file {state_file.name}: {e}")
+                continue
+            fields = {k: data[k] for k in _LEGACY_STATE_KEYS if k in data}
+            state_rows.setdefault(state_file.stem, {}).update(fields)
+    for channel_id, fields in state_rows.items():
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        conn.execute(
+            f"INSERT INTO channel_state (channel_id, {columns}) VALUES (?, {placeholders})",
+            (channel_id, *fields.values())
+        )
+
+    episode_count = 0
+    if settings.DOWNLOADS_DIR.exists():
+        for index_file in settings.DOWNLOADS_DIR.glob("*/episodes.json"):
+            channel_id = index_file.parent.name
+            try:
+                with open(index_file, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except Exception as e:
+                # The episode catalogue is rebuilt from .info.json files when missing
+                logger.error(f"Skipping unreadable episode index {index_file}: {e}")
+                continue
+            channel = index.get("channel") or {}
+            conn.execute(
+                "INSERT INTO channel_state (channel_id, feed_title, feed_image_url) VALUES (?, ?, ?) "
+                "ON CONFLICT(channel_id) DO UPDATE SET feed_title = excluded.feed_title, feed_image_url = excluded.feed_image_url",
+                (channel_id, channel.get("title"), channel.get("image_url"))
+            )
+            for video_id, ep in (index.get("episodes") or {}).items():
+                conn.execute(
+                    "INSERT OR REPLACE INTO episodes (channel_id, video_id, title, description, upload_date, duration, thumbnail) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (channel_id, video_id, ep.get("title"), ep.get("description") or "",
+                     ep.get("upload_date"), ep.get("duration") or 0, ep.get("thumbnail"))
+                )
+                episode_count += 1
+    # Seed the adaptive scheduler's history, as migration 5 does for existing databases
+    conn.execute(
+        "INSERT OR IGNORE INTO upload_history (channel_id, video_id, upload_date) "
+        "SELECT channel_id, video_id, upload_date FROM episodes WHERE upload_date IS NOT NULL"
+    )
+    if state_rows or episode_count:
+        logger.info(f"Migrated state of {len(state_rows)} channel(s) and {episode_count} episode(s) into {settings.DB_FILE.name}")
+
+    # Keep the old file as a backup, but make it obvious it is no longer read
+    if channels_file.exists():
+        channels_file.replace(channels_file.with_name(channels_file.name + ".migrated"))
@@ -3,20 +3,48 @@ import time
 import json
 import logging
 import gc
+import itertools
+import queue
+import threading
+import contextvars
 import yt_dlp
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from typing import List
 from podqueue.config import settings
-from podqueue.core.channels import Channel, load_channels
-from podqueue.utils.media import get_episode_sort_key
+from podqueue.core.adaptive import next_check_time, record_episode_upload
+from podqueue.core.channels import Channel, load_channels, update_channel_urls
+from podqueue.core.events import emit_event
+from podqueue.core.episodes import add_episode, remove_episodes, sorted_episode_files
+from podqueue.core.feed_check import feed_has_new_uploads, mark_feed_seen
+from podqueue.core.governor import RequestBudgetExhausted, youtube_request
+from podqueue.core.metrics import inc, observe_stage, set_gauge, timed_stage
+from podqueue.core.retries import classify_error, due_retries, held_video_ids, pending_video_ids, record_failure, record_success
+from podqueue.core.state import load_channel_state, mark_rss_dirty, record_channel_check, record_channel_error
+from podqueue.utils.process import get_rss_bytes
+from yt_dlp.postprocessor import FFmpegExtractAudioPP, ModifyChaptersPP, PostProcessor
+from yt_dlp.utils import parse_bytes
 
 logger = logging.getLogger("podqueue")
 job_logger = logging.getLogger("podqueue_job")
 
+# (path, mtime) -> validated cookies path, so cookies.txt is only re-parsed when it changes
+_cookies_cache = {}
+
 def get_valid_cookies_file() -> str | None:
     path = settings.COOKIES_FILE
-    if not path.exists():
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
         return None
+    key = (str(path), mtime)
+    if key not in _cookies_cache:
+        _cookies_cache.clear()
+        _cookies_cache[key] = _validate_cookies_file(path)
+    return _cookies_cache[key]
+
+def _validate_cookies_file(path: Path) -> str | None:
     try:
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
             first_line = f.readline()
@@ -52,28 +80,280 @@ class YTDLPLogger:
     def error(self, msg):
         self.logger.error(msg)
 
+# Last logged percentage per file, so parallel downloads do not share progress state
+_last_percent = {}
+# Time of the last progress event per file; the status stream needs a few updates a second at most
+_last_progress_event = {}
+PROGRESS_EVENT_INTERVAL = 0.5
+
 def ytdlp_progress_hook(d):
+    filename = d.get('filename')
+    video_id = (d.get('info_dict') or {}).get('id', '?')
+    channel_id = Path(filename).parent.name if filename else None
     if d['status'] == 'downloading':
         total = d.get('total_bytes') or d.get('total_bytes_estimate')
         downloaded = d.get('downloaded_bytes', 0)
+        percent = int(downloaded / total * 100) if total else None
+        # Live progress for the status stream, throttled per file
+        now = time.monotonic()
+        if now - _last_progress_event.get(filename, 0) >= PROGRESS_EVENT_INTERVAL:
+            _last_progress_event[filename] = now
+            emit_event(
+                "download", video_id=video_id, channel=channel_id, status="downloading",
+                percent=percent, downloaded_bytes=downloaded, total_bytes=total, speed=d.get('speed')
+            )
         if total:
-            percent = int(downloaded / total * 100)
             # Only log every 20% to prevent console spam in Web UI
-            last_percent = getattr(ytdlp_progress_hook, 'last_percent', -20)
+            last_percent = _last_percent.get(filename, -20)
             if percent >= last_percent + 20 or percent >= 100:
-                ytdlp_progress_hook.last_percent = percent
+                _last_percent[filename] = percent
                 speed = d.get('_speed_str', 'unknown speed')
                 eta = d.get('_eta_str', 'unknown ETA')
-                job_logger.info(f"[download] {percent}% of {total / (1024*1024):.2f}MiB at {speed} ETA {eta}")
+                job_logger.info(f"[download] {video_id}: {percent}% of {total / (1024*1024):.2f}MiB at {speed} ETA {eta}")
     elif d['status'] == 'finished':
         # Reset last_percent for next download
-        ytdlp_progress_hook.last_percent = -20
-        job_logger.info(f"Finished downloading: {d.get('filename')}. Processing...")
+        _last_percent.pop(filename, None)
+        _last_progress_event.pop(filename, None)
+        # No elapsed time means the file was already there and nothing was transferred
+        if d.get('elapsed') is not None:
+            observe_stage("download", d['elapsed'], channel_id)
+            inc("downloaded_bytes_total", d.get('downloaded_bytes') or d.get('total_bytes') or 0, channel=channel_id)
+        emit_event(
+            "download", video_id=video_id, channel=channel_id, status="processing",
+            percent=100, downloaded_bytes=d.get('downloaded_bytes') or d.get('total_bytes'),
+            total_bytes=d.get('total_bytes'), speed=None
+        )
+        job_logger.info(f"Finished downloading: {filename}. Processing...")
+
+SPONSORBLOCK_ALL_CATEGORIES = ['sponsor', 'intro', 'outro', 'selfpromo', 'preview', 'filler', 'interaction', 'music_offtopic', 'hook']
+
+def get_sponsorblock_categories(sb_val) -> tuple:
+    """Normalize a channel's sponsorblock setting to a tuple of categories (empty if disabled)"""
+    if not sb_val:
+        return ()
+    if sb_val in (True, 'true', '1', 'yes', 'on'):
+        return tuple(SPONSORBLOCK_ALL_CATEGORIES)
+    if isinstance(sb_val, str):
+        return tuple(c.strip() for c in sb_val.split(','))
+    return ('sponsor',)
+
+class BoundedYoutubeDL(yt_dlp.YoutubeDL):
+    """YoutubeDL whose post-processing (ffmpeg) waits for a slot from a shared semaphore"""
+    postprocess_slots = None
+
+    def post_process(self, filename, info, files_to_move=None):
+        channel_id = Path(filename).parent.name
+        if self.postprocess_slots is None:
+            with timed_stage("postprocess", channel_id):
+                return super().post_process(filename, info, files_to_move)
+        # Time spent queueing for a slot shows when ffmpeg, not the network, is the bottleneck
+        with timed_stage("postprocess_wait", channel_id):
+            self.postprocess_slots.acquire()
+        try:
+            with timed_stage("postprocess", channel_id):
+                return super().post_process(filename, info, files_to_move)
+        finally:
+            self.postprocess_slots.release()
+
+class BandwidthBudget:
+    """Splits a global download rate limit evenly across the downloads currently running.
+
+    yt-dlp's downloaders read 'ratelimit' from the live params dict on every block,
+    so rebalancing takes effect immediately for downloads already in progress.
+    """
+    def __init__(self, total_rate: int | None):
+        self.total_rate = total_rate
+        self._lock = threading.Lock()
+        self._active = []
+
+    @contextmanager
+    def share(self, ydl: yt_dlp.YoutubeDL):
+        if not self.total_rate:
+            yield
+            return
+        with self._lock:
+            self._active.append(ydl.params)
+            self._rebalance()
+        try:
+            yield
+        finally:
+            with self._lock:
+                # Compare by identity: params dicts of different workers can be equal
+                self._active = [p for p in self._active if p is not ydl.params]
+                self._rebalance()
+
+    def _rebalance(self):
+        if self._active:
+            per_download = max(1, self.total_rate // len(self._active))
+            for params in self._active:
+                params['ratelimit'] = per_download
+
+class DownloaderContext:
+    """Long-lived YoutubeDL instances shared by all channels of one sync.
+
+    One instance is kept per option profile (scan, plain download, and one per set of
+    SponsorBlock categories), so connection pools, cookie jars and extractor state survive
+    across videos. YoutubeDL is not thread-safe, so instances are also per thread.
+    It also carries the sync-wide bandwidth budget and the ffmpeg post-processing slots.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = []
+        self.created = 0
+        self.uses = 0
+        rate_limit = parse_bytes(settings.DOWNLOAD_RATE_LIMIT) if settings.DOWNLOAD_RATE_LIMIT else None
+        self.bandwidth = BandwidthBudget(rate_limit)
+        self.postprocess_slots = threading.BoundedSemaphore(settings.FFMPEG_CONCURRENCY)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get(self, key, factory):
+        cache = getattr(self._local, "instances", None)
+        if cache is None:
+            cache = self._local.instances = {}
+        ydl = cache.get(key)
+        if ydl is None:
+            ydl = cache[key] = factory()
+            with self._lock:
+                self._instances.append(ydl)
+                self.created += 1
+        with self._lock:
+            self.uses += 1
+        return ydl
+
+    def scan_ydl(self) -> yt_dlp.YoutubeDL:
+        return self._get("scan", lambda: yt_dlp.YoutubeDL({
+            'extract_flat': True,
+            'lazy_playlist': True,
+            'cookiefile': get_valid_cookies_file(),
+            'quiet': True,
+            'no_warnings': True,
+            'proxy': settings.YTDLP_PROXY,
+        }))
+
+    def download_ydl(self, download_dir: Path, sponsorblock_categories: tuple = ()) -> yt_dlp.YoutubeDL:
+        """Get the download instance for this SponsorBlock profile, pointed at download_dir"""
+        ydl = self._get(("download", sponsorblock_categories), lambda: build_download_ydl(sponsorblock_categories))
+        ydl.postprocess_slots = self.postprocess_slots
+        # The output directory is the only per-channel option; yt-dlp reads it per download
+        ydl.params['paths'] = {'home': str(download_dir)}
+        return ydl
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.error(f"Error closing yt-dlp instance: {e}")
+
+class AACPassthroughExtractAudioPP(FFmpegExtractAudioPP):
+    """FFmpegExtractAudio that does nothing when the download is already an AAC .m4a.
+
+    The stock post-processor reaches the same conclusion only after an ffprobe run;
+    the selected format's metadata already tells us, so skip the probe entirely.
+    Other AAC containers are still stream-copied and other codecs re-encoded.
+    """
+    @classmethod
+    def pp_key(cls):
+        return 'ExtractAudio'
+
+    def run(self, information):
+        if information.get('ext') == 'm4a' and (information.get('acodec') or '').startswith('mp4a'):
+            self.to_screen(f"Not converting audio {information['filepath']}; already AAC in m4a")
+            return [], information
+        return super().run(information)
+
+class SegmentAwareModifyChaptersPP(ModifyChaptersPP):
+    """ModifyChapters that is skipped when SponsorBlock returned no segments to cut"""
+    @classmethod
+    def pp_key(cls):
+        return 'ModifyChapters'
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        self._fixup_chapters(info)
+        if not info.get('sponsorblock_chapters'):
+            self.to_screen('No SponsorBlock segments to remove, skipping')
+            return [], info
+        return super().run(info)
 
-def resolve_channel_url(url: str, cookies_file: Path = None) -> str:
-    """Resolve @username or custom channel URL to standard channel URL and ensure it points to the videos tab"""
+def build_download_ydl(sponsorblock_categories: tuple = ()) -> BoundedYoutubeDL:
+    ydl_opts = {
+        'cookiefile': get_valid_cookies_file(),
+        'format': 'bestaudio[ext=m4a]/bestaudio/best',
+        'writeinfojson': True,
+        'restrictfilenames': True,
+        'logger': YTDLPLogger(job_logger),
+        'progress_hooks': [ytdlp_progress_hook],
+        'outtmpl': '%(id)s.%(ext)s',
+        'postprocessor_args': {'ffmpeg': ['-threads', '1']},
+        'noprogress': True,
+        'quiet': True,
+        'no_warnings': True,
+        'proxy': settings.YTDLP_PROXY,
+    }
+    
+    # Add SponsorBlock if enabled
+    if sponsorblock_categories:
+        ydl_opts['postprocessors'] = [{
+            'key': 'SponsorBlock',
+            'categories': list(sponsorblock_categories),
+            'when': 'after_filter',
+        }]
+
+    ydl = BoundedYoutubeDL(ydl_opts)
+    ydl.add_post_processor(AACPassthroughExtractAudioPP(ydl, preferredcodec='m4a'), when='post_process')
+    if sponsorblock_categories:
+        ydl.add_post_processor(
+            SegmentAwareModifyChaptersPP(ydl, remove_sponsor_segments=set(sponsorblock_categories)),
+            when='post_process'
+        )
+    return ydl
+
+def get_skip_reason(info: dict) -> str | None:
+    """Decide from a video's full metadata whether it should be skipped before downloading.
+
+    Returns None to download, 'live' for live/upcoming videos (retried on a later sync)
+    or 'short' for Shorts (detected by real duration and a vertical aspect ratio).
+    """
+    if info.get('live_status') in ('is_live', 'is_upcoming') or info.get('is_live'):
+        return 'live'
+
+    duration = info.get('duration')
+    if duration and duration <= settings.SHORTS_MAX_DURATION:
+        for f in info.get('formats') or []:
+            width, height = f.get('width'), f.get('height')
+            if f.get('vcodec') != 'none' and width and height:
+                if height > width:
+                    return 'short'
+                break
+    if '/shorts/' in (info.get('original_url') or info.get('webpage_url') or ''):
+        return 'short'
+    return None
+
+def record_archive(archive_file: Path, video_id: str):
+    """Append a video to the channel's yt-dlp style archive file"""
+    with open(archive_file, "a", encoding="utf-8") as f:
+        f.write(f"youtube {video_id}\n")
+
+def needs_resolution(url: str) -> bool:
+    """Whether resolving this URL requires a network request (@handle URLs)"""
+    return "@" in url and "youtube.com" in url
+
+def resolve_channel_url(url: str, cookies_file: Path = None, max_wait: float | None = None) -> str:
+    """Resolve @username or custom channel URL to standard channel URL and ensure it points to the videos tab.
+
+    max_wait bounds the wait for the request governor; RequestBudgetExhausted is raised beyond it.
+    """
     resolved = url
-    if "@" in url and "youtube.com" in url:
+    if needs_resolution(url):
         cookie_path = get_valid_cookies_file() if cookies_file == settings.COOKIES_FILE else (str(cookies_file) if cookies_file and cookies_file.exists() else None)
         opts = {
             'extract_flat': True,
@@ -85,11 +365,14 @@ def resolve_channel_url(url: str, cookies_file: Path = None) -> str:
         }
         with yt_dlp.YoutubeDL(opts) as ydl:
             try:
-                info = ydl.extract_info(url, download=False)
+                with youtube_request("resolve", max_wait):
+                    info = ydl.extract_info(url, download=False)
                 channel_id = info.get('channel_id') or info.get('id')
                 if channel_id:
                     resolved = f"https://www.youtube.com/channel/{channel_id}"
                     logger.info(f"Resolved URL {url} to {resolved}")
+            except RequestBudgetExhausted:
+                raise
             except Exception as e:
                 logger.error(f"Error resolving channel URL {url}: {e}")
                 
@@ -100,44 +383,51 @@ def resolve_channel_url(url: str, cookies_file: Path = None) -> str:
         
     return resolved
 
-def cleanup_old_episodes(download_dir: Path, archive_file: Path, limit: int):
-    """Delete old episodes exceeding the limit, sorting by YouTube upload date (newest first)"""
-    audio_files = sorted(
-        list(download_dir.glob("*.m4a")),
-        key=get_episode_sort_key,
-        reverse=True
-    )
+def cleanup_old_episodes(download_dir: Path, archive_file: Path, limit: int) -> int:
+    """Delete old episodes exceeding the limit, sorting by YouTube upload date (newest first).
+
+    Returns the number of deleted episodes; the channel's feed is flagged for a rebuild if any.
+    """
+    audio_files = sorted_episode_files(download_dir)
     audio_count = len(audio_files)
     job_logger.info(f"[{download_dir.name}] Found {audio_count} audio files, limit is {limit}")
     
-    if audio_count > limit:
-        to_delete = audio_files[limit:]
-        for file_path in to_delete:
-            job_logger.info(f"[{download_dir.name}] Deleting old episode: {file_path.name}")
-            
-            # Delete info.json
-            info_file = file_path.with_suffix(".info.json")
-            video_id = file_path.stem
-            
-            if info_file.exists():
-                try:
-                    info_file.unlink()
-                except Exception as e:
-                    job_logger.error(f"Error deleting info file {info_file}: {e}")
-                    
+    if audio_count <= limit:
+        return 0
+    
+    mark_rss_dirty(download_dir.name)
+    to_delete = audio_files[limit:]
+    for file_path in to_delete:
+        job_logger.info(f"[{download_dir.name}] Deleting old episode: {file_path.name}")
+        
+        # Delete info.json
+        info_file = file_path.with_suffix(".info.json")
+        video_id = file_path.stem
+        
+        if info_file.exists():
             try:
-                file_path.unlink()
+                info_file.unlink()
             except Exception as e:
-                job_logger.error(f"Error deleting audio file {file_path}: {e}")
+                job_logger.error(f"Error deleting info file {info_file}: {e}")
                 
-            # Keep in archive file to prevent yt-dlp from infinitely redownloading this pruned episode in future runs.
-            pass
+        try:
+            file_path.unlink()
+        except Exception as e:
+            job_logger.error(f"Error deleting audio file {file_path}: {e}")
+            
+        # Keep in archive file to prevent yt-dlp from infinitely redownloading this pruned episode in future runs.
+        pass
+    remove_episodes(download_dir, [f.stem for f in to_delete])
+    return len(to_delete)
 
-def cleanup_leftovers(download_dir: Path):
-    """Clean up leftover temp files"""
+def cleanup_leftovers(download_dir: Path, keep_video_ids: set = frozenset()):
+    """Clean up leftover temp files, except partial downloads of videos that will be retried
+    (yt-dlp resumes their .part files)"""
     job_logger.info(f"[{download_dir.name}] Cleaning up leftover temp and mp4 files...")
     for ext in ("*.mp4", "*.temp.mp4", "*.part", "*.ytdl", "*.temp.m4a"):
         for f in download_dir.glob(ext):
+            if f.name.split(".", 1)[0] in keep_video_ids:
+                continue
             if f.is_file() and not f.name.endswith(".info.json"):
                 try:
                     f.unlink()
@@ -145,185 +435,425 @@ def cleanup_leftovers(download_dir: Path):
                 except Exception as e:
                     job_logger.error(f"Error deleting leftover {f.name}: {e}")
 
-def run_download_job(force: bool = False):
-    """Run yt-dlp downloads for all configured channels"""
-    job_logger.info("Starting YouTube podcast sync...")
+def read_archive(archive_file: Path) -> set:
+    """Build the set of already downloaded video IDs from a yt-dlp archive file"""
+    archive_set = set()
+    if archive_file.exists():
+        try:
+            with open(archive_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("youtube "):
+                        archive_set.add(line.split(" ")[1])
+        except Exception as e:
+            job_logger.error(f"Error reading archive file: {e}")
+    return archive_set
+
+def is_channel_due(channel: Channel, current_time: int) -> bool:
+    """Check whether the channel's (manual or adaptive) check interval has elapsed since its last check"""
+    last_check_time = load_channel_state(channel.id).get("last_check")
+    if last_check_time is None:
+        return True
+    if due_retries(channel.id, current_time):
+        job_logger.info(f"[{channel.id}] Failed downloads are due for a retry, checking early.")
+        return True
+    next_check = next_check_time(channel, last_check_time)
+    if current_time < next_check:
+        remaining_minutes = (next_check - current_time + 59) // 60
+        job_logger.info(f"Skipping {channel.id}. Next check in about {remaining_minutes} minute(s).")
+        return False
+    return True
+
+def scan_channel(channel: Channel, ctx: DownloaderContext, precheck: bool = True) -> list | None:
+    """Prepare the channel directory and run the flat playlist extraction.
+
+    Runs on a scan worker thread, so every log line is prefixed with the channel ID.
+    Returns a list of (video_id, video_url) tuples that are not in the archive yet,
+    or None if the scan failed.
+    """
+    download_dir = settings.DOWNLOADS_DIR / channel.id
+    download_dir.mkdir(parents=True, exist_ok=True)
+    archive_file = download_dir / "archive.txt"
+    
+    # Clean up BEFORE download
+    with timed_stage("cleanup", channel.id):
+        cleanup_old_episodes(download_dir, archive_file, channel.limit)
+    
+    archive_set = read_archive(archive_file)
+
+    try:
+        # If URL is an @username URL, resolve it first. The resolved URL is kept on the
+        # channel so run_download_job can persist it and later syncs skip the lookup.
+        # Only @handle URLs need a lookup; timing the others would just record zeros
+        with timed_stage("resolve", channel.id) if needs_resolution(channel.url) else nullcontext():
+            resolved_url = resolve_channel_url(channel.url, settings.COOKIES_FILE)
+        if not needs_resolution(resolved_url):
+            channel.url = resolved_url
+    except Exception as e:
+        job_logger.error(f"[{channel.id}] Error resolving channel URL: {e}")
+        inc("errors_total", stage="resolve", type=classify_error(e)[0])
+        return None
+
+    # Due retries need a download pass even when the uploads feed is unchanged
+    retries_due = bool(due_retries(channel.id, int(time.time())))
+    if precheck and settings.FEED_PRECHECK and not retries_due:
+        with timed_stage("feed_check", channel.id):
+            has_new = feed_has_new_uploads(channel.id, resolved_url, archive_set)
+        if not has_new:
+            job_logger.info(f"[{channel.id}] No new uploads in feed, skipping playlist scan.")
+            return []
+
+    # Flat extraction pre-pass. Entries are consumed lazily (process=False), so
+    # continuation pages are only fetched while we still need more entries.
+    playlist_scan_limit = max(20, channel.limit * 5)
+    job_logger.info(f"[{channel.id}] Scanning playlist (limit {playlist_scan_limit})...")
+    
+    ydl = ctx.scan_ydl()
+    try:
+        with youtube_request("scan"), timed_stage("scan", channel.id):
+            new_videos, scanned = _scan_entries(channel, ydl, resolved_url, archive_set, playlist_scan_limit)
+    except Exception as e:
+        job_logger.error(f"[{channel.id}] Error scanning playlist: {e}")
+        record_channel_error(channel.id, f"Scan failed: {e}")
+        inc("errors_total", stage="scan", type=classify_error(e)[0])
+        return None
+
+    job_logger.info(f"[{channel.id}] Scan finished: {len(new_videos)} new video(s) in {scanned} scanned entries.")
+    return new_videos
+
+def _scan_entries(channel: Channel, ydl: yt_dlp.YoutubeDL, resolved_url: str, archive_set: set, playlist_scan_limit: int) -> tuple:
+    """Walk the flat playlist newest first; returns (new (video_id, video_url) tuples, entries scanned)"""
+    stop_after = settings.SCAN_ARCHIVED_RUN
+    new_videos = []
+    scanned = 0
+    info = ydl.extract_info(resolved_url, download=False, process=False)
+    # Follow a redirect result (e.g. a channel page pointing at its uploads tab)
+    if info.get('_type') in ('url', 'url_transparent'):
+        info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+    
+    if 'entries' in info:
+        valid_count = 0
+        archived_run = 0
+        for entry in itertools.islice(info['entries'], playlist_scan_limit):
+            scanned += 1
+            if not entry:
+                continue
+            # Layer 2 defense: Skip entries that are actually other playlists/tabs rather than videos
+            if entry.get('_type') == 'playlist':
+                continue
+            video_id = entry.get('id')
+            video_url = entry.get('url') or entry.get('webpage_url') or f"https://www.youtube.com/watch?v={video_id}"
+            
+            # Filter Shorts out based on URL or title
+            title = (entry.get('title') or '').lower()
+            is_short = False
+            if video_url and '/shorts/' in video_url:
+                is_short = True
+            if '#shorts' in title or 'shorts' in title:
+                # Might be a short, but let's trust URL more.
+                pass
+                
+            if is_short:
+                continue
+                
+            valid_count += 1
+            if valid_count > channel.limit:
+                break
+                
+            if video_id and video_id not in archive_set:
+                new_videos.append((video_id, video_url))
+                archived_run = 0
+            elif video_id:
+                # Uploads are listed newest first, so a run of archived IDs means
+                # everything older has been seen already (a run rather than a single
+                # hit tolerates pinned or re-ordered entries).
+                archived_run += 1
+                if stop_after and archived_run >= stop_after:
+                    job_logger.info(f"[{channel.id}] Reached {archived_run} archived videos in a row, stopping scan early.")
+                    break
+    return new_videos, scanned
+
+def download_video(channel: Channel, video_id: str, video_url: str, ctx: DownloaderContext) -> bool:
+    """Download a single video into the channel directory.
+
+    Returns False if a later sync must look at the video again (failed download or
+    deferred live/upcoming video), True otherwise.
+    """
+    download_dir = settings.DOWNLOADS_DIR / channel.id
+    archive_file = download_dir / "archive.txt"
+    
+    job_logger.info(f"[{channel.id}] Downloading video: {video_id} ({video_url})")
+    emit_event("download", video_id=video_id, channel=channel.id, status="starting", percent=0,
+               downloaded_bytes=0, total_bytes=None, speed=None)
+    ydl = ctx.download_ydl(download_dir, get_sponsorblock_categories(channel.sponsorblock))
+    try:
+        # One full extraction feeds both the skip decision and the download itself
+        with youtube_request("extract"), timed_stage("extract", channel.id):
+            info = ydl.extract_info(video_url, download=False, process=False)
+        skip_reason = get_skip_reason(info) if info.get('_type', 'video') == 'video' else None
+        if skip_reason == 'short':
+            job_logger.info(f"[{channel.id}] Skipping {video_id}: detected as a Short ({info.get('duration')}s, vertical).")
+            # Archive it so later scans never extract it again
+            record_archive(archive_file, video_id)
+            record_success(channel.id, video_id)
+            return True
+        if skip_reason == 'live':
+            job_logger.info(f"[{channel.id}] Skipping {video_id}: live or upcoming ({info.get('live_status')}), will retry on a later sync.")
+            return False
+        # Raises on failure, so only successful downloads are archived
+        with ctx.bandwidth.share(ydl), youtube_request("download"):
+            info = ydl.process_ie_result(info, download=True)
+        record_archive(archive_file, video_id)
+        record_success(channel.id, video_id)
+        add_episode(download_dir, video_id, info)
+        record_episode_upload(channel.id, video_id, info)
+        emit_event("channel", channel_id=channel.id)
+        mark_rss_dirty(channel.id)
+        return True
+    except Exception as e:
+        job_logger.error(f"[{channel.id}] Error downloading {video_id}: {e}")
+        record_channel_error(channel.id, f"Download of {video_id} failed: {e}")
+        retry = record_failure(channel.id, video_id, video_url, e)
+        inc("errors_total", stage="download", type=retry["error_class"] if retry else classify_error(e)[0])
+        return False
+    finally:
+        emit_event("download", video_id=video_id, status="done")
+
+def finalize_channel(channel: Channel, current_time: int, clean: bool = False):
+    """Clean up after downloads and record the check time.
+
+    A clean run (scan and all downloads succeeded) also marks the newest uploads feed
+    entry as seen so the next sync can skip the scan while the feed is unchanged.
+    """
+    download_dir = settings.DOWNLOADS_DIR / channel.id
+    archive_file = download_dir / "archive.txt"
+    
+    # Clean up AFTER download
+    with timed_stage("cleanup", channel.id):
+        cleanup_old_episodes(download_dir, archive_file, channel.limit)
+        cleanup_leftovers(download_dir, pending_video_ids(channel.id))
     
-    channels = []
-    # Run load_channels synchronously by creating a loop or since we are in to_thread, we run it inside the async event loop of the app.
-    # Wait, load_channels is an async function. Since run_download_job is running in a thread pool (asyncio.to_thread),
-    # we can run load_channels synchronously by using asyncio.run() or if a loop is already running in this thread, we fetch it.
-    # Actually, let's create a helper to load channels synchronously, or run it via asyncio.run().
+    record_channel_check(channel.id, current_time, clean)
+    if clean:
+        mark_feed_seen(channel.id)
+
+def _run_async(coro):
+    """Run a coroutine to completion from the job thread"""
     import asyncio
     try:
-        channels = asyncio.run(load_channels())
+        return asyncio.run(coro)
     except RuntimeError:
         # If loop is already running in this thread (unlikely for to_thread), use next method
         loop = asyncio.new_event_loop()
-        channels = loop.run_until_complete(load_channels())
-        loop.close()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+def run_download_job(force: bool = False, channel_ids: list | None = None, skip_video_ids: list | None = None,
+                     max_videos: int | None = None, max_rss_mb: int | None = None,
+                     resume_videos: dict | None = None) -> dict:
+    """Run yt-dlp downloads for all configured channels.
+
+    Playlist scans run concurrently on a bounded pool of SCAN_CONCURRENCY threads and
+    feed a download queue drained by DOWNLOAD_WORKERS threads, which share the global
+    DOWNLOAD_RATE_LIMIT and at most FFMPEG_CONCURRENCY concurrent post-processing runs.
+    Downloads start as soon as each channel's scan completes, so sync time follows the
+    number of channels with new uploads rather than the total channel count.
+
+    channel_ids restricts the sync to those channels and skip_video_ids are not attempted
+    again. Once max_videos videos were processed or the process RSS exceeds max_rss_mb,
+    no new work is started; channels left unfinished are returned under 'remaining'
+    together with the 'attempted' video IDs and, under 'pending', the queued videos each
+    of them did not get to. A fresh worker process continues with those as resume_videos
+    (channel ID -> [(video_id, video_url)]): they are downloaded without a rescan, which
+    the uploads feed precheck or the archived-run cutoff would end before reaching them.
+    """
+    result = {"remaining": [], "attempted": [], "pending": {}}
+    resume_videos = resume_videos or {}
+    job_logger.info("Starting YouTube podcast sync...")
+    
+    # load_channels is async, but this job runs in a worker thread without an event loop
+    channels = _run_async(load_channels())
+    if channel_ids is not None:
+        channels = [c for c in channels if c.id in channel_ids]
 
     if not channels:
         job_logger.info("No channels configured. Sync complete.")
-        return
+        return result
+
+    current_time = int(time.time())
+    # Channels carried over from a recycled worker are mid-sync, not subject to their schedule
+    due_channels = [c for c in channels if force or c.id in resume_videos or is_channel_due(c, current_time)]
+    if not due_channels:
+        job_logger.info("No channels due for a check. Sync complete.")
+        return result
+
+    original_urls = {c.id: c.url for c in due_channels}
+    skip_video_ids = set(skip_video_ids or ())
+    scan_channels = [c for c in due_channels if c.id not in resume_videos]
+    scan_workers = max(1, min(settings.SCAN_CONCURRENCY, len(scan_channels)))
+    download_workers = settings.DOWNLOAD_WORKERS
+    job_logger.info(f"Scanning {len(due_channels)} channel(s) with {scan_workers} scan worker(s), {download_workers} download worker(s)...")
+    emit_event("progress", stage="scanning", channels_total=len(due_channels), channels_done=0)
+
+    # Videos flow from the scan phase into this queue and are drained by the download
+    # workers. Each channel is finalized by whichever thread completes its last video.
+    download_queue = queue.Queue()
+    outstanding = {}
+    unfinished = {}
+    abandoned = set()
+    remaining = set()
+    pending = {}
+    attempted = []
+    finished = []
+    progress_lock = threading.Lock()
+
+    def should_stop() -> bool:
+        # Always let a worker process finish at least one video so recycling makes progress
+        if not attempted:
+            return False
+        if max_videos and len(attempted) >= max_videos:
+            return True
+        return bool(max_rss_mb) and get_rss_bytes() > max_rss_mb * 1024 * 1024
+
+    def complete_video(channel: Channel, done: bool, skipped: bool = False):
+        with progress_lock:
+            outstanding[channel.id] -= 1
+            if skipped:
+                abandoned.add(channel.id)
+            elif not done:
+                unfinished[channel.id] += 1
+            last = outstanding[channel.id] == 0
+            if last and channel.id in abandoned:
+                remaining.add(channel.id)
+                return
+        if last:
+            channel_finished(channel, unfinished[channel.id] == 0)
 
-    for channel in channels:
+    def channel_finished(channel: Channel, clean: bool):
+        finalize_channel(channel, current_time, clean=clean)
+        job_logger.info(f"--- Finished processing: {channel.id} ---")
+        with progress_lock:
+            finished.append(channel.id)
+            done_count = len(finished)
+        emit_event("progress", channels_done=done_count)
+
+    def queue_channel(channel: Channel, new_videos: list | None, resumed: bool = False):
+        """Queue a scanned (or resumed) channel's videos, or finalize it if there are none"""
         job_logger.info(f"--- Processing: {channel.id} ---")
-        
-        # Check interval
-        last_check_file = settings.STATE_DIR / f"{channel.id}.last_check"
-        current_time = int(time.time())
-        
-        if not force and last_check_file.exists():
-            try:
-                last_check_str = last_check_file.read_text().strip()
-                if last_check_str.isdigit():
-                    last_check_time = int(last_check_str)
-                    next_check_time = last_check_time + (channel.check_interval_hours * 3600)
-                    if current_time < next_check_time:
-                        remaining_minutes = (next_check_time - current_time + 59) // 60
-                        job_logger.info(f"Skipping {channel.id}. Next check in about {remaining_minutes} minute(s).")
-                        continue
-            except Exception as e:
-                job_logger.error(f"Error reading last check file for {channel.id}: {e}")
+        emit_event("progress", channel=channel.id)
+        clean = new_videos is not None
+        if new_videos is not None and not resumed:
+            # Failed downloads wait for their backoff (or were given up); due ones rejoin
+            held = held_video_ids(channel.id, current_time)
+            new_videos = [v for v in new_videos if v[0] not in held]
+            queued_ids = {v[0] for v in new_videos}
+            new_videos += [v for v in due_retries(channel.id, current_time) if v[0] not in queued_ids]
+        if new_videos and skip_video_ids:
+            # Already attempted by an earlier worker process of this sync
+            fresh = [v for v in new_videos if v[0] not in skip_video_ids]
+            clean = len(fresh) == len(new_videos)
+            new_videos = fresh
+        if not new_videos:
+            channel_finished(channel, clean)
+            return
 
-        # Directory setup
-        download_dir = settings.DOWNLOADS_DIR / channel.id
-        download_dir.mkdir(parents=True, exist_ok=True)
-        archive_file = download_dir / "archive.txt"
-        
-        # Clean up BEFORE download
-        cleanup_old_episodes(download_dir, archive_file, channel.limit)
-        
-        # Build list of already downloaded video IDs
-        archive_set = set()
-        if archive_file.exists():
-            try:
-                with open(archive_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if line.startswith("youtube "):
-                            archive_set.add(line.split(" ")[1])
-            except Exception as e:
-                job_logger.error(f"Error reading archive file: {e}")
+        # Only download up to the channel limit
+        videos_to_download = new_videos[:channel.limit]
+        job_logger.info(f"[{channel.id}] Queueing the newest {len(videos_to_download)} new episodes (channel limit is {channel.limit}).")
+        with progress_lock:
+            outstanding[channel.id] = len(videos_to_download)
+            unfinished[channel.id] = 0
+        for video_id, video_url in videos_to_download:
+            download_queue.put((channel, video_id, video_url))
+        emit_event("progress", queue_depth=download_queue.qsize())
 
-        # Flat extraction pre-pass
-        playlist_scan_limit = max(20, channel.limit * 5)
-        job_logger.info(f"Scanning playlist (limit {playlist_scan_limit})...")
-        
-        flat_opts = {
-            'extract_flat': True,
-            'playlistend': playlist_scan_limit,
-            'cookiefile': get_valid_cookies_file(),
-            'quiet': True,
-            'no_warnings': True,
-            'proxy': settings.YTDLP_PROXY,
-        }
-        
-        new_videos = []
-        with yt_dlp.YoutubeDL(flat_opts) as ydl:
+    def download_worker():
+        while True:
+            item = download_queue.get()
+            if item is None:
+                return
+            channel, video_id, video_url = item
+            emit_event("progress", queue_depth=download_queue.qsize())
+            with progress_lock:
+                stopping = should_stop()
+                if not stopping:
+                    attempted.append(video_id)
+            if stopping:
+                with progress_lock:
+                    pending.setdefault(channel.id, []).append((video_id, video_url))
+                complete_video(channel, False, skipped=True)
+                continue
             try:
-                # If URL is an @username URL, resolve it first
-                resolved_url = resolve_channel_url(channel.url, settings.COOKIES_FILE)
-                info = ydl.extract_info(resolved_url, download=False)
-                
-                if 'entries' in info:
-                    valid_count = 0
-                    for entry in info['entries']:
-                        if not entry:
-                            continue
-                        # Layer 2 defense: Skip entries that are actually other playlists/tabs rather than videos
-                        if entry.get('_type') == 'playlist':
-                            continue
-                        video_id = entry.get('id')
-                        video_url = entry.get('url') or entry.get('webpage_url') or f"https://www.youtube.com/watch?v={video_id}"
-                        
-                        # Filter Shorts out based on URL or title
-                        title = (entry.get('title') or '').lower()
-                        is_short = False
-                        if video_url and '/shorts/' in video_url:
-                            is_short = True
-                        if '#shorts' in title or 'shorts' in title:
-                            # Might be a short, but let's trust URL more.
-                            pass
-                            
-                        if is_short:
-                            continue
-                            
-                        valid_count += 1
-                        if valid_count > channel.limit:
-                            break
-                            
-                        if video_id and video_id not in archive_set:
-                            new_videos.append((video_id, video_url))
+                done = download_video(channel, video_id, video_url, ctx)
             except Exception as e:
-                job_logger.error(f"Error scanning playlist for {channel.id}: {e}")
-
-        # Download new videos one by one (only download up to the channel limit)
-        if new_videos:
-            videos_to_download = new_videos[:channel.limit]
-            job_logger.info(f"Limiting downloads to the newest {len(videos_to_download)} new episodes (channel limit is {channel.limit}).")
-            for video_id, video_url in videos_to_download:
-                job_logger.info(f"Downloading video: {video_id} ({video_url})")
-                
-                ydl_opts = {
-                    'cookiefile': get_valid_cookies_file(),
-                    'download_archive': str(archive_file),
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'm4a',
-                    }],
-                    'writeinfojson': True,
-                    'restrictfilenames': True,
-                    'logger': YTDLPLogger(job_logger),
-                    'progress_hooks': [ytdlp_progress_hook],
-                    'outtmpl': str(download_dir / '%(id)s.%(ext)s'),
-                    'postprocessor_args': {'ffmpeg': ['-threads', '1']},
-                    'noprogress': True,
-                    'quiet': True,
-                    'no_warnings': True,
-                    'proxy': settings.YTDLP_PROXY,
+                job_logger.error(f"[{channel.id}] Error downloading {video_id}: {e}")
+                done = False
+            set_gauge("worker_resident_memory_bytes", get_rss_bytes())
+            complete_video(channel, done)
+
+    with DownloaderContext() as ctx:
+        # Worker threads run in a copy of the job's context, so their metrics are
+        # attributed to the job when the sync runs in-process
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(download_worker,),
+                             name=f"podqueue-download-{i}", daemon=True)
+            for i in range(download_workers)
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=scan_workers, thread_name_prefix="podqueue-scan") as pool:
+                futures = {
+                    pool.submit(contextvars.copy_context().run, scan_channel, channel, ctx, not force): channel
+                    for channel in scan_channels
                 }
-                
-                # Add SponsorBlock if enabled
-                sb_val = channel.sponsorblock
-                if sb_val:
-                    if sb_val in (True, 'true', '1', 'yes', 'on'):
-                        categories = ['sponsor', 'intro', 'outro', 'selfpromo', 'preview', 'filler', 'interaction', 'music_offtopic', 'hook']
-                    elif isinstance(sb_val, str):
-                        categories = [c.strip() for c in sb_val.split(',')]
-                    else:
-                        categories = ['sponsor']
-
-                    ydl_opts['postprocessors'].append({
-                        'key': 'SponsorBlock',
-                        'categories': categories,
-                        'when': 'after_filter',
-                    })
-                    ydl_opts['postprocessors'].append({
-                        'key': 'ModifyChapters',
-                        'remove_sponsor_segments': set(categories),
-                    })
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                for channel in due_channels:
+                    if channel.id in resume_videos:
+                        job_logger.info(f"[{channel.id}] Resuming {len(resume_videos[channel.id])} video(s) left by the previous worker.")
+                        queue_channel(channel, [tuple(v) for v in resume_videos[channel.id]], resumed=True)
+                for future in as_completed(futures):
+                    channel = futures[future]
+                    with progress_lock:
+                        stopping = should_stop()
+                    if stopping or future.cancelled():
+                        # Leave this channel to the next worker process and stop scanning new ones
+                        remaining.add(channel.id)
+                        for f in futures:
+                            f.cancel()
+                        continue
                     try:
-                        # Extract and download
-                        ydl.download([video_url])
+                        new_videos = future.result()
                     except Exception as e:
-                        job_logger.error(f"Error downloading {video_id}: {e}")
-                        
-        # Clean up AFTER download
-        cleanup_old_episodes(download_dir, archive_file, channel.limit)
-        cleanup_leftovers(download_dir)
-        
-        # Write last check time
+                        job_logger.error(f"[{channel.id}] Error preparing channel: {e}")
+                        continue
+                    queue_channel(channel, new_videos)
+            # Scans are done, only queued downloads are left
+            emit_event("progress", stage="downloading")
+        finally:
+            for _ in threads:
+                download_queue.put(None)
+            for t in threads:
+                t.join()
+    job_logger.info(f"Used {ctx.created} yt-dlp instance(s) for {ctx.uses} extraction(s).")
+    result["remaining"] = sorted(remaining)
+    result["attempted"] = list(attempted)
+    result["pending"] = {channel_id: pending[channel_id] for channel_id in remaining if channel_id in pending}
+
+    # Persist URLs resolved during this sync so they are never resolved again
+    resolved_urls = {c.id: c.url for c in due_channels if c.url != original_urls[c.id]}
+    if resolved_urls:
         try:
-            last_check_file.write_text(str(current_time))
+            updated = _run_async(update_channel_urls(resolved_urls))
+            job_logger.info(f"Saved {updated} resolved channel URL(s).")
         except Exception as e:
-            job_logger.error(f"Error writing last check file for {channel.id}: {e}")
-            
-        job_logger.info(f"--- Finished processing: {channel.id} ---")
+            job_logger.error(f"Error saving resolved channel URLs: {e}")
         
-    job_logger.info("Sync complete.")
+    if remaining:
+        job_logger.info(f"Worker budget reached, {len(remaining)} channel(s) left for the next worker.")
+    else:
+        job_logger.info("Sync complete.")
     gc.collect()
+    return result
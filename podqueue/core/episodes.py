@@ -0,0 +1,150 @@
+import json
+import datetime
+import logging
+from pathlib import Path
+from podqueue.config import settings
+from podqueue.core.db import get_db, transaction
+from podqueue.core.state import load_channel_state, update_channel_state
+from podqueue.utils.media import get_best_thumbnail, get_best_episode_thumbnail
+
+logger = logging.getLogger("podqueue")
+job_logger = logging.getLogger("podqueue_job")
+
+_EPISODE_FIELDS = ("title", "description", "upload_date", "duration", "thumbnail")
+
+def episode_record(info: dict) -> dict:
+    """Reduce a yt-dlp info dict to the fields PodQueue actually uses"""
+    return {
+        "title": info.get("title"),
+        "description": info.get("description") or "",
+        "upload_date": info.get("upload_date"),
+        "duration": info.get("duration") or 0,
+        "thumbnail": get_best_episode_thumbnail(info.get("thumbnails") or []),
+    }
+
+def channel_record(info: dict) -> dict:
+    return {
+        "title": info.get("channel"),
+        "image_url": get_best_thumbnail(info.get("thumbnails") or []),
+    }
+
+def _read_info_json(info_file: Path) -> dict | None:
+    try:
+        with open(info_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        job_logger.error(f"Error reading episode info {info_file.name}: {e}")
+        return None
+
+def _upsert_episode(conn, channel_id: str, video_id: str, record: dict):
+    conn.execute(
+        "INSERT OR REPLACE INTO episodes (channel_id, video_id, title, description, upload_date, duration, thumbnail) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (channel_id, video_id, *(record[k] for k in _EPISODE_FIELDS))
+    )
+
+def _save_channel_record(channel_id: str, record: dict):
+    update_channel_state(channel_id, feed_title=record["title"], feed_image_url=record["image_url"])
+
+def save_episode_index(podcast_dir: Path, index: dict):
+    """Replace a channel's episode catalogue with the given index"""
+    channel_id = podcast_dir.name
+    with transaction() as conn:
+        conn.execute("DELETE FROM episodes WHERE channel_id = ?", (channel_id,))
+        for video_id, record in index["episodes"].items():
+            _upsert_episode(conn, channel_id, video_id, record)
+    if index.get("channel"):
+        _save_channel_record(channel_id, index["channel"])
+
+def rebuild_episode_index(podcast_dir: Path) -> dict:
+    """Build the catalogue from the .info.json files of an existing library"""
+    index = {"channel": {}, "episodes": {}}
+    # Same heuristic generate_rss always used: the longest info filename describes the channel
+    info_files = sorted(podcast_dir.glob("*.info.json"), key=lambda x: len(x.name), reverse=True)
+    for info_file in info_files:
+        video_id = info_file.name[:-len(".info.json")]
+        if not (podcast_dir / f"{video_id}.m4a").exists():
+            continue
+        info = _read_info_json(info_file)
+        if info is None:
+            continue
+        if not index["channel"]:
+            index["channel"] = channel_record(info)
+        index["episodes"][video_id] = episode_record(info)
+    save_episode_index(podcast_dir, index)
+    job_logger.info(f"[{podcast_dir.name}] Rebuilt episode index ({len(index['episodes'])} episodes)")
+    return index
+
+def load_episode_index(podcast_dir: Path) -> dict:
+    """Load a channel's episode catalogue, reconciled with the audio files actually on disk.
+
+    Episodes whose audio is gone are dropped and audio files without an entry are
+    indexed from their .info.json (which also covers libraries that predate the catalogue).
+    """
+    channel_id = podcast_dir.name
+    rows = get_db().execute(
+        "SELECT video_id, title, description, upload_date, duration, thumbnail FROM episodes WHERE channel_id = ?",
+        (channel_id,)
+    ).fetchall()
+    episodes = {row["video_id"]: {k: row[k] for k in _EPISODE_FIELDS} for row in rows}
+    state = load_channel_state(channel_id)
+    channel = {"title": state["feed_title"], "image_url": state.get("feed_image_url")} if state.get("feed_title") else {}
+
+    audio_ids = {p.stem for p in podcast_dir.glob("*.m4a") if ".temp." not in p.name}
+    gone = [video_id for video_id in episodes if video_id not in audio_ids]
+    missing = audio_ids - episodes.keys()
+    if not gone and not missing:
+        return {"channel": channel, "episodes": episodes}
+
+    with transaction() as conn:
+        for video_id in gone:
+            del episodes[video_id]
+            conn.execute("DELETE FROM episodes WHERE channel_id = ? AND video_id = ?", (channel_id, video_id))
+        for video_id in missing:
+            info_file = podcast_dir / f"{video_id}.info.json"
+            info = _read_info_json(info_file) if info_file.exists() else None
+            episodes[video_id] = episode_record(info) if info else episode_record({"title": video_id})
+            _upsert_episode(conn, channel_id, video_id, episodes[video_id])
+            if info and not channel:
+                channel = channel_record(info)
+    if channel and not state.get("feed_title"):
+        _save_channel_record(channel_id, channel)
+    return {"channel": channel, "episodes": episodes}
+
+def add_episode(podcast_dir: Path, video_id: str, info: dict):
+    """Record a freshly downloaded episode (called once, at download time)"""
+    _upsert_episode(get_db(), podcast_dir.name, video_id, episode_record(info))
+    if info.get("channel") or info.get("thumbnails"):
+        _save_channel_record(podcast_dir.name, channel_record(info))
+
+def remove_episodes(podcast_dir: Path, video_ids: list):
+    get_db().executemany(
+        "DELETE FROM episodes WHERE channel_id = ? AND video_id = ?",
+        [(podcast_dir.name, video_id) for video_id in video_ids]
+    )
+
+def sorted_episode_files(podcast_dir: Path, index: dict | None = None) -> list:
+    """Audio files of a channel, newest upload first (file mtime breaks ties / fills gaps)"""
+    if index is None:
+        index = load_episode_index(podcast_dir)
+    episodes = index["episodes"]
+
+    def sort_key(file_path: Path) -> tuple:
+        try:
+            mtime = file_path.stat().st_mtime
+        except OSError:
+            mtime = 0.0
+        upload_date = (episodes.get(file_path.stem) or {}).get("upload_date")
+        if upload_date and len(upload_date) == 8 and upload_date.isdigit():
+            return (upload_date, mtime)
+        # Fallback: format mtime as YYYYMMDD, like get_episode_sort_key
+        return (datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc).strftime("%Y%m%d"), mtime)
+
+    audio_files = [podcast_dir / f"{video_id}.m4a" for video_id in episodes]
+    return sorted(audio_files, key=sort_key, reverse=True)
+
+if __name__ == "__main__":
+    # One-off rebuild from .info.json files: python -m podqueue.core.episodes
+    for channel_dir in sorted(settings.DOWNLOADS_DIR.iterdir()):
+        if channel_dir.is_dir():
+            rebuild_episode_index(channel_dir)
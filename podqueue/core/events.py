@@ -0,0 +1,118 @@
+import copy
+import asyncio
+import threading
+
+def _empty_progress() -> dict:
+    return {
+        "stage": None,
+        "channel": None,
+        "channels_total": 0,
+        "channels_done": 0,
+        "queue_depth": 0,
+        "downloads": {},
+    }
+
+class StatusSubscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.changed = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until the status changed since the last wait; False on timeout"""
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.changed.clear()
+        return True
+
+class JobStatusPublisher:
+    """Latest job state and sync progress, pushed to /api/jobs/status/stream subscribers.
+
+    Updates only flag subscribers as changed; each stream then sends the newest snapshot,
+    so bursts of progress updates coalesce and a slow client never queues stale states.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._status = {
+            "running": False,
+            "current_job": None,
+            "last_run": None,
+            "last_exit_code": 0,
+            "progress": _empty_progress(),
+            "queue": [],
+        }
+        self._subscribers = set()
+
+    def apply(self, kind: str, data: dict):
+        with self._lock:
+            progress = self._status["progress"]
+            if kind == "job":
+                if "running" in data:
+                    # A job started or finished: progress of the previous one is stale
+                    self._status["progress"] = _empty_progress()
+                self._status.update(data)
+            elif kind == "download":
+                video_id = data["video_id"]
+                if data.get("status") == "done":
+                    progress["downloads"].pop(video_id, None)
+                else:
+                    progress["downloads"][video_id] = {k: v for k, v in data.items() if k != "video_id"}
+            elif kind == "progress":
+                progress.update(data)
+            elif kind == "queue":
+                self._status["queue"] = data["jobs"]
+            else:
+                return
+            self._version += 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.changed.set)
+            except RuntimeError:
+                # Loop already closed (shutdown)
+                pass
+
+    def snapshot(self) -> tuple:
+        with self._lock:
+            return self._version, copy.deepcopy(self._status)
+
+    def subscribe(self) -> StatusSubscription:
+        subscription = StatusSubscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+job_status = JobStatusPublisher()
+
+# In-process consumers of events besides the status stream (e.g. the channel status cache)
+_listeners = []
+
+def add_event_listener(listener):
+    _listeners.append(listener)
+
+def _dispatch(kind: str, data: dict):
+    job_status.apply(kind, data)
+    for listener in _listeners:
+        listener(kind, data)
+
+# Where emit_event delivers; worker processes redirect it to their parent
+_event_sink = _dispatch
+
+def set_event_sink(sink):
+    global _event_sink
+    _event_sink = sink
+
+def emit_event(kind: str, **data):
+    """Publish a job state, progress, queue or channel update ('job', 'progress', 'download', 'queue' or 'channel')"""
+    try:
+        _event_sink(kind, data)
+    except Exception:
+        # Progress reporting must never break a sync
+        pass
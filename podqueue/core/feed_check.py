@@ -0,0 +1,115 @@
+import re
+import datetime
+import logging
+import requests
+import xml.etree.ElementTree as ET
+from podqueue.config import settings
+from podqueue.core.adaptive import record_uploads
+from podqueue.core.state import load_channel_state, update_channel_state
+from podqueue.core.governor import youtube_request
+
+logger = logging.getLogger("podqueue")
+job_logger = logging.getLogger("podqueue_job")
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+YT_NS = "{http://www.youtube.com/xml/schemas/2015}"
+
+def get_uploads_feed_url(resolved_url: str) -> str | None:
+    """Build the Atom feed URL for a resolved channel or playlist URL, if it has one"""
+    match = re.search(r"/channel/(UC[\w-]+)", resolved_url)
+    if match:
+        return f"{settings.YOUTUBE_FEED_URL}?channel_id={match.group(1)}"
+    match = re.search(r"[?&]list=([\w-]+)", resolved_url)
+    if match:
+        return f"{settings.YOUTUBE_FEED_URL}?playlist_id={match.group(1)}"
+    return None
+
+def parse_newest_video_id(content: bytes) -> str | None:
+    """Return the video ID of the first (newest) entry of an uploads Atom feed"""
+    root = ET.fromstring(content)
+    entry = root.find(f"{ATOM_NS}entry")
+    if entry is None:
+        return None
+    video_id = entry.find(f"{YT_NS}videoId")
+    return video_id.text.strip() if video_id is not None and video_id.text else None
+
+def parse_feed_uploads(content: bytes) -> list:
+    """(video_id, None, published timestamp) of every entry of an uploads Atom feed"""
+    uploads = []
+    for entry in ET.fromstring(content).iterfind(f"{ATOM_NS}entry"):
+        video_id = entry.find(f"{YT_NS}videoId")
+        published = entry.find(f"{ATOM_NS}published")
+        if video_id is None or not video_id.text or published is None or not published.text:
+            continue
+        try:
+            timestamp = int(datetime.datetime.fromisoformat(published.text.strip()).timestamp())
+        except ValueError:
+            continue
+        uploads.append((video_id.text.strip(), None, timestamp))
+    return uploads
+
+def feed_has_new_uploads(channel_id: str, resolved_url: str, archive_set: set) -> bool:
+    """Conditional GET of the channel's uploads feed to decide whether a playlist scan is needed.
+
+    Returns False only when the feed is unchanged (304) or its newest video is already archived
+    or was fully handled by a previous sync. Any error falls back to scanning.
+    """
+    feed_url = get_uploads_feed_url(resolved_url)
+    if not feed_url:
+        return True
+
+    state = load_channel_state(channel_id)
+    headers = {}
+    if state.get("feed_etag"):
+        headers["If-None-Match"] = state["feed_etag"]
+    if state.get("feed_last_modified"):
+        headers["If-Modified-Since"] = state["feed_last_modified"]
+
+    # Same exit as yt-dlp (a proxy is how blocked hosts reach YouTube at all) and the same
+    # request budget, so a throttling cooldown also pauses feed checks
+    proxies = {"http": settings.YTDLP_PROXY, "https": settings.YTDLP_PROXY} if settings.YTDLP_PROXY else None
+    try:
+        with youtube_request("feed"):
+            response = requests.get(feed_url, headers=headers, timeout=10, proxies=proxies)
+            if response.status_code == 429:
+                # Raised inside the request so the governor starts its cooldown
+                response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        job_logger.warning(f"[{channel_id}] Uploads feed check failed, scanning playlist: {e}")
+        return True
+
+    if response.status_code == 304:
+        newest_id = state.get("feed_newest_id")
+        job_logger.info(f"[{channel_id}] Uploads feed not modified.")
+    elif response.ok:
+        try:
+            newest_id = parse_newest_video_id(response.content)
+        except ET.ParseError as e:
+            job_logger.warning(f"[{channel_id}] Could not parse uploads feed, scanning playlist: {e}")
+            return True
+        # Exact publish times teach the adaptive schedule each channel's usual upload hour
+        try:
+            record_uploads(channel_id, parse_feed_uploads(response.content))
+        except Exception as e:
+            job_logger.warning(f"[{channel_id}] Could not record upload times: {e}")
+        state = update_channel_state(
+            channel_id,
+            feed_etag=response.headers.get("ETag"),
+            feed_last_modified=response.headers.get("Last-Modified"),
+            feed_newest_id=newest_id
+        )
+    else:
+        job_logger.warning(f"[{channel_id}] Uploads feed returned HTTP {response.status_code}, scanning playlist.")
+        return True
+
+    if not newest_id:
+        return True
+    if newest_id in archive_set or newest_id == state.get("feed_seen_id"):
+        return False
+    return True
+
+def mark_feed_seen(channel_id: str):
+    """Remember that the newest feed entry was fully handled, so unchanged feeds can skip the scan"""
+    state = load_channel_state(channel_id)
+    if state.get("feed_newest_id") and state.get("feed_seen_id") != state["feed_newest_id"]:
+        update_channel_state(channel_id, feed_seen_id=state["feed_newest_id"])
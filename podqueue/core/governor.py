@@ -0,0 +1,161 @@
+import re
+import time
+import logging
+from contextlib import contextmanager
+from podqueue.config import settings
+from podqueue.core.db import get_db, transaction
+from podqueue.core.metrics import observe_stage
+
+logger = logging.getLogger("podqueue")
+job_logger = logging.getLogger("podqueue_job")
+
+# yt-dlp error texts that mean YouTube is throttling or bot-checking us, not that one video is broken
+THROTTLE_RE = re.compile(
+    r"HTTP Error 429|Too Many Requests|not a bot|rate[- ]?limit|try again later",
+    re.IGNORECASE
+)
+
+# Longest single sleep, so a shortened cooldown or refilled bucket is noticed
+MAX_SLEEP_SECONDS = 30
+# Waits longer than this are logged
+LOG_WAIT_SECONDS = 5
+
+def is_throttle_error(error) -> bool:
+    return bool(THROTTLE_RE.search(str(error)))
+
+class RequestBudgetExhausted(Exception):
+    """A request would have to wait longer than its caller allows (e.g. an interactive API call)"""
+
+    def __init__(self, kind: str, retry_after: float):
+        super().__init__(f"YouTube requests are paused, the next {kind} request is possible in {int(retry_after) + 1}s")
+        self.retry_after = retry_after
+
+class RequestGovernor:
+    """Token bucket shared by every YouTube request of every PodQueue process.
+
+    The bucket lives in the database, so scans, URL resolution and downloads in the API
+    process and in all sync worker processes draw from one YOUTUBE_REQUESTS_PER_MINUTE
+    budget (bursts of up to YOUTUBE_REQUEST_BURST). When a request fails with a
+    throttling or bot-check error, the bucket is emptied and every caller waits out a
+    cooldown that doubles per consecutive throttle (THROTTLE_BACKOFF_SECONDS up to
+    THROTTLE_MAX_BACKOFF_SECONDS); successful requests after the cooldown step it back down.
+    """
+
+    def _rate(self) -> float:
+        return settings.YOUTUBE_REQUESTS_PER_MINUTE / 60
+
+    def _load(self, conn, now: float):
+        row = conn.execute("SELECT * FROM governor WHERE id = 1").fetchone()
+        if row is None:
+            conn.execute("INSERT INTO governor (id, tokens, updated_at) VALUES (1, ?, ?)", (settings.YOUTUBE_REQUEST_BURST, now))
+            row = conn.execute("SELECT * FROM governor WHERE id = 1").fetchone()
+        tokens = min(settings.YOUTUBE_REQUEST_BURST, row["tokens"] + max(0.0, now - row["updated_at"]) * self._rate())
+        return row, tokens
+
+    def _try_acquire(self, kind: str) -> float:
+        """Take a token; returns 0 on success or how long to wait before trying again"""
+        with transaction() as conn:
+            now = time.time()
+            row, tokens = self._load(conn, now)
+            if now < row["cooldown_until"]:
+                wait = row["cooldown_until"] - now
+            elif not self._rate() or tokens >= 1:
+                tokens = tokens - 1 if self._rate() else tokens
+                wait = 0.0
+                conn.execute(
+                    "INSERT INTO governor_counts (kind, requests) VALUES (?, 1) "
+                    "ON CONFLICT(kind) DO UPDATE SET requests = requests + 1",
+                    (kind,)
+                )
+            else:
+                wait = (1 - tokens) / self._rate()
+            conn.execute("UPDATE governor SET tokens = ?, updated_at = ? WHERE id = 1", (tokens, now))
+        return wait
+
+    def acquire(self, kind: str, max_wait: float | None = None):
+        """Block until a request of this kind ('scan', 'resolve', 'download') may be sent.
+
+        With max_wait, raise RequestBudgetExhausted instead of sleeping past it.
+        """
+        waited = 0.0
+        logged = False
+        while True:
+            wait = self._try_acquire(kind)
+            if not wait:
+                break
+            if max_wait is not None and waited + wait > max_wait:
+                raise RequestBudgetExhausted(kind, wait)
+            if wait > LOG_WAIT_SECONDS and not logged:
+                job_logger.info(f"YouTube request budget exhausted or cooling down, waiting {int(wait)}s before the next {kind} request...")
+                logged = True
+            sleep = min(wait, MAX_SLEEP_SECONDS)
+            time.sleep(sleep)
+            waited += sleep
+        if waited:
+            get_db().execute("UPDATE governor SET waited_seconds = waited_seconds + ? WHERE id = 1", (waited,))
+        # Every request counts, so the sum over the count is the average wait per request
+        observe_stage("request_wait", waited)
+
+    def report_throttle(self, kind: str, error, requested_at: float):
+        """Start (or extend) the cooldown after a throttled request sent at requested_at"""
+        with transaction() as conn:
+            now = time.time()
+            row, _ = self._load(conn, now)
+            conn.execute(
+                "INSERT INTO governor_counts (kind, throttles) VALUES (?, 1) "
+                "ON CONFLICT(kind) DO UPDATE SET throttles = throttles + 1",
+                (kind,)
+            )
+            if row["last_throttle_at"] and requested_at < row["last_throttle_at"]:
+                # Sent before the current cooldown started: same throttling episode, don't escalate
+                level = None
+            else:
+                level = min(row["backoff_level"] + 1, 16)
+                cooldown = min(settings.THROTTLE_BACKOFF_SECONDS * 2 ** (level - 1), settings.THROTTLE_MAX_BACKOFF_SECONDS)
+                conn.execute(
+                    "UPDATE governor SET tokens = 0, updated_at = ?, cooldown_until = ?, backoff_level = ?, "
+                    "last_throttle_at = ?, last_throttle_error = ? WHERE id = 1",
+                    (now, max(row["cooldown_until"], now + cooldown), level, now, str(error)[:500])
+                )
+        if level is not None:
+            job_logger.warning(f"YouTube throttling detected during {kind} ({str(error)[:200]}). "
+                               f"Pausing all YouTube requests for {int(cooldown)}s (backoff level {level}).")
+
+    def report_success(self):
+        get_db().execute(
+            "UPDATE governor SET backoff_level = backoff_level - 1 WHERE id = 1 AND backoff_level > 0 AND cooldown_until <= ?",
+            (time.time(),)
+        )
+
+    def stats(self) -> dict:
+        now = time.time()
+        with transaction() as conn:
+            row, tokens = self._load(conn, now)
+            counts = conn.execute("SELECT * FROM governor_counts ORDER BY kind").fetchall()
+        return {
+            "requests_per_minute": settings.YOUTUBE_REQUESTS_PER_MINUTE,
+            "burst": settings.YOUTUBE_REQUEST_BURST,
+            "tokens": round(tokens, 2),
+            "cooldown_remaining": max(0, int(row["cooldown_until"] - now)),
+            "backoff_level": row["backoff_level"],
+            "waited_seconds": round(row["waited_seconds"], 1),
+            "last_throttle_at": int(row["last_throttle_at"]) if row["last_throttle_at"] else None,
+            "last_throttle_error": row["last_throttle_error"],
+            "requests": {c["kind"]: c["requests"] for c in counts},
+            "throttles": {c["kind"]: c["throttles"] for c in counts},
+        }
+
+governor = RequestGovernor()
+
+@contextmanager
+def youtube_request(kind: str, max_wait: float | None = None):
+    """Wrap one YouTube operation: wait for the governor first, report throttling afterwards"""
+    governor.acquire(kind, max_wait)
+    requested_at = time.time()
+    try:
+        yield
+    except Exception as e:
+        if is_throttle_error(e):
+            governor.report_throttle(kind, e, requested_at)
+        raise
+    governor.report_success()
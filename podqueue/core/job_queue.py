@@ -0,0 +1,366 @@
+import json
+import time
+import asyncio
+import logging
+from podqueue.config import settings
+from podqueue.core.db import get_db, transaction
+from podqueue.core.events import emit_event
+from podqueue.core.job_runner import run_job_safely, sync_pipeline, rss_pipeline, update_ytdlp
+from podqueue.core.metrics import inc, metrics, observe
+from podqueue.core.worker import cancel_job_workers, clear_job_cancellation, current_job_id
+
+logger = logging.getLogger("podqueue")
+job_logger = logging.getLogger("podqueue_job")
+
+PRIORITY_MANUAL = 10
+PRIORITY_SCHEDULED = 0
+
+JOB_NAMES = {
+    "sync": "Sync",
+    "rss": "RSS Generation",
+    "update": "Update yt-dlp",
+}
+
+# Finished jobs kept for the API; older ones are pruned
+HISTORY_SIZE = 100
+
+def _row_to_job(row) -> dict:
+    job = dict(row)
+    job["channel_ids"] = json.loads(job["channel_ids"]) if job["channel_ids"] is not None else None
+    job["force"] = bool(job["force"])
+    job["metrics"] = json.loads(job["metrics"]) if job.get("metrics") else None
+    job["name"] = job_name(job)
+    return job
+
+def job_name(job: dict) -> str:
+    name = JOB_NAMES[job["kind"]]
+    if job["channel_ids"]:
+        name += f" [{', '.join(job['channel_ids'])}]"
+    if job["source"] == "scheduled":
+        name += " (Scheduled)"
+    return name
+
+def _scope(job: dict) -> set | None:
+    """Channels a job touches; None means every channel (the yt-dlp update counts as that too)"""
+    if job["kind"] == "update" or job["channel_ids"] is None:
+        return None
+    return set(job["channel_ids"])
+
+def _scopes_overlap(a: set | None, b: set | None) -> bool:
+    return a is None or b is None or bool(a & b)
+
+def _covers(job: dict, kind: str, channel_ids: list | None, force: bool) -> bool:
+    """Whether running `job` does everything the requested job would"""
+    if job["kind"] != kind or (force and not job["force"]):
+        return False
+    if job["channel_ids"] is None:
+        return True
+    return channel_ids is not None and set(channel_ids) <= set(job["channel_ids"])
+
+class JobQueue:
+    """Persistent, coalescing queue of sync, RSS and yt-dlp update jobs.
+
+    Jobs live in the jobs table, so queued work survives a restart, and start by
+    priority (manual above scheduled), then age. Up to JOB_CONCURRENCY jobs run at once
+    as long as their channel scopes are disjoint. A request that a queued job
+    already covers (same kind, same or wider channel scope, force if requested) is
+    folded into it, per-channel requests of the same kind are merged into one job when
+    they share a channel or a source, and a new "all channels" job absorbs the queued
+    per-channel ones it covers.
+    """
+
+    def __init__(self):
+        self._wake = None
+        self._task = None
+        self._waiters = {}
+        self._cancelling = set()
+        self._running = {}
+
+    def start(self):
+        self._wake = asyncio.Event()
+        self._recover()
+        self._publish()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _recover(self):
+        """Requeue jobs interrupted by a shutdown or crash so their work is not lost"""
+        with transaction() as conn:
+            # The yt-dlp update ends by restarting the process, so its interruption is its success
+            conn.execute(
+                "UPDATE jobs SET status = 'done', exit_code = 0, finished_at = ? WHERE status = 'running' AND kind = 'update'",
+                (int(time.time()),)
+            )
+            requeued = conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'").rowcount
+        if requeued:
+            logger.info(f"Requeued {requeued} job(s) interrupted by the last shutdown.")
+
+    def list_jobs(self, include_history: bool = False) -> list:
+        """Running and queued jobs in execution order, optionally followed by finished ones"""
+        rows = get_db().execute(
+            "SELECT * FROM jobs WHERE status IN ('running', 'queued') "
+            "ORDER BY status = 'queued', priority DESC, id"
+        ).fetchall()
+        jobs = [_row_to_job(row) for row in rows]
+        if include_history:
+            rows = get_db().execute(
+                "SELECT * FROM jobs WHERE status NOT IN ('running', 'queued') ORDER BY id DESC LIMIT ?",
+                (HISTORY_SIZE,)
+            ).fetchall()
+            jobs.extend(_row_to_job(row) for row in rows)
+        return jobs
+
+    def job_history(self, limit: int = HISTORY_SIZE, kind: str | None = None) -> list:
+        """Finished jobs, newest first, with the stage timings recorded while they ran"""
+        if kind:
+            rows = get_db().execute(
+                "SELECT * FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND kind = ? ORDER BY id DESC LIMIT ?",
+                (kind, limit)
+            ).fetchall()
+        else:
+            rows = get_db().execute(
+                "SELECT * FROM jobs WHERE status IN ('done', 'failed', 'cancelled') ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def get_job(self, job_id: int) -> dict | None:
+        row = get_db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def _publish(self):
+        emit_event("queue", jobs=self.list_jobs())
+
+    def enqueue(self, kind: str, source: str = "manual", channel_ids: list | None = None, force: bool = False) -> dict:
+        """Queue a job, or fold it into a queued job that covers it; returns the job that will run"""
+        if kind not in JOB_NAMES:
+            raise ValueError(f"Unknown job kind: {kind}")
+        priority = PRIORITY_MANUAL if source == "manual" else PRIORITY_SCHEDULED
+        channel_ids = sorted(set(channel_ids)) if channel_ids is not None else None
+        now = int(time.time())
+        with transaction() as conn:
+            queued = [_row_to_job(row) for row in conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND kind = ? ORDER BY id", (kind,)
+            ).fetchall()]
+            target = next((job for job in queued if _covers(job, kind, channel_ids, force)), None)
+            if target is None and channel_ids is not None:
+                # Merge only where it costs the request nothing: a job that shares a channel would
+                # block it anyway, and same-source batches (e.g. scheduled dispatches) run alike.
+                # A manual sync of unrelated channels must not wait behind a scheduled batch.
+                target = next((
+                    job for job in queued
+                    if job["channel_ids"] is not None and job["force"] == force
+                    and (job["source"] == source or set(job["channel_ids"]) & set(channel_ids))
+                ), None)
+                if target is not None:
+                    target["channel_ids"] = sorted(set(target["channel_ids"]) | set(channel_ids))
+            if target is not None:
+                conn.execute(
+                    "UPDATE jobs SET channel_ids = ?, priority = MAX(priority, ?), "
+                    "source = CASE WHEN ? = 'manual' THEN 'manual' ELSE source END WHERE id = ?",
+                    (json.dumps(target["channel_ids"]) if target["channel_ids"] is not None else None,
+                     priority, source, target["id"])
+                )
+                job_id = target["id"]
+                merged = []
+            else:
+                new_job = {"kind": kind, "channel_ids": channel_ids, "force": force}
+                absorbed = [job for job in queued if _covers(new_job, job["kind"], job["channel_ids"], job["force"])]
+                # An absorbed manual request keeps its place in line
+                priority = max([priority] + [job["priority"] for job in absorbed])
+                job_id = conn.execute(
+                    "INSERT INTO jobs (kind, channel_ids, force, priority, source, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, json.dumps(channel_ids) if channel_ids is not None else None, int(force), priority, source, now)
+                ).lastrowid
+                merged = [job["id"] for job in absorbed]
+                for merged_id in merged:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'merged', merged_into = ?, finished_at = ? WHERE id = ?",
+                        (job_id, now, merged_id)
+                    )
+        for merged_id in merged:
+            self._waiters.setdefault(job_id, []).extend(self._waiters.pop(merged_id, []))
+        job = self.get_job(job_id)
+        if target is not None:
+            request_name = job_name({"kind": kind, "channel_ids": channel_ids, "source": source})
+            logger.info(f"Job request '{request_name}' folded into queued job #{job_id}.")
+        self._publish()
+        if self._wake:
+            self._wake.set()
+        return job
+
+    async def wait(self, job_id: int) -> str:
+        """Wait until a job (or the job it was merged into) finished; returns its final status"""
+        job = self.get_job(job_id)
+        while job and job["status"] == "merged":
+            job = self.get_job(job["merged_into"])
+        if job is None:
+            return "unknown"
+        if job["status"] not in ("queued", "running"):
+            return job["status"]
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(job["id"], []).append(future)
+        return await future
+
+    def cancel(self, job_id: int) -> dict | None:
+        """Drop a queued job, or stop a running one by terminating its worker processes.
+
+        Returns the job, or None if it does not exist. Raises ValueError when a running job
+        cannot be interrupted (it runs in-process because WORKER_ISOLATION is off, or it is
+        the yt-dlp update).
+        """
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        if job["status"] == "queued":
+            get_db().execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (int(time.time()), job_id)
+            )
+            self._resolve(job_id, "cancelled")
+            job_logger.info(f"Cancelled queued job #{job_id} '{job['name']}'.")
+            self._publish()
+        elif job["status"] == "running":
+            if job["kind"] == "update" or not settings.WORKER_ISOLATION:
+                raise ValueError("This job runs inside the server process and cannot be interrupted.")
+            self._cancelling.add(job_id)
+            terminated = cancel_job_workers(job_id)
+            job_logger.warning(f"Cancelling running job #{job_id} '{job['name']}' ({terminated} worker process(es) terminated).")
+        return self.get_job(job_id)
+
+    async def cancel_channel_jobs(self, channel_id: str):
+        """Stop all work on a channel that is being deleted.
+
+        Queued jobs drop the channel (one left without channels is cancelled). Running jobs
+        that cover it are cancelled and queued again without it; one that cannot be
+        interrupted is waited for. Returns once none of them runs any more.
+        """
+        cancelled = []
+        with transaction() as conn:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = 'queued' AND kind != 'update'").fetchall()
+            for job in (_row_to_job(row) for row in rows):
+                if job["channel_ids"] is None or channel_id not in job["channel_ids"]:
+                    continue
+                remaining = [c for c in job["channel_ids"] if c != channel_id]
+                if remaining:
+                    conn.execute("UPDATE jobs SET channel_ids = ? WHERE id = ?", (json.dumps(remaining), job["id"]))
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?",
+                        (int(time.time()), job["id"])
+                    )
+                    cancelled.append(job["id"])
+        for job_id in cancelled:
+            self._resolve(job_id, "cancelled")
+
+        interrupted = []
+        waiting = []
+        for job in list(self._running.values()):
+            scope = _scope(job)
+            if job["kind"] == "update" or (scope is not None and channel_id not in scope):
+                continue
+            try:
+                self.cancel(job["id"])
+                interrupted.append(job)
+            except ValueError:
+                pass
+            waiting.append(job["id"])
+        self._publish()
+        for job_id in waiting:
+            await self.wait(job_id)
+
+        for job in interrupted:
+            # An "all channels" job reloads the channel list when it starts again
+            remaining = None if job["channel_ids"] is None else [c for c in job["channel_ids"] if c != channel_id]
+            if remaining != []:
+                self.enqueue(job["kind"], source=job["source"], channel_ids=remaining, force=job["force"])
+
+    def _resolve(self, job_id: int, status: str):
+        for future in self._waiters.pop(job_id, []):
+            if not future.done():
+                future.set_result(status)
+
+    def _start_ready_jobs(self):
+        """Start queued jobs in order while slots are free and their scope is not in use.
+
+        A job that cannot start yet reserves its scope, so later jobs never overtake a
+        conflicting earlier one (a queued "all channels" sync is not starved).
+        """
+        rows = get_db().execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id"
+        ).fetchall()
+        reserved = [_scope(job) for job in self._running.values()]
+        for job in (_row_to_job(row) for row in rows):
+            if len(self._running) >= settings.JOB_CONCURRENCY:
+                return
+            scope = _scope(job)
+            if any(_scopes_overlap(scope, other) for other in reserved):
+                reserved.append(scope)
+                continue
+            reserved.append(scope)
+            get_db().execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (int(time.time()), job["id"])
+            )
+            self._running[job["id"]] = job
+            asyncio.create_task(self._run_job(job))
+            self._publish()
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            self._start_ready_jobs()
+            await self._wake.wait()
+
+    async def _run_job(self, job: dict):
+        started = time.monotonic()
+        success = await self._execute(job)
+        duration = time.monotonic() - started
+        clear_job_cancellation(job["id"])
+        if job["id"] in self._cancelling:
+            self._cancelling.discard(job["id"])
+            status = "cancelled"
+        else:
+            status = "done" if success else "failed"
+        summary = metrics.take_job(job["id"]) or {}
+        summary["duration_seconds"] = round(duration, 3)
+        observe("job_duration_seconds", duration, kind=job["kind"])
+        inc("jobs_total", kind=job["kind"], status=status)
+        with transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, exit_code = ?, metrics = ? WHERE id = ?",
+                (status, int(time.time()), 0 if success else 1, json.dumps(summary), job["id"])
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN ('running', 'queued') AND id NOT IN "
+                "(SELECT id FROM jobs WHERE status NOT IN ('running', 'queued') ORDER BY id DESC LIMIT ?)",
+                (HISTORY_SIZE,)
+            )
+        del self._running[job["id"]]
+        self._resolve(job["id"], status)
+        self._publish()
+        self._wake.set()
+
+    async def _execute(self, job: dict) -> bool:
+        if job["kind"] == "sync":
+            func, kwargs = sync_pipeline, {"force": job["force"], "channel_ids": job["channel_ids"]}
+        elif job["kind"] == "rss":
+            func, kwargs = rss_pipeline, {"channel_ids": job["channel_ids"]}
+        else:
+            func, kwargs = update_ytdlp, {}
+        token = current_job_id.set(job["id"])
+        try:
+            return await run_job_safely(job["name"], func, scope=job["channel_ids"], **kwargs)
+        except Exception as e:
+            logger.error(f"Job #{job['id']} crashed: {e}")
+            return False
+        finally:
+            current_job_id.reset(token)
+
+job_queue = JobQueue()
@@ -5,11 +5,16 @@ import subprocess
 import logging
 import datetime
 import asyncio
+import contextvars
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from filelock import FileLock, Timeout
 from podqueue.config import settings
+from podqueue.core.channels import load_channels
+from podqueue.core.events import emit_event
 from podqueue.core.downloader import run_download_job
 from podqueue.core.rss import run_rss_job
+from podqueue.core.worker import JobCancelled, check_cancelled, run_download_job_isolated, run_rss_job_isolated
 
 logger = logging.getLogger("podqueue")
 job_logger = logging.getLogger("podqueue_job")
@@ -20,17 +25,49 @@ class JobState:
         self.current_job = None
         self.last_run = None
         self.last_exit_code = 0
+        # Names of the jobs running right now (disjoint channel jobs may overlap)
+        self.running_jobs = []
 
 state = JobState()
 state_lock = asyncio.Lock()
 
+# Job threads; kept apart from the loop's default executor, which serves yt-dlp calls of the API
+_job_executor = None
+
 def get_file_lock():
     return FileLock(settings.LOCK_FILE, timeout=1)
 
-def sync_pipeline(force: bool = False):
-    """Sequence download job followed by RSS generation"""
-    run_download_job(force=force)
-    run_rss_job()
+def get_channel_lock(channel_id: str):
+    return FileLock(settings.LOCKS_DIR / f"{channel_id}.lock", timeout=1)
+
+def get_job_locks(channel_ids: list | None, all_channel_ids: list) -> list:
+    """File locks a job must hold, in acquisition order.
+
+    A channel-scoped job locks only its own channels, so unrelated channels stay free.
+    A job over every channel (or the yt-dlp update) takes the global lock plus every
+    channel lock. Locks are always taken in sorted order so two jobs cannot deadlock.
+    """
+    if channel_ids is not None:
+        return [get_channel_lock(c) for c in sorted(set(channel_ids))]
+    return [get_file_lock()] + [get_channel_lock(c) for c in sorted(set(all_channel_ids))]
+
+def sync_pipeline(force: bool = False, channel_ids: list | None = None):
+    """Sequence download job followed by RSS generation of the feeds that changed"""
+    if settings.WORKER_ISOLATION:
+        run_download_job_isolated(force=force, channel_ids=channel_ids)
+        # A cancel that landed after the last sync worker exited must not let RSS run
+        check_cancelled()
+        run_rss_job_isolated(dirty_only=True, channel_ids=channel_ids)
+    else:
+        run_download_job(force=force, channel_ids=channel_ids)
+        run_rss_job(dirty_only=True, channel_ids=channel_ids)
+
+def rss_pipeline(channel_ids: list | None = None):
+    """Regenerate RSS feeds (all, or those in channel_ids), in a worker process when isolation is enabled"""
+    if settings.WORKER_ISOLATION:
+        run_rss_job_isolated(channel_ids=channel_ids)
+    else:
+        run_rss_job(channel_ids=channel_ids)
 
 def update_ytdlp():
     """Runs pip update on yt-dlp and yt-dlp-ejs, and exits process to let systemd restart it"""
@@ -48,47 +85,71 @@ def update_ytdlp():
     time.sleep(1)
     os._exit(0)
 
-async def run_job_safely(job_name: str, sync_func, *args, **kwargs) -> bool:
-    """Run a job in a thread pool with file-based locking to prevent concurrent execution"""
+async def run_job_safely(job_name: str, sync_func, *args, scope: list | None = None, **kwargs) -> bool:
+    """Run a job in a job thread, holding the file locks of its channel scope.
+
+    scope lists the channels the job touches (None means all of them). Jobs are started
+    by the job queue (podqueue.core.job_queue), which only overlaps jobs with disjoint
+    scopes; the file locks additionally keep out other processes (e.g. a second server
+    instance or a manual rebuild).
+    """
+    global _job_executor
+    all_channel_ids = [c.id for c in await load_channels()] if scope is None else []
+    locks = get_job_locks(scope, all_channel_ids)
+
     async with state_lock:
-        if state.running:
-            job_logger.warning(f"Job '{state.current_job}' is already running. Cannot start '{job_name}'.")
-            return False
-        state.running = True
-        state.current_job = job_name
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(max_workers=settings.JOB_CONCURRENCY, thread_name_prefix="podqueue-job")
+        state.running_jobs.append(job_name)
+        state.current_job = ", ".join(state.running_jobs)
+        if not state.running:
+            state.running = True
+            emit_event("job", running=True, current_job=state.current_job)
+        else:
+            emit_event("job", current_job=state.current_job)
 
     exit_code = 0
-    lock = get_file_lock()
     
-    # Run the blocking function in asyncio thread pool
+    # Run the blocking function in a job thread
     def _execute():
-        lock_acquired = False
+        nonlocal exit_code
+        acquired = []
         try:
-            lock.acquire()
-            lock_acquired = True
+            for lock in locks:
+                lock.acquire()
+                acquired.append(lock)
             job_logger.info(f"Lock acquired. Running job: {job_name}")
             sync_func(*args, **kwargs)
-        except Timeout:
-            job_logger.error(f"Could not acquire file lock for '{job_name}'. Another process is running.")
-            nonlocal exit_code
+        except Timeout as e:
+            job_logger.error(f"Could not acquire file lock {Path(e.lock_file).name} for '{job_name}'. Another process is running.")
+            exit_code = 1
+        except JobCancelled:
+            job_logger.warning(f"Job '{job_name}' cancelled.")
             exit_code = 1
         except Exception as e:
             job_logger.error(f"Error executing job '{job_name}': {e}", exc_info=True)
             exit_code = 1
         finally:
-            if lock_acquired and lock.is_locked:
+            for lock in reversed(acquired):
                 try:
                     lock.release()
                 except Exception:
                     pass
 
     try:
-        await asyncio.to_thread(_execute)
+        # copy_context: the job ID context variable must follow the job into its thread
+        await asyncio.get_running_loop().run_in_executor(_job_executor, contextvars.copy_context().run, _execute)
     finally:
         async with state_lock:
-            state.running = False
-            state.current_job = None
+            state.running_jobs.remove(job_name)
             state.last_run = datetime.datetime.now(datetime.timezone.utc).isoformat()
             state.last_exit_code = exit_code
+            if state.running_jobs:
+                state.current_job = ", ".join(state.running_jobs)
+                emit_event("job", current_job=state.current_job, last_run=state.last_run, last_exit_code=exit_code)
+            else:
+                state.running = False
+                state.current_job = None
+                emit_event("job", running=False, current_job=None, last_run=state.last_run, last_exit_code=exit_code)
 
     return exit_code == 0
@@ -0,0 +1,154 @@
+import time
+import threading
+from contextlib import contextmanager
+from podqueue.core.events import add_event_listener, emit_event
+from podqueue.core.worker import current_job_id
+
+# name -> (Prometheus type, help text); exported with the podqueue_ prefix
+METRICS = {
+    "stage_duration_seconds": ("histogram", "Duration of sync stages (resolve, feed_check, scan, extract, download, postprocess_wait, postprocess, cleanup, rss, request_wait) per channel"),
+    "job_duration_seconds": ("histogram", "Wall time of finished jobs"),
+    "jobs_total": ("counter", "Finished jobs by kind and final status"),
+    "downloaded_bytes_total": ("counter", "Bytes downloaded from YouTube per channel"),
+    "errors_total": ("counter", "Sync errors by stage and error class"),
+    "feed_requests_total": ("counter", "Podcast feed requests served, by feed and HTTP status"),
+    "episode_requests_total": ("counter", "Episode audio requests served, by channel and HTTP status"),
+    "worker_resident_memory_bytes": ("gauge", "Resident memory of the sync worker process after its last video"),
+}
+
+# Upper bounds of the duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.05, 0.25, 1, 5, 15, 60, 300, 900, 3600)
+
+def observe(name: str, value: float, **labels):
+    """Record a duration sample; works in worker processes too (sent to the parent as an event)"""
+    emit_event("metric", type="histogram", name=name, value=value, labels=labels)
+
+def inc(name: str, value: float = 1, **labels):
+    emit_event("metric", type="counter", name=name, value=value, labels=labels)
+
+def set_gauge(name: str, value: float, **labels):
+    emit_event("metric", type="gauge", name=name, value=value, labels=labels)
+
+def observe_stage(stage: str, seconds: float, channel: str | None = None):
+    observe("stage_duration_seconds", seconds, stage=stage, channel=channel or "")
+
+@contextmanager
+def timed_stage(stage: str, channel: str | None = None):
+    """Time a block as one sample of a sync stage (failed attempts count too)"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.monotonic() - started, channel)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = [(k, v) for k, v in labels + extra if v != ""]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _new_job_summary() -> dict:
+    return {"stages": {}, "channels": {}, "downloaded_bytes": 0, "errors": {}, "peak_worker_rss_bytes": None}
+
+class MetricsRegistry:
+    """In-memory metric values of this process, fed by metric events.
+
+    Worker processes forward their events to the parent like progress events, so one
+    registry in the API process sees every sync. Samples emitted while a job runs are
+    also summed per job (stage totals, per-channel stage times, bytes, errors), which
+    the job queue stores with the finished job. Values reset on restart, as Prometheus
+    expects of counters; label sets are bounded by the configured channels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (name, labels) -> [bucket counts..., count, sum] / value
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._jobs = {}
+
+    def _on_event(self, kind: str, data: dict):
+        if kind != "metric":
+            return
+        name = data["name"]
+        value = data["value"]
+        labels = data.get("labels") or {}
+        key = (name, tuple(sorted(labels.items())))
+        job_id = current_job_id.get()
+        with self._lock:
+            if data["type"] == "histogram":
+                samples = self._histograms.get(key)
+                if samples is None:
+                    samples = self._histograms[key] = [0] * (len(DURATION_BUCKETS) + 2)
+                for i, bound in enumerate(DURATION_BUCKETS):
+                    if value <= bound:
+                        samples[i] += 1
+                samples[-2] += 1
+                samples[-1] += value
+            elif data["type"] == "counter":
+                self._counters[key] = self._counters.get(key, 0) + value
+            else:
+                self._gauges[key] = value
+            if job_id is not None:
+                self._add_to_job(self._jobs.setdefault(job_id, _new_job_summary()), name, value, labels)
+
+    @staticmethod
+    def _add_to_job(summary: dict, name: str, value: float, labels: dict):
+        if name == "stage_duration_seconds":
+            stage = summary["stages"].setdefault(labels["stage"], {"count": 0, "seconds": 0.0})
+            stage["count"] += 1
+            stage["seconds"] = round(stage["seconds"] + value, 3)
+            if labels.get("channel"):
+                channel = summary["channels"].setdefault(labels["channel"], {})
+                channel[labels["stage"]] = round(channel.get(labels["stage"], 0.0) + value, 3)
+        elif name == "downloaded_bytes_total":
+            summary["downloaded_bytes"] += value
+        elif name == "errors_total":
+            error = f"{labels.get('stage')}:{labels.get('type')}"
+            summary["errors"][error] = summary["errors"].get(error, 0) + value
+        elif name == "worker_resident_memory_bytes":
+            summary["peak_worker_rss_bytes"] = max(summary["peak_worker_rss_bytes"] or 0, value)
+
+    def take_job(self, job_id: int) -> dict | None:
+        """Remove and return the summary collected while a job ran (None if it recorded nothing)"""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def render(self, extra_gauges: dict | None = None, extra_counters: dict | None = None) -> str:
+        """Prometheus text exposition of every metric, plus gauges and counters computed by the caller"""
+        with self._lock:
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            source = {"histogram": histograms, "counter": counters, "gauge": gauges}[metric_type]
+            series = sorted((labels, value) for (n, labels), value in source.items() if n == name)
+            full_name = f"podqueue_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for labels, value in series:
+                if metric_type != "histogram":
+                    lines.append(f"{full_name}{_format_labels(labels)} {value}")
+                    continue
+                for bound, count in zip(DURATION_BUCKETS, value):
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, (('le', bound),))} {count}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {value[-2]}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {value[-2]}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {round(value[-1], 6)}")
+        extra = [("gauge", name, entry) for name, entry in (extra_gauges or {}).items()]
+        extra += [("counter", name, entry) for name, entry in (extra_counters or {}).items()]
+        for metric_type, name, (help_text, series) in extra:
+            full_name = f"podqueue_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for labels, value in series:
+                lines.append(f"{full_name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+add_event_listener(metrics._on_event)
@@ -0,0 +1,124 @@
+import re
+import time
+import logging
+from podqueue.config import settings
+from podqueue.core.db import get_db, transaction
+from podqueue.core.governor import is_throttle_error
+
+logger = logging.getLogger("podqueue")
+job_logger = logging.getLogger("podqueue_job")
+
+# (error class, permanent, pattern) checked in order against the yt-dlp error text.
+# Permanent errors go straight to the dead-letter list instead of being retried.
+ERROR_CLASSES = (
+    ("members_only", True, re.compile(r"members[- ]only|join this channel|available to this channel's members", re.IGNORECASE)),
+    ("private", True, re.compile(r"private video|video is private", re.IGNORECASE)),
+    ("removed", True, re.compile(r"has been removed|account associated with this video has been terminated|no longer available", re.IGNORECASE)),
+    ("region_locked", True, re.compile(r"not (?:made )?available in your country|blocked it in your country|geo[- ]?restrict", re.IGNORECASE)),
+    ("age_restricted", True, re.compile(r"confirm your age|age[- ]restricted|inappropriate for some users", re.IGNORECASE)),
+    ("copyright", True, re.compile(r"copyright", re.IGNORECASE)),
+    ("network", False, re.compile(r"timed out|connection|temporary failure|incompleteread|HTTP Error 5\d\d|unable to download", re.IGNORECASE)),
+    ("unavailable", False, re.compile(r"video unavailable|not available", re.IGNORECASE)),
+)
+
+def classify_error(error) -> tuple:
+    """Return (error class, permanent) for a download error"""
+    text = str(error)
+    if is_throttle_error(text):
+        return "throttled", False
+    for error_class, permanent, pattern in ERROR_CLASSES:
+        if pattern.search(text):
+            return error_class, permanent
+    return "unknown", False
+
+def _retry_delay(attempts: int) -> int:
+    return min(settings.RETRY_BASE_MINUTES * 60 * 2 ** (attempts - 1), settings.RETRY_MAX_HOURS * 3600)
+
+def record_failure(channel_id: str, video_id: str, video_url: str, error) -> dict:
+    """Record a failed download and schedule its retry (or dead-letter it); returns the retry row"""
+    error_class, permanent = classify_error(error)
+    now = int(time.time())
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT attempts, first_failed_at FROM download_retries WHERE channel_id = ? AND video_id = ?",
+            (channel_id, video_id)
+        ).fetchone()
+        attempts = row["attempts"] if row else 0
+        # Throttling says nothing about the video itself; the governor handles it
+        if error_class != "throttled":
+            attempts += 1
+        dead = permanent or attempts >= settings.RETRY_MAX_ATTEMPTS
+        status = "dead" if dead else "pending"
+        next_retry_at = None if dead else now + _retry_delay(max(attempts, 1))
+        conn.execute(
+            "INSERT OR REPLACE INTO download_retries (channel_id, video_id, video_url, status, attempts, error_class, "
+            "last_error, first_failed_at, last_failed_at, next_retry_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (channel_id, video_id, video_url, status, attempts, error_class, str(error)[:1000],
+             row["first_failed_at"] if row else now, now, next_retry_at)
+        )
+    if dead:
+        reason = "permanent error" if permanent else f"{attempts} failed attempts"
+        job_logger.warning(f"[{channel_id}] Giving up on {video_id} ({error_class}, {reason}); it is listed under failed downloads.")
+    else:
+        job_logger.info(f"[{channel_id}] Will retry {video_id} ({error_class}) in {_retry_delay(max(attempts, 1)) // 60} minute(s).")
+    return get_retry(channel_id, video_id)
+
+def record_success(channel_id: str, video_id: str):
+    get_db().execute("DELETE FROM download_retries WHERE channel_id = ? AND video_id = ?", (channel_id, video_id))
+
+def get_retry(channel_id: str, video_id: str) -> dict | None:
+    row = get_db().execute(
+        "SELECT * FROM download_retries WHERE channel_id = ? AND video_id = ?", (channel_id, video_id)
+    ).fetchone()
+    return dict(row) if row else None
+
+def list_retries(status: str | None = None) -> list:
+    """Pending retries and dead-lettered downloads, newest failure first"""
+    if status:
+        rows = get_db().execute(
+            "SELECT * FROM download_retries WHERE status = ? ORDER BY last_failed_at DESC", (status,)
+        ).fetchall()
+    else:
+        rows = get_db().execute("SELECT * FROM download_retries ORDER BY last_failed_at DESC").fetchall()
+    return [dict(row) for row in rows]
+
+def due_retries(channel_id: str, now: int) -> list:
+    """(video_id, video_url) of the channel's pending retries whose backoff has elapsed"""
+    rows = get_db().execute(
+        "SELECT video_id, video_url FROM download_retries "
+        "WHERE channel_id = ? AND status = 'pending' AND next_retry_at <= ? ORDER BY first_failed_at DESC",
+        (channel_id, now)
+    ).fetchall()
+    return [(row["video_id"], row["video_url"]) for row in rows]
+
+def held_video_ids(channel_id: str, now: int) -> set:
+    """Video IDs a scan must not queue: dead-lettered, or still waiting for their retry time"""
+    rows = get_db().execute(
+        "SELECT video_id FROM download_retries WHERE channel_id = ? AND (status = 'dead' OR next_retry_at > ?)",
+        (channel_id, now)
+    ).fetchall()
+    return {row["video_id"] for row in rows}
+
+def pending_video_ids(channel_id: str) -> set:
+    """Video IDs that will be retried, whose partial downloads are worth keeping"""
+    rows = get_db().execute(
+        "SELECT video_id FROM download_retries WHERE channel_id = ? AND status = 'pending'", (channel_id,)
+    ).fetchall()
+    return {row["video_id"] for row in rows}
+
+def next_retry_time(channel_id: str) -> int | None:
+    row = get_db().execute(
+        "SELECT MIN(next_retry_at) FROM download_retries WHERE channel_id = ? AND status = 'pending'", (channel_id,)
+    ).fetchone()
+    return row[0]
+
+def clear_retries(channel_id: str | None = None, video_id: str | None = None, status: str | None = None) -> int:
+    """Forget retry rows (all, or filtered); cleared videos are picked up again by the next scan"""
+    clauses = []
+    params = []
+    for column, value in (("channel_id", channel_id), ("video_id", video_id), ("status", status)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return get_db().execute(f"DELETE FROM download_retries{where}", params).rowcount
@@ -1,26 +1,29 @@
 import os
 import datetime
-import json
 import requests
-import xml.etree.ElementTree as ET
 import logging
 import gc
 from pathlib import Path
 from podqueue.config import settings
+from podqueue.core.events import emit_event
+from podqueue.core.metrics import inc, timed_stage
+from podqueue.core.episodes import load_episode_index, sorted_episode_files
+from podqueue.core.state import is_rss_dirty, clear_rss_dirty
+from podqueue.utils.feed_writer import FeedWriter, write_compressed_variants
 from podqueue.utils.media import (
     rfc2822_format,
     format_duration,
     parse_upload_date,
     sanitize_title,
-    get_best_thumbnail,
-    get_best_episode_thumbnail,
-    parse_chapters_from_description,
-    get_episode_sort_key
+    parse_chapters_from_description
 )
 
 logger = logging.getLogger("podqueue")
 job_logger = logging.getLogger("podqueue_job")
 
+ITUNES_NS = "http://www.itunes.com/dtds/podcast-1.0.dtd"
+PSC_NS = "http://podlove.org/simple-chapters"
+
 def cache_artwork(channel_id: str, image_url: str) -> str:
     if not image_url:
         job_logger.warning(f"No image URL provided for {channel_id}.")
@@ -51,137 +54,112 @@ def generate_rss(feed_name: str, podcast_dir: Path):
     channel_desc = f"A podcast stream of audio from the Youtube Channel"
     local_image_url = None
     
-    # Look for channel info JSON files
-    all_info_files = list(podcast_dir.glob("*.info.json"))
-    if all_info_files:
-        # Sort files by name length (descending) to get the longest filename first
-        all_info_files.sort(key=lambda x: len(x.name), reverse=True)
-        channel_info_file = all_info_files[0]
-        job_logger.info(f"Found channel info file: {channel_info_file.name}")
+    # Channel and episode metadata come from the compact index written at download time
+    index = load_episode_index(podcast_dir)
+    channel_info = index.get("channel") or {}
+    if channel_info:
+        channel_title = channel_info.get("title") or feed_name
+        channel_desc = f"A podcast stream of audio from the Youtube Channel {channel_title}"
         
-        try:
-            with open(channel_info_file, "r", encoding='utf-8') as f:
-                data = json.load(f)
-                channel_title = data.get("channel", feed_name)
-                channel_desc = f"A podcast stream of audio from the Youtube Channel {channel_title}"
-                
-                image_to_download = get_best_thumbnail(data.get("thumbnails", []))
-                if image_to_download:
-                    local_image_url = cache_artwork(feed_name, image_to_download)
-                else:
-                    job_logger.info(f"No thumbnail found for {feed_name}")
-        except Exception as e:
-            job_logger.error(f"Error reading channel info JSON for {feed_name}: {e}")
+        image_to_download = channel_info.get("image_url")
+        if image_to_download:
+            local_image_url = cache_artwork(feed_name, image_to_download)
+        else:
+            job_logger.info(f"No thumbnail found for {feed_name}")
     else:
-        job_logger.info(f"No channel info file found for {feed_name}")
+        job_logger.info(f"No channel info found for {feed_name}")
         
-    # Create RSS XML
-    ET.register_namespace("itunes", "http://www.itunes.com/dtds/podcast-1.0.dtd")
-    ET.register_namespace("psc", "http://podlove.org/simple-chapters")
+    audio_files = sorted_episode_files(podcast_dir, index)
+    job_logger.info(f"Found {len(audio_files)} audio files")
     
-    rss = ET.Element("rss", version="2.0", attrib={
-        "xmlns:itunes": "http://www.itunes.com/dtds/podcast-1.0.dtd",
-        "xmlns:psc": "http://podlove.org/simple-chapters"
-    })
+    # Stream the document to a temp file that replaces the feed atomically,
+    # so clients polling mid-build never see a truncated feed
+    output_path = settings.FEEDS_DIR / f"{feed_name}.xml"
+    with FeedWriter(output_path) as writer:
+        writer.start("rss", {"xmlns:itunes": ITUNES_NS, "xmlns:psc": PSC_NS, "version": "2.0"})
+        writer.start("channel")
+        writer.element("title", channel_title)
+        writer.element("link", f"{settings.BASE_URL}/feeds/{feed_name}.xml")
+        writer.element("description", channel_desc)
+        writer.element("language", "en-US")
+        writer.element("lastBuildDate", rfc2822_format(datetime.datetime.now(datetime.timezone.utc)))
+        writer.element("itunes:author", channel_title)
+        
+        if local_image_url:
+            writer.element("itunes:image", attrib={"href": local_image_url})
+            
+        for file_path in audio_files:
+            write_item(writer, feed_name, file_path, index["episodes"][file_path.stem])
+            
+        writer.end("channel")
+        writer.end("rss")
+    write_compressed_variants(output_path)
+    job_logger.info(f"Generated RSS feed: {output_path}")
+
+def write_item(writer: FeedWriter, feed_name: str, file_path: Path, episode_info: dict):
+    file_url = f"{settings.BASE_URL}/downloads/{feed_name}/{file_path.name}"
+    stat = file_path.stat()
     
-    channel = ET.SubElement(rss, "channel")
-    ET.SubElement(channel, "title").text = channel_title
-    ET.SubElement(channel, "link").text = f"{settings.BASE_URL}/feeds/{feed_name}.xml"
-    ET.SubElement(channel, "description").text = channel_desc
-    ET.SubElement(channel, "language").text = "en-US"
-    ET.SubElement(channel, "lastBuildDate").text = rfc2822_format(datetime.datetime.now(datetime.timezone.utc))
-    ET.SubElement(channel, "itunes:author").text = channel_title
+    writer.start("item")
+    episode_title = episode_info.get("title") or file_path.stem
+    writer.element("title", sanitize_title(episode_title))
     
-    if local_image_url:
-        ET.SubElement(channel, "itunes:image", href=local_image_url)
-        
-    # Find all audio files
-    audio_files = sorted(
-        [f for f in os.listdir(podcast_dir) if f.endswith('.m4a') and not '.temp.' in f],
-        key=lambda f: get_episode_sort_key(podcast_dir / f),
-        reverse=True
-    )
-    job_logger.info(f"Found {len(audio_files)} audio files")
+    upload_date_str = episode_info.get("upload_date")
+    pub_date = parse_upload_date(upload_date_str) if upload_date_str else None
+    if not pub_date:
+        pub_date = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc)
     
-    for filename in audio_files:
-        file_path = podcast_dir / filename
-        file_url = f"{settings.BASE_URL}/downloads/{feed_name}/{filename}"
-        file_size = os.path.getsize(file_path)
-        
-        video_id = os.path.splitext(filename)[0]
-        info_file_path = podcast_dir / f"{video_id}.info.json"
+    writer.element("pubDate", rfc2822_format(pub_date))
+    writer.element("guid", file_url, attrib={"isPermaLink": "false"})
+    writer.element("enclosure", attrib={"url": file_url, "length": str(stat.st_size), "type": "audio/mp4"})
+    
+    description = episode_info.get("description", "")
+    if description:
+        writer.element("description", description)
         
-        item = ET.SubElement(channel, "item")
+    duration = episode_info.get("duration", 0)
+    if duration:
+        writer.element("itunes:duration", format_duration(duration))
         
-        if info_file_path.exists():
-            try:
-                with open(info_file_path, "r", encoding='utf-8') as f:
-                    episode_info = json.load(f)
-                
-                episode_title = episode_info.get("title", video_id)
-                sanitized = sanitize_title(episode_title)
-                ET.SubElement(item, "title").text = sanitized
-                
-                upload_date_str = episode_info.get("upload_date")
-                pub_date = parse_upload_date(upload_date_str) if upload_date_str else None
-                
-                if not pub_date:
-                    pub_date = datetime.datetime.fromtimestamp(os.path.getmtime(file_path), datetime.timezone.utc)
-                
-                ET.SubElement(item, "pubDate").text = rfc2822_format(pub_date)
-                ET.SubElement(item, "guid", isPermaLink="false").text = file_url
-                ET.SubElement(item, "enclosure", url=file_url, length=str(file_size), type="audio/mp4")
-                
-                description = episode_info.get("description", "")
-                if description:
-                    ET.SubElement(item, "description").text = description
-                    
-                duration = episode_info.get("duration", 0)
-                if duration:
-                    ET.SubElement(item, "itunes:duration").text = format_duration(duration)
-                    
-                thumbnails = episode_info.get("thumbnails", [])
-                if thumbnails:
-                    ep_thumb = get_best_episode_thumbnail(thumbnails)
-                    if ep_thumb:
-                        ET.SubElement(item, "itunes:image", href=ep_thumb)
-                        
-                chapters = parse_chapters_from_description(description)
-                if chapters:
-                    chapters_element = ET.SubElement(item, "psc:chapters", attrib={"version": "1.2"})
-                    for ch in chapters:
-                        ET.SubElement(chapters_element, "psc:chapter", attrib={"start": ch['time'], "title": ch['title']})
-                        
-            except Exception as e:
-                job_logger.error(f"Error reading episode info for {video_id}: {e}")
-                pub_date = datetime.datetime.fromtimestamp(os.path.getmtime(file_path), datetime.timezone.utc)
-                ET.SubElement(item, "pubDate").text = rfc2822_format(pub_date)
-                ET.SubElement(item, "guid", isPermaLink="false").text = file_url
-                ET.SubElement(item, "enclosure", url=file_url, length=str(file_size), type="audio/mp4")
-        else:
-            pub_date = datetime.datetime.fromtimestamp(os.path.getmtime(file_path), datetime.timezone.utc)
-            ET.SubElement(item, "pubDate").text = rfc2822_format(pub_date)
-            ET.SubElement(item, "guid", isPermaLink="false").text = file_url
-            ET.SubElement(item, "enclosure", url=file_url, length=str(file_size), type="audio/mp4")
+    ep_thumb = episode_info.get("thumbnail")
+    if ep_thumb:
+        writer.element("itunes:image", attrib={"href": ep_thumb})
             
-    tree = ET.ElementTree(rss)
-    output_path = settings.FEEDS_DIR / f"{feed_name}.xml"
-    tree.write(output_path, encoding="utf-8", xml_declaration=True)
-    job_logger.info(f"Generated RSS feed: {output_path}")
+    chapters = parse_chapters_from_description(description)
+    if chapters:
+        writer.start("psc:chapters", {"version": "1.2"})
+        for ch in chapters:
+            writer.element("psc:chapter", attrib={"start": ch['time'], "title": ch['title']})
+        writer.end("psc:chapters")
+    writer.end("item")
+
+def run_rss_job(dirty_only: bool = False, channel_ids: list | None = None):
+    """Generate RSS feeds for every channel directory (or only those in channel_ids).
 
-def run_rss_job():
+    With dirty_only, only feeds of channels whose episodes changed since their last
+    generation (or whose feed file is missing) are rebuilt.
+    """
     job_logger.info("Starting RSS feed generation...")
     if not settings.DOWNLOADS_DIR.exists():
         job_logger.info("Downloads directory does not exist. RSS generation complete.")
         return
         
-    for name in os.listdir(settings.DOWNLOADS_DIR):
+    generated = 0
+    emit_event("progress", stage="rss")
+    for name in (channel_ids if channel_ids is not None else os.listdir(settings.DOWNLOADS_DIR)):
         podcast_dir = settings.DOWNLOADS_DIR / name
         if podcast_dir.is_dir():
+            if dirty_only and not is_rss_dirty(name) and (settings.FEEDS_DIR / f"{name}.xml").exists():
+                continue
+            emit_event("progress", channel=name)
             try:
-                generate_rss(name, podcast_dir)
+                with timed_stage("rss", name):
+                    generate_rss(name, podcast_dir)
+                clear_rss_dirty(name)
+                generated += 1
             except Exception as e:
                 job_logger.error(f"Error generating RSS for {name}: {e}")
+                inc("errors_total", stage="rss", type=type(e).__name__)
                 
-    job_logger.info("RSS feed generation complete.")
+    job_logger.info(f"RSS feed generation complete ({generated} feed(s) rebuilt).")
     gc.collect()
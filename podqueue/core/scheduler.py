@@ -1,30 +1,186 @@
+import time
+import heapq
+import random
 import logging
 import asyncio
+import threading
 from apscheduler.schedulers.background import BackgroundScheduler
 from podqueue.config import settings
-from podqueue.core.job_runner import run_job_safely, sync_pipeline, update_ytdlp
+from podqueue.core.adaptive import next_check_time
+from podqueue.core.channels import Channel, load_channels
+from podqueue.core.events import add_event_listener
+from podqueue.core.job_queue import job_queue
+from podqueue.core.retries import next_retry_time
+from podqueue.core.state import load_channel_state
 
 logger = logging.getLogger("podqueue")
 scheduler = BackgroundScheduler()
 _loop = None
 
-def trigger_sync_job():
-    if _loop:
-        logger.info("Triggering scheduled sync job...")
-        asyncio.run_coroutine_threadsafe(
-            run_job_safely("Sync (Scheduled)", sync_pipeline),
-            _loop
-        )
-    else:
-        logger.error("Scheduler triggered sync job but event loop is not set.")
+class DueScheduler:
+    """Dispatches each channel's sync the moment it is due.
+
+    Next-due times live in a min-heap (stale entries are skipped lazily), so the
+    thread sleeps exactly until the earliest one. Adaptive channels take their interval
+    from their upload history (see podqueue.core.adaptive). Each due time gets a random delay of
+    up to SCHEDULE_JITTER_PERCENT of the channel's interval, so channels added or
+    synced together drift apart instead of firing in bursts. Due channels are handed
+    to the job queue, which folds them into any queued sync that already covers them.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+        self._channels = {}
+        # Channels whose due time must be recomputed from their sync state
+        self._dirty = set()
+        self._pending = set()
+        self._in_flight = set()
+        # Channels back from a sync, which must not come due again right away
+        self._synced = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._rebuild_at = 0.0
+
+    def start(self):
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="podqueue-due-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def reschedule(self, channel_id: str, channel: Channel | None = None):
+        """Recompute a channel's next due time, e.g. after it was added, edited or synced"""
+        with self._cond:
+            if channel is not None:
+                self._channels[channel_id] = channel
+            self._dirty.add(channel_id)
+            self._cond.notify()
+
+    def remove(self, channel_id: str):
+        with self._cond:
+            self._channels.pop(channel_id, None)
+            self._due.pop(channel_id, None)
+            self._dirty.discard(channel_id)
+            self._pending.discard(channel_id)
+
+    def next_due(self, channel_id: str) -> int | None:
+        with self._cond:
+            due = self._due.get(channel_id)
+        return int(due) if due is not None else None
+
+    def _on_event(self, kind: str, data: dict):
+        if kind == "channel":
+            self.reschedule(data["channel_id"])
+
+    def _push(self, channel_id: str, due: float):
+        self._due[channel_id] = due
+        heapq.heappush(self._heap, (due, channel_id))
+
+    def _compute_due(self, channel_id: str, now: float) -> float:
+        last_check = load_channel_state(channel_id).get("last_check")
+        start = last_check or int(now)
+        next_check = next_check_time(self._channels[channel_id], start)
+        interval = next_check - start
+        due = next_check if last_check else now
+        if channel_id in self._synced and due <= now:
+            # The sync did not record a check (e.g. the scan failed): retry after a full interval
+            due = now + interval
+        retry_at = next_retry_time(channel_id)
+        if retry_at and retry_at < due:
+            # A failed download's backoff ends first
+            due = max(retry_at, now)
+        return due + random.uniform(0, interval * settings.SCHEDULE_JITTER_PERCENT / 100)
+
+    def _rebuild(self, now: float):
+        """Reload the channel list, picking up changes made outside the API"""
+        channels = asyncio.run_coroutine_threadsafe(load_channels(), _loop).result()
+        channels = {c.id: c for c in channels}
+        with self._cond:
+            for channel_id in list(self._due):
+                if channel_id not in channels:
+                    del self._due[channel_id]
+            self._dirty.update(
+                channel_id for channel_id, channel in channels.items()
+                if channel != self._channels.get(channel_id) or channel_id not in self._due and channel_id not in self._pending
+            )
+            self._channels = channels
+        self._rebuild_at = now + settings.SCHEDULE_INTERVAL_MINUTES * 60
+
+    def _run(self):
+        logger.info("Due-time scheduler started.")
+        while True:
+            now = time.time()
+            if now >= self._rebuild_at:
+                try:
+                    self._rebuild(now)
+                except Exception as e:
+                    logger.error(f"Error loading channels for the scheduler: {e}")
+                    self._rebuild_at = now + 60
+            with self._cond:
+                if self._stopped:
+                    return
+                for channel_id in list(self._dirty):
+                    if channel_id in self._in_flight:
+                        # Rescheduled once its sync returns
+                        continue
+                    self._dirty.discard(channel_id)
+                    if channel_id not in self._channels:
+                        continue
+                    self._pending.discard(channel_id)
+                    try:
+                        self._push(channel_id, self._compute_due(channel_id, now))
+                    except Exception as e:
+                        logger.error(f"Error scheduling {channel_id}: {e}")
+                    self._synced.discard(channel_id)
+                while self._heap and self._heap[0][0] <= now:
+                    due, channel_id = heapq.heappop(self._heap)
+                    if self._due.get(channel_id) == due:
+                        del self._due[channel_id]
+                        self._pending.add(channel_id)
+                if self._pending:
+                    self._dispatch(sorted(self._pending))
+                timeout = self._rebuild_at - now
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] - now)
+                self._cond.wait(max(timeout, 0.05))
+
+    def _dispatch(self, channel_ids: list):
+        self._pending.clear()
+        self._in_flight.update(channel_ids)
+        logger.info(f"Dispatching scheduled sync for {len(channel_ids)} channel(s): {', '.join(channel_ids)}")
+        future = asyncio.run_coroutine_threadsafe(_sync_and_wait(channel_ids), _loop)
+        future.add_done_callback(lambda f: self._dispatch_done(channel_ids))
+
+    def _dispatch_done(self, channel_ids: list):
+        with self._cond:
+            self._in_flight.difference_update(channel_ids)
+            for channel_id in channel_ids:
+                if channel_id in self._channels:
+                    self._synced.add(channel_id)
+                    self._dirty.add(channel_id)
+            self._cond.notify()
+
+async def _sync_and_wait(channel_ids: list) -> str:
+    job = job_queue.enqueue("sync", source="scheduled", channel_ids=channel_ids)
+    return await job_queue.wait(job["id"])
+
+due_scheduler = DueScheduler()
+add_event_listener(due_scheduler._on_event)
+
+async def _enqueue_update():
+    job_queue.enqueue("update", source="scheduled")
 
 def trigger_update_job():
     if _loop:
         logger.info("Triggering scheduled yt-dlp update job...")
-        asyncio.run_coroutine_threadsafe(
-            run_job_safely("Update yt-dlp (Scheduled)", update_ytdlp),
-            _loop
-        )
+        asyncio.run_coroutine_threadsafe(_enqueue_update(), _loop)
     else:
         logger.error("Scheduler triggered update job but event loop is not set.")
 
@@ -32,14 +188,7 @@ def init_scheduler(loop):
     global _loop
     _loop = loop
     
-    interval = settings.SCHEDULE_INTERVAL_MINUTES
-    scheduler.add_job(
-        trigger_sync_job,
-        'interval',
-        minutes=interval,
-        id='sync_job',
-        replace_existing=True
-    )
+    due_scheduler.start()
     
     scheduler.add_job(
         trigger_update_job,
@@ -50,9 +199,10 @@ def init_scheduler(loop):
     )
     
     scheduler.start()
-    logger.info(f"Scheduler started. Hourly sync interval: {interval} minutes.")
+    logger.info(f"Scheduler started. Channels are synced when due (jitter up to {settings.SCHEDULE_JITTER_PERCENT}% of their interval).")
 
 def shutdown_scheduler():
+    due_scheduler.stop()
     if scheduler.running:
         scheduler.shutdown()
         logger.info("Scheduler shut down.")
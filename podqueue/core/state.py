@@ -0,0 +1,74 @@
+import time
+import logging
+from podqueue.core.db import get_db, transaction
+from podqueue.core.events import emit_event
+
+logger = logging.getLogger("podqueue")
+
+# Columns of channel_state that callers may read and update
+STATE_FIELDS = (
+    "last_check", "last_success", "error_count", "last_error", "last_error_at",
+    "feed_etag", "feed_last_modified", "feed_newest_id", "feed_seen_id",
+    "rss_dirty", "feed_title", "feed_image_url",
+)
+
+def load_channel_state(channel_id: str) -> dict:
+    """Load the persisted sync state of a channel (check times, errors, feed validators etc.)"""
+    row = get_db().execute("SELECT * FROM channel_state WHERE channel_id = ?", (channel_id,)).fetchone()
+    if row is None:
+        return {}
+    state = {k: row[k] for k in STATE_FIELDS if row[k] is not None}
+    state["rss_dirty"] = bool(row["rss_dirty"])
+    return state
+
+def update_channel_state(channel_id: str, **fields) -> dict:
+    unknown = set(fields) - set(STATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown channel state field(s): {', '.join(sorted(unknown))}")
+    if fields:
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        assignments = ", ".join(f"{k} = excluded.{k}" for k in fields)
+        get_db().execute(
+            f"INSERT INTO channel_state (channel_id, {columns}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(channel_id) DO UPDATE SET {assignments}",
+            (channel_id, *fields.values())
+        )
+    return load_channel_state(channel_id)
+
+def mark_rss_dirty(channel_id: str):
+    """Flag a channel whose episodes changed so the next RSS run rebuilds its feed"""
+    update_channel_state(channel_id, rss_dirty=True)
+
+def clear_rss_dirty(channel_id: str):
+    update_channel_state(channel_id, rss_dirty=False)
+
+def is_rss_dirty(channel_id: str) -> bool:
+    return bool(load_channel_state(channel_id).get("rss_dirty"))
+
+def record_channel_check(channel_id: str, checked_at: int, clean: bool):
+    """Record a finished check; a clean one (no failures) also resets the error streak"""
+    if clean:
+        update_channel_state(channel_id, last_check=checked_at, last_success=checked_at, error_count=0,
+                             last_error=None, last_error_at=None)
+    else:
+        update_channel_state(channel_id, last_check=checked_at)
+    emit_event("channel", channel_id=channel_id)
+
+def record_channel_error(channel_id: str, message: str):
+    """Remember the latest sync error of a channel for the dashboard"""
+    get_db().execute(
+        "INSERT INTO channel_state (channel_id, last_error, last_error_at, error_count) VALUES (?, ?, ?, 1) "
+        "ON CONFLICT(channel_id) DO UPDATE SET last_error = excluded.last_error, "
+        "last_error_at = excluded.last_error_at, error_count = error_count + 1",
+        (channel_id, message, int(time.time()))
+    )
+    emit_event("channel", channel_id=channel_id)
+
+def delete_channel_state(channel_id: str):
+    """Forget a deleted channel's sync state, episode catalogue, upload history and failed downloads"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM channel_state WHERE channel_id = ?", (channel_id,))
+        conn.execute("DELETE FROM episodes WHERE channel_id = ?", (channel_id,))
+        conn.execute("DELETE FROM download_retries WHERE channel_id = ?", (channel_id,))
+        conn.execute("DELETE FROM upload_history WHERE channel_id = ?", (channel_id,))
@@ -0,0 +1,100 @@
+import os
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from podqueue.config import settings
+from podqueue.core.events import add_event_listener
+from podqueue.core.state import load_channel_state
+
+logger = logging.getLogger("podqueue")
+
+# How long an entry is trusted before its files are stat()ed again; sync events
+# invalidate entries immediately, this only bounds staleness from other writers.
+REVALIDATE_SECONDS = 5.0
+
+def _mtime(path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _scan_episodes(download_dir) -> tuple:
+    count = 0
+    total_bytes = 0
+    try:
+        with os.scandir(download_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".m4a") and ".temp." not in entry.name and entry.is_file():
+                    count += 1
+                    total_bytes += entry.stat().st_size
+    except OSError:
+        pass
+    return count, total_bytes
+
+def _read_feed_title(feed_file) -> str | None:
+    """Title of a feed's channel, reading only as far as the first <title>"""
+    try:
+        for _, element in ET.iterparse(feed_file, events=("end",)):
+            if element.tag == "title":
+                return element.text
+    except (OSError, ET.ParseError) as e:
+        logger.error(f"Error parsing feed {feed_file.name}: {e}")
+    return None
+
+class ChannelStatusCache:
+    """Per-channel dashboard figures kept in memory.
+
+    Episode count/bytes and feed title are recomputed only when the underlying file's
+    mtime changed; last check and last error are a primary-key lookup. Both happen at
+    most every REVALIDATE_SECONDS unless a sync or CRUD event invalidates the channel first.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self, channel_id: str, entry: dict):
+        download_dir = settings.DOWNLOADS_DIR / channel_id
+        dir_mtime = _mtime(download_dir)
+        if dir_mtime != entry.get("_dir_mtime"):
+            entry["_dir_mtime"] = dir_mtime
+            entry["audio_count"], entry["total_bytes"] = _scan_episodes(download_dir)
+
+        feed_file = settings.FEEDS_DIR / f"{channel_id}.xml"
+        feed_mtime = _mtime(feed_file)
+        if feed_mtime != entry.get("_feed_mtime"):
+            entry["_feed_mtime"] = feed_mtime
+            entry["feed_title"] = _read_feed_title(feed_file) if feed_mtime is not None else None
+
+        state = load_channel_state(channel_id)
+        entry["last_check"] = state.get("last_check")
+        entry["last_error"] = state.get("last_error")
+        entry["last_error_at"] = state.get("last_error_at")
+
+        entry["_checked_at"] = time.monotonic()
+
+    def get(self, channel_id: str) -> dict:
+        """Status of one channel (public fields only)"""
+        with self._lock:
+            entry = self._entries.setdefault(channel_id, {})
+            if time.monotonic() - entry.get("_checked_at", float("-inf")) >= REVALIDATE_SECONDS:
+                self._refresh(channel_id, entry)
+            return {k: v for k, v in entry.items() if not k.startswith("_")}
+
+    def invalidate(self, channel_id: str):
+        with self._lock:
+            entry = self._entries.get(channel_id)
+            if entry is not None:
+                entry["_checked_at"] = float("-inf")
+
+    def remove(self, channel_id: str):
+        with self._lock:
+            self._entries.pop(channel_id, None)
+
+    def _on_event(self, kind: str, data: dict):
+        if kind == "channel":
+            self.invalidate(data["channel_id"])
+
+channel_status = ChannelStatusCache()
+add_event_listener(channel_status._on_event)
@@ -0,0 +1,175 @@
+import logging
+import threading
+import importlib
+import traceback
+import contextvars
+import multiprocessing
+import queue as queue_module
+from logging.handlers import QueueHandler
+from podqueue.config import settings
+from podqueue.core.events import emit_event, set_event_sink
+
+logger = logging.getLogger("podqueue")
+job_logger = logging.getLogger("podqueue_job")
+
+# Spawned (not forked) children start from a clean interpreter, so the API process's
+# threads, sockets and event loop are never copied into the worker.
+_mp_context = multiprocessing.get_context("spawn")
+
+# Set by the job queue around each job; context variables follow asyncio.to_thread into
+# the job thread, so the worker processes a job starts can be found again to cancel it.
+current_job_id = contextvars.ContextVar("current_job_id", default=None)
+_job_processes = {}
+_cancelled_jobs = set()
+_job_processes_lock = threading.Lock()
+
+class JobCancelled(Exception):
+    """Raised in a job thread whose job was cancelled, instead of starting more work"""
+
+def cancel_job_workers(job_id: int) -> int:
+    """Mark a job cancelled and terminate its running worker processes; returns how many.
+
+    The mark stops the job from starting further workers (the next recycled sync worker
+    or the RSS step), so a cancel between two workers takes effect as well.
+    """
+    with _job_processes_lock:
+        _cancelled_jobs.add(job_id)
+        processes = list(_job_processes.get(job_id, ()))
+    for process in processes:
+        process.terminate()
+    return len(processes)
+
+def clear_job_cancellation(job_id: int):
+    with _job_processes_lock:
+        _cancelled_jobs.discard(job_id)
+
+def check_cancelled():
+    """Raise JobCancelled if the current job was cancelled"""
+    job_id = current_job_id.get()
+    if job_id is not None and job_id in _cancelled_jobs:
+        raise JobCancelled(f"Job #{job_id} was cancelled")
+
+def _route_logging_to(message_queue):
+    """Send every log record of the child process back to the parent through the queue"""
+    handler = QueueHandler(message_queue)
+    for name in (None, "podqueue_job"):
+        target = logging.getLogger(name)
+        for h in target.handlers:
+            h.close()
+        target.handlers = [handler]
+
+def _child_main(message_queue, target: str, kwargs: dict):
+    _route_logging_to(message_queue)
+    # Progress events are republished by the parent to the status stream
+    set_event_sink(lambda kind, data: message_queue.put(("event", (kind, data))))
+    try:
+        module_name, func_name = target.split(":")
+        func = getattr(importlib.import_module(module_name), func_name)
+        message_queue.put(("result", func(**kwargs)))
+    except BaseException:
+        message_queue.put(("error", traceback.format_exc()))
+    finally:
+        message_queue.put(("done", None))
+
+def _handle_log_record(record: logging.LogRecord):
+    logging.getLogger(record.name).handle(record)
+
+def _collect_worker(process, message_queue):
+    """Replay the child's log records and events until it is done; returns its result"""
+    result = None
+    error = None
+    while True:
+        try:
+            message = message_queue.get(timeout=0.5)
+        except queue_module.Empty:
+            if not process.is_alive():
+                break
+            continue
+        if isinstance(message, logging.LogRecord):
+            _handle_log_record(message)
+            continue
+        kind, payload = message
+        if kind == "event":
+            emit_event(payload[0], **payload[1])
+        elif kind == "result":
+            result = payload
+        elif kind == "error":
+            error = payload
+        elif kind == "done":
+            break
+
+    process.join(timeout=30)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    message_queue.close()
+
+    if error:
+        raise RuntimeError(f"Worker process failed:\n{error}")
+    if process.exitcode not in (0, None):
+        raise RuntimeError(f"Worker process exited with code {process.exitcode}")
+    return result
+
+def run_in_worker(target: str, **kwargs):
+    """Run `module:function` in a fresh child process and return its result.
+
+    Blocks the calling (job) thread while log records and progress events from the child
+    are replayed into the parent's loggers and status publisher, so last_job.log and the
+    live streams behave as before.
+    """
+    job_id = current_job_id.get()
+    message_queue = _mp_context.Queue()
+    process = _mp_context.Process(
+        target=_child_main,
+        args=(message_queue, target, kwargs),
+        name="podqueue-worker",
+        daemon=True
+    )
+    # Checked and registered under the lock, so a concurrent cancel either prevents the
+    # start or sees the process and terminates it
+    with _job_processes_lock:
+        if job_id is not None and job_id in _cancelled_jobs:
+            message_queue.close()
+            raise JobCancelled(f"Job #{job_id} was cancelled")
+        process.start()
+        _job_processes.setdefault(job_id, set()).add(process)
+    logger.info(f"Started worker process {process.pid} for {target}")
+    try:
+        return _collect_worker(process, message_queue)
+    except RuntimeError:
+        # A terminated worker is the cancellation, not a failure of the job
+        check_cancelled()
+        raise
+    finally:
+        with _job_processes_lock:
+            _job_processes[job_id].discard(process)
+            if not _job_processes[job_id]:
+                del _job_processes[job_id]
+
+def run_download_job_isolated(force: bool = False, channel_ids: list | None = None):
+    """Run the download job in worker processes recycled after WORKER_MAX_VIDEOS videos
+    or once their RSS crosses WORKER_MAX_RSS_MB, until every due channel is processed."""
+    attempted = []
+    resume_videos = {}
+    while True:
+        result = run_in_worker(
+            "podqueue.core.downloader:run_download_job",
+            force=force,
+            channel_ids=channel_ids,
+            skip_video_ids=attempted,
+            max_videos=settings.WORKER_MAX_VIDEOS,
+            max_rss_mb=settings.WORKER_MAX_RSS_MB,
+            resume_videos=resume_videos
+        ) or {}
+        remaining = result.get("remaining") or []
+        if not remaining:
+            return
+        attempted.extend(result.get("attempted") or [])
+        # Leftover channels were not finalized, so they are still due in the next worker;
+        # their unattempted videos are handed over rather than found again by a rescan
+        channel_ids = remaining
+        resume_videos = result.get("pending") or {}
+        job_logger.info(f"Recycling worker process, {len(remaining)} channel(s) left...")
+
+def run_rss_job_isolated(dirty_only: bool = False, channel_ids: list | None = None):
+    run_in_worker("podqueue.core.rss:run_rss_job", dirty_only=dirty_only, channel_ids=channel_ids)
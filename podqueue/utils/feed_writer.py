@@ -0,0 +1,117 @@
+import os
+import gzip
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional, feeds are still served gzip-compressed without it
+    brotli = None
+
+# Suffixes of the pre-compressed variants written next to a feed, by Content-Encoding
+COMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+def _escape_text(text: str) -> str:
+    # Same rules as ElementTree's serializer, so the output stays byte-identical
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+def _escape_attrib(value: str) -> str:
+    value = _escape_text(value)
+    if "\"" in value:
+        value = value.replace("\"", "&quot;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\t" in value:
+        value = value.replace("\t", "&#09;")
+    return value
+
+def _format_attrib(attrib: dict) -> str:
+    return "".join(f" {key}=\"{_escape_attrib(value)}\"" for key, value in attrib.items())
+
+class FeedWriter:
+    """Incremental XML writer that streams elements to a temp file and renames it into place.
+
+    Produces the same bytes as ElementTree.write(encoding="utf-8", xml_declaration=True)
+    for the element shapes the feeds use, without holding the document in memory. Readers
+    of the target path only ever see the previous or the complete new file.
+    """
+
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self._file = None
+        self._open_tags = []
+
+    def __enter__(self):
+        # Same open mode as ElementTree.write, including newline translation
+        self._file = open(self.tmp_path, "w", encoding="utf-8", errors="xmlcharrefreplace")
+        self._file.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is not None or self._open_tags:
+            self.tmp_path.unlink(missing_ok=True)
+            if exc_type is None:
+                raise ValueError(f"Unclosed elements in feed: {self._open_tags}")
+            return False
+        os.replace(self.tmp_path, self.output_path)
+        return False
+
+    def start(self, tag: str, attrib: dict | None = None):
+        self._file.write(f"<{tag}{_format_attrib(attrib or {})}>")
+        self._open_tags.append(tag)
+
+    def end(self, tag: str):
+        expected = self._open_tags.pop()
+        if expected != tag:
+            raise ValueError(f"Closing <{tag}> while <{expected}> is open")
+        self._file.write(f"</{tag}>")
+
+    def element(self, tag: str, text: str | None = None, attrib: dict | None = None):
+        """Write a complete leaf element; empty text renders as <tag />, like ElementTree"""
+        attrs = _format_attrib(attrib or {})
+        if text:
+            self._file.write(f"<{tag}{attrs}>{_escape_text(text)}</{tag}>")
+        else:
+            self._file.write(f"<{tag}{attrs} />")
+
+def _replace_atomically(path: Path, data: bytes):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_compressed_variants(path: Path) -> list:
+    """Write gzip (and brotli, if installed) copies of a finished file for static serving.
+
+    Compressing once per generation means serving never compresses on the request path.
+    Returns the variant paths that were written.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    written = []
+    gz_path = path.with_name(path.name + COMPRESSED_SUFFIXES["gzip"])
+    # mtime=0 keeps the bytes (and so the ETag) stable for identical feeds
+    _replace_atomically(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(gz_path)
+    br_path = path.with_name(path.name + COMPRESSED_SUFFIXES["br"])
+    if brotli is not None:
+        _replace_atomically(br_path, brotli.compress(data, quality=11))
+        written.append(br_path)
+    else:
+        # A leftover from an install that had brotli would otherwise be served stale
+        br_path.unlink(missing_ok=True)
+    return written
+
+def remove_compressed_variants(path: Path):
+    path = Path(path)
+    for suffix in COMPRESSED_SUFFIXES.values():
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
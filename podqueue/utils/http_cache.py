@@ -0,0 +1,110 @@
+import os
+import hashlib
+import threading
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from podqueue.utils.feed_writer import COMPRESSED_SUFFIXES
+
+# path -> (mtime_ns, size, etag); hashing only happens when a file actually changes
+_etag_cache = {}
+_etag_cache_lock = threading.Lock()
+
+def _content_etag(path: Path, stat_result: os.stat_result) -> str:
+    key = str(path)
+    with _etag_cache_lock:
+        cached = _etag_cache.get(key)
+    if cached and cached[0] == stat_result.st_mtime_ns and cached[1] == stat_result.st_size:
+        return cached[2]
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()}"'
+    with _etag_cache_lock:
+        _etag_cache[key] = (stat_result.st_mtime_ns, stat_result.st_size, etag)
+    return etag
+
+def _accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+def _select_variant(request: Request, path: Path, stat_result: os.stat_result):
+    """Pick the best fresh pre-compressed variant the client accepts, if any"""
+    accepted = _accepted_encodings(request)
+    for encoding, suffix in COMPRESSED_SUFFIXES.items():
+        if encoding not in accepted:
+            continue
+        variant = path.with_name(path.name + suffix)
+        try:
+            variant_stat = variant.stat()
+        except OSError:
+            continue
+        # Variants are written right after the file; an older one belongs to a previous build
+        if variant_stat.st_mtime_ns >= stat_result.st_mtime_ns:
+            return encoding, variant, variant_stat
+    return None, path, stat_result
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def cached_file_response(request: Request, directory: Path, filename: str, cache_control: str, compressed: bool = False) -> Response:
+    """Serve a file from `directory` with a content-hash ETag and conditional 304s.
+
+    With `compressed`, a pre-built .br/.gz variant is served when the client accepts it.
+    Returns 404 for anything that is not a regular file directly inside `directory`.
+    """
+    path = directory / filename
+    if filename.startswith(".") or path.parent != directory:
+        return Response(status_code=404)
+    try:
+        stat_result = path.stat()
+    except OSError:
+        return Response(status_code=404)
+    if not path.is_file():
+        return Response(status_code=404)
+
+    encoding, served_path, served_stat = (None, path, stat_result)
+    if compressed:
+        encoding, served_path, served_stat = _select_variant(request, path, stat_result)
+
+    etag = _content_etag(served_path, served_stat)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+    }
+    if compressed:
+        headers["vary"] = "Accept-Encoding"
+
+    if is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        headers["content-encoding"] = encoding
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    return FileResponse(served_path, headers=headers, media_type=media_type, stat_result=served_stat)
@@ -2,6 +2,7 @@ import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from podqueue.config import settings
+from podqueue.utils.log_stream import log_broadcaster
 
 def setup_logging():
     # Root logger
@@ -53,6 +54,10 @@ def setup_logging():
     job_console_handler = logging.StreamHandler()
     job_console_handler.setFormatter(job_formatter)
     job_logger.addHandler(job_console_handler)
+    
+    # In-memory fan-out for the live log viewers
+    log_broadcaster.setFormatter(job_formatter)
+    job_logger.addHandler(log_broadcaster)
 
 # Initialize logging on import
 setup_logging()
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from podqueue.config import settings
+
+# Lines kept in memory for new and reconnecting viewers
+BUFFER_LINES = 1000
+# Lines a slow viewer may fall behind before it is resynced from the ring buffer
+SUBSCRIBER_QUEUE_SIZE = 256
+# Bytes read from the end of last_job.log to seed the buffer after a restart
+SEED_TAIL_BYTES = 256 * 1024
+
+class LogSubscription:
+    """One live viewer: a bounded queue fed from the logging threads via its event loop"""
+
+    def __init__(self, broadcaster: "LogBroadcaster", loop: asyncio.AbstractEventLoop, last_seq: int):
+        self.broadcaster = broadcaster
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.last_seq = last_seq
+        self.lagged = False
+
+    def _deliver(self, seq: int, line: str):
+        # Runs on the subscriber's loop; never blocks the thread that logged the line
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait((seq, line))
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def next_lines(self, timeout: float) -> list:
+        """Wait for new lines; returns [] on timeout. A lagging viewer is caught up from the buffer."""
+        if self.lagged and self.queue.empty():
+            self.lagged = False
+            lines = self.broadcaster.lines_since(self.last_seq)
+        else:
+            try:
+                lines = [await asyncio.wait_for(self.queue.get(), timeout)]
+            except asyncio.TimeoutError:
+                return []
+        # A resync may overlap with deliveries still queued on the loop
+        lines = [(seq, line) for seq, line in lines if seq > self.last_seq]
+        if lines:
+            self.last_seq = lines[-1][0]
+        return lines
+
+class LogBroadcaster(logging.Handler):
+    """Fans job log lines out to every live log viewer.
+
+    Attached to the podqueue_job logger, it keeps the last BUFFER_LINES lines in a ring
+    buffer with increasing sequence numbers (used as SSE event IDs for Last-Event-ID
+    resume) and pushes each new line to all subscribers, so the log file is only read
+    once, to seed the buffer when the first viewer connects.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = deque(maxlen=BUFFER_LINES)
+        self._seq = 0
+        self._seeded = False
+        self._subscribers = set()
+        self._buffer_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            text = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            lines = []
+            for line in text.splitlines() or [""]:
+                self._seq += 1
+                lines.append((self._seq, line))
+            self._buffer.extend(lines)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for seq, line in lines:
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber._deliver, seq, line)
+                except RuntimeError:
+                    # Loop already closed (shutdown)
+                    break
+
+    def _seed_from_file(self):
+        log_file = settings.LOGS_DIR / "last_job.log"
+        try:
+            with open(log_file, "rb") as f:
+                f.seek(0, 2)
+                size = f.tell()
+                f.seek(max(0, size - SEED_TAIL_BYTES))
+                data = f.read()
+        except OSError:
+            return
+        lines = data.decode("utf-8", errors="ignore").splitlines()
+        if size > SEED_TAIL_BYTES and lines:
+            lines = lines[1:]  # first line is probably cut
+        lines = lines[-BUFFER_LINES:]
+        # Nobody has seen a sequence number yet, so the buffer can be renumbered from the file
+        # (which already contains anything logged since startup)
+        self._buffer = deque(enumerate(lines, start=1), maxlen=BUFFER_LINES)
+        self._seq = len(lines)
+
+    def _lines_since_locked(self, last_seq: int | None) -> list:
+        if last_seq is None or last_seq > self._seq:
+            # New viewer, or an ID from before a restart
+            return list(self._buffer)
+        return [(seq, line) for seq, line in self._buffer if seq > last_seq]
+
+    def lines_since(self, last_seq: int | None) -> list:
+        with self._buffer_lock:
+            return self._lines_since_locked(last_seq)
+
+    def subscribe(self, last_seq: int | None = None) -> tuple:
+        """Register a viewer on the running loop; returns (subscription, backlog lines)"""
+        loop = asyncio.get_running_loop()
+        with self._buffer_lock:
+            if not self._seeded:
+                self._seed_from_file()
+                self._seeded = True
+            backlog = self._lines_since_locked(last_seq)
+            subscription = LogSubscription(self, loop, backlog[-1][0] if backlog else self._seq)
+            self._subscribers.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription: LogSubscription):
+        with self._buffer_lock:
+            self._subscribers.discard(subscription)
+
+log_broadcaster = LogBroadcaster()
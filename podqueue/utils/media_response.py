@@ -0,0 +1,76 @@
+import os
+import stat
+import hashlib
+import threading
+import mimetypes
+from collections import OrderedDict
+from email.utils import formatdate
+from pathlib import Path
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from podqueue.utils.http_cache import is_not_modified
+
+# Validator headers of recently served files, reused while the file is unchanged
+VALIDATOR_CACHE_SIZE = 4096
+
+# path -> ((st_ino, st_mtime_ns, st_size), headers)
+_validator_cache = OrderedDict()
+_validator_cache_lock = threading.Lock()
+
+def _stat_headers(stat_result: os.stat_result) -> dict:
+    etag_base = f"{stat_result.st_mtime_ns}-{stat_result.st_size}"
+    return {
+        "etag": f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"',
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+
+def cached_stat(path: Path):
+    """Return (stat_result, validator headers) for a regular file, or None if it does not exist.
+
+    The file is stat'ed on every call: cleanup deletes old episodes and a re-download
+    replaces them, so a remembered stat could announce a body that is gone. Only the
+    derived headers are cached, keyed on inode, mtime and size.
+    """
+    key = str(path)
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        with _validator_cache_lock:
+            _validator_cache.pop(key, None)
+        return None
+    identity = (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+    with _validator_cache_lock:
+        cached = _validator_cache.get(key)
+        if cached and cached[0] == identity:
+            _validator_cache.move_to_end(key)
+            return stat_result, cached[1]
+    headers = _stat_headers(stat_result)
+    with _validator_cache_lock:
+        _validator_cache[key] = (identity, headers)
+        _validator_cache.move_to_end(key)
+        while len(_validator_cache) > VALIDATOR_CACHE_SIZE:
+            _validator_cache.popitem(last=False)
+    return stat_result, headers
+
+class MediaFileResponse(FileResponse):
+    """FileResponse streaming bodies in 256 KiB chunks instead of Starlette's 64 KiB.
+
+    Range handling comes from Starlette's FileResponse. Bodies are read and sent by the
+    application; only a server offering the ASGI pathsend extension (not uvicorn) would
+    send full files with sendfile() instead.
+    """
+    chunk_size = 256 * 1024
+
+def media_file_response(request: Request, path: Path, cache_control: str = "public, max-age=86400") -> Response:
+    """Serve a media file with cached stat/validators, conditional 304s, HEAD and (multi-)ranges"""
+    cached = cached_stat(path)
+    if cached is None:
+        return Response(status_code=404)
+    stat_result, validators = cached
+    headers = {**validators, "cache-control": cache_control}
+    if is_not_modified(request, validators["etag"], stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    return MediaFileResponse(path, headers=headers, media_type=media_type, stat_result=stat_result)
@@ -14,7 +14,6 @@ if not exist "data\downloads" mkdir "data\downloads"
 if not exist "data\feeds" mkdir "data\feeds"
 if not exist "data\artwork" mkdir "data\artwork"
 if not exist "data\logs" mkdir "data\logs"
-if not exist "data\state\channel_checks" mkdir "data\state\channel_checks"
 echo ✓ Run directories created under .\data
 echo.
 
@@ -71,12 +70,6 @@ if not exist ".env" (
     echo ✓ .env already exists
 )
 
-:: Create empty channels.json
-if not exist "data\channels.json" (
-    echo []> data\channels.json
-    echo ✓ Created empty data\channels.json
-)
-
 :: Create cookies.txt placeholder
 if not exist "cookies.txt" (
     echo # Place YouTube cookies here> cookies.txt
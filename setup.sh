@@ -11,7 +11,7 @@ REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$REPO_ROOT"
 
 echo "Creating directories..."
-mkdir -p data/downloads data/feeds data/artwork data/logs data/state/channel_checks
+mkdir -p data/downloads data/feeds data/artwork data/logs
 echo "✓ Run directories created under ./data"
 
 # Create .env from template if missing
@@ -33,12 +33,6 @@ else
     echo "✓ .env already exists"
 fi
 
-# Create channels.json if missing
-if [ ! -f data/channels.json ]; then
-    echo "[]" > data/channels.json
-    echo "✓ Created empty data/channels.json"
-fi
-
 # Create cookies.txt placeholder
 if [ ! -f cookies.txt ]; then
     echo "# Place YouTube cookies here" > cookies.txt
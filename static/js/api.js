@@ -52,17 +52,17 @@ export const API = {
         return await request('/api/channels');
     },
     
-    async createChannel(id, url, limit, sponsorblock, check_interval_hours) {
+    async createChannel(id, url, limit, sponsorblock, check_interval_hours, adaptive) {
         return await request('/api/channels', {
             method: 'POST',
-            body: JSON.stringify({ id, url, limit, sponsorblock, check_interval_hours }),
+            body: JSON.stringify({ id, url, limit, sponsorblock, check_interval_hours, adaptive }),
         });
     },
     
-    async updateChannel(id, limit, sponsorblock, check_interval_hours) {
+    async updateChannel(id, limit, sponsorblock, check_interval_hours, adaptive) {
         return await request(`/api/channels/${id}`, {
             method: 'PUT',
-            body: JSON.stringify({ limit, sponsorblock, check_interval_hours }),
+            body: JSON.stringify({ limit, sponsorblock, check_interval_hours, adaptive }),
         });
     },
     
@@ -72,6 +72,18 @@ export const API = {
         });
     },
     
+    async syncChannel(id) {
+        return await request(`/api/channels/${id}/sync`, {
+            method: 'POST',
+        });
+    },
+    
+    async rebuildChannelRss(id) {
+        return await request(`/api/channels/${id}/rss`, {
+            method: 'POST',
+        });
+    },
+    
     async getJobsStatus() {
         return await request('/api/jobs/status');
     },
@@ -95,6 +107,28 @@ export const API = {
         });
     },
     
+    async cancelJob(id) {
+        return await request(`/api/jobs/${id}`, {
+            method: 'DELETE',
+        });
+    },
+    
+    async getRetries() {
+        return await request('/api/retries');
+    },
+    
+    async clearRetry(channelId, videoId) {
+        return await request(`/api/retries/${channelId}/${videoId}`, {
+            method: 'DELETE',
+        });
+    },
+    
+    async clearDeadRetries() {
+        return await request('/api/retries?status=dead', {
+            method: 'DELETE',
+        });
+    },
+    
     async getFeeds() {
         return await request('/api/feeds');
     }
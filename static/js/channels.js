@@ -21,9 +21,10 @@ export function initChannels() {
         const limit = parseInt(document.getElementById('add-chan-limit').value);
         const sponsorblock = document.getElementById('add-chan-sponsorblock').checked;
         const interval = parseInt(document.getElementById('add-chan-interval').value);
+        const adaptive = document.getElementById('add-chan-adaptive').checked;
         
         try {
-            await API.createChannel(id, url, limit, sponsorblock, interval);
+            await API.createChannel(id, url, limit, sponsorblock, interval, adaptive);
             addChannelModal.classList.remove('active');
             loadChannelsList();
         } catch (err) {
@@ -37,9 +38,10 @@ export function initChannels() {
         const limit = parseInt(document.getElementById('edit-chan-limit').value);
         const sponsorblock = document.getElementById('edit-chan-sponsorblock').checked;
         const interval = parseInt(document.getElementById('edit-chan-interval').value);
+        const adaptive = document.getElementById('edit-chan-adaptive').checked;
         
         try {
-            await API.updateChannel(id, limit, sponsorblock, interval);
+            await API.updateChannel(id, limit, sponsorblock, interval, adaptive);
             editChannelModal.classList.remove('active');
             loadChannelsList();
         } catch (err) {
@@ -83,12 +85,14 @@ export async function loadChannelsList() {
                         <span style="word-break: break-all;"><strong>Source URL:</strong> <a href="${c.url}" target="_blank">${c.url}</a></span>
                         <span><strong>Keep Limit:</strong> Newer ${c.limit}</span>
                         <span><strong>SponsorBlock:</strong> ${c.sponsorblock ? 'Remove Sponsors' : 'Disabled'}</span>
-                        <span><strong>Interval:</strong> Every ${c.check_interval_hours} hr(s)</span>
+                        <span><strong>Interval:</strong> ${c.adaptive ? `Adaptive, now ~${c.interval_hours} hr(s)` : `Every ${c.check_interval_hours} hr(s)`}</span>
                         <span><strong>Last Checked:</strong> ${lastCheckText}</span>
                         <span><strong>Next Check:</strong> ${nextCheckText}</span>
+                        ${c.last_error ? `<span style="color: var(--danger-color);"><strong>Last Error:</strong> ${escapeText(c.last_error)}</span>` : ''}
                     </div>
                     <div class="card-actions">
-                        <button class="btn btn-sm btn-edit" data-id="${c.id}" data-url="${c.url}" data-limit="${c.limit}" data-sponsorblock="${c.sponsorblock}" data-interval="${c.check_interval_hours}">Edit</button>
+                        <button class="btn btn-sm btn-sync" data-id="${c.id}">Sync Now</button>
+                        <button class="btn btn-sm btn-edit" data-id="${c.id}" data-url="${c.url}" data-limit="${c.limit}" data-sponsorblock="${c.sponsorblock}" data-interval="${c.check_interval_hours}" data-adaptive="${c.adaptive}">Edit</button>
                         <button class="btn btn-sm btn-danger btn-delete" data-id="${c.id}">Delete</button>
                     </div>
                 </div>
@@ -104,12 +108,25 @@ export async function loadChannelsList() {
                 document.getElementById('edit-chan-limit').value = btn.dataset.limit;
                 document.getElementById('edit-chan-sponsorblock').checked = btn.dataset.sponsorblock === 'true';
                 document.getElementById('edit-chan-interval').value = btn.dataset.interval;
+                document.getElementById('edit-chan-adaptive').checked = btn.dataset.adaptive === 'true';
                 
                 document.getElementById('edit-modal-title').textContent = `Edit Feed: ${id}`;
                 editChannelModal.classList.add('active');
             });
         });
         
+        document.querySelectorAll('.btn-sync').forEach(btn => {
+            btn.addEventListener('click', async () => {
+                try {
+                    await API.syncChannel(btn.dataset.id);
+                    btn.textContent = 'Queued';
+                    btn.disabled = true;
+                } catch (err) {
+                    alert(`Error queueing sync: ${err.message}`);
+                }
+            });
+        });
+        
         document.querySelectorAll('.btn-delete').forEach(btn => {
             btn.addEventListener('click', async () => {
                 const id = btn.dataset.id;
@@ -128,3 +145,9 @@ export async function loadChannelsList() {
         channelsGrid.innerHTML = `<div style="color: var(--danger-color); grid-column: 1/-1;">Error: ${err.message}</div>`;
     }
 }
+
+function escapeText(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
@@ -5,20 +5,24 @@ const logStatusDot = document.getElementById('log-status-dot');
 const systemStateLabel = document.getElementById('system-state-label');
 const lastJobName = document.getElementById('last-job-name');
 const lastJobCode = document.getElementById('last-job-code');
+const jobProgress = document.getElementById('job-progress');
+const jobQueue = document.getElementById('job-queue');
+const failedDownloads = document.getElementById('failed-downloads');
 
 const runSyncBtn = document.getElementById('run-sync-btn');
 const runRssBtn = document.getElementById('run-rss-btn');
 const updateYtdlpBtn = document.getElementById('update-ytdlp-btn');
 const clearLogsBtn = document.getElementById('clear-logs-btn');
+const clearDeadBtn = document.getElementById('clear-dead-btn');
 
 let eventSource = null;
-let statusPollInterval = null;
+let statusSource = null;
+let wasRunning = false;
 
 export function initJobs() {
     runSyncBtn.addEventListener('click', async () => {
         try {
             await API.triggerDownload(true);
-            updateJobsStatus();
         } catch (e) {
             alert(`Failed to trigger download: ${e.message}`);
         }
@@ -27,7 +31,6 @@ export function initJobs() {
     runRssBtn.addEventListener('click', async () => {
         try {
             await API.triggerRss();
-            updateJobsStatus();
         } catch (e) {
             alert(`Failed to trigger RSS: ${e.message}`);
         }
@@ -37,7 +40,6 @@ export function initJobs() {
         if (confirm('This will update yt-dlp and restart the backend. Connection will drop momentarily. Proceed?')) {
             try {
                 await API.triggerUpdateYtdlp();
-                updateJobsStatus();
             } catch (e) {
                 alert(`Failed to trigger update: ${e.message}`);
             }
@@ -48,13 +50,34 @@ export function initJobs() {
         logConsole.textContent = '';
     });
 
+    clearDeadBtn.addEventListener('click', async () => {
+        try {
+            await API.clearDeadRetries();
+            loadFailedDownloads();
+        } catch (e) {
+            alert(`Failed to clear downloads: ${e.message}`);
+        }
+    });
+
+    loadFailedDownloads();
+
     // Start logs stream
     startLogsStream();
 
-    // Start status polling
-    if (statusPollInterval) clearInterval(statusPollInterval);
-    statusPollInterval = setInterval(updateJobsStatus, 3000);
-    updateJobsStatus();
+    // Job state and progress are pushed by the server, no polling
+    startStatusStream();
+}
+
+function startStatusStream() {
+    if (statusSource) {
+        statusSource.close();
+    }
+
+    statusSource = new EventSource('/api/jobs/status/stream');
+
+    statusSource.onmessage = (event) => {
+        renderJobsStatus(JSON.parse(event.data));
+    };
 }
 
 function startLogsStream() {
@@ -109,21 +132,151 @@ function appendLogLine(line) {
 
 export async function updateJobsStatus() {
     try {
-        const status = await API.getJobsStatus();
-        
-        systemStateLabel.textContent = status.running ? 'Running' : 'Idle';
-        systemStateLabel.className = status.running ? 'badge badge-accent' : 'badge';
-        
-        if (status.running) {
-            lastJobName.textContent = status.current_job;
-            lastJobCode.textContent = 'Running';
-            lastJobCode.style.color = 'var(--accent-color)';
-        } else {
-            lastJobName.textContent = status.current_job || 'None';
-            lastJobCode.textContent = status.last_exit_code === 0 ? 'Success' : `Failed (${status.last_exit_code})`;
-            lastJobCode.style.color = status.last_exit_code === 0 ? 'var(--success-color)' : 'var(--danger-color)';
-        }
+        renderJobsStatus(await API.getJobsStatus());
     } catch (e) {
         console.error('Failed to fetch jobs status', e);
     }
 }
+
+function formatMiB(bytes) {
+    return `${(bytes / (1024 * 1024)).toFixed(1)} MiB`;
+}
+
+function renderProgress(progress) {
+    jobProgress.textContent = '';
+    if (!progress || !progress.stage) {
+        jobProgress.style.display = 'none';
+        return;
+    }
+    jobProgress.style.display = 'flex';
+
+    const lines = [];
+    let stageLine = `Stage: ${progress.stage}`;
+    if (progress.channels_total) {
+        stageLine += ` (${progress.channels_done}/${progress.channels_total} channels)`;
+    }
+    lines.push(stageLine);
+    if (progress.channel) lines.push(`Channel: ${progress.channel}`);
+    if (progress.queue_depth) lines.push(`Queued downloads: ${progress.queue_depth}`);
+
+    for (const [videoId, d] of Object.entries(progress.downloads || {})) {
+        let line = `⬇ ${d.channel ? d.channel + ' / ' : ''}${videoId}: ${d.status}`;
+        if (d.percent !== null && d.percent !== undefined) line += ` ${d.percent}%`;
+        if (d.total_bytes) line += ` of ${formatMiB(d.total_bytes)}`;
+        if (d.speed) line += ` at ${formatMiB(d.speed)}/s`;
+        lines.push(line);
+    }
+
+    for (const text of lines) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        jobProgress.appendChild(div);
+    }
+}
+
+function renderQueue(jobs) {
+    jobQueue.textContent = '';
+    if (!jobs || jobs.length === 0) {
+        jobQueue.textContent = 'No queued jobs';
+        return;
+    }
+
+    for (const job of jobs) {
+        const row = document.createElement('div');
+        row.style.display = 'flex';
+        row.style.justifyContent = 'space-between';
+        row.style.alignItems = 'center';
+        row.style.gap = '0.5rem';
+
+        const label = document.createElement('span');
+        label.textContent = `#${job.id} ${job.name}${job.force ? ' (forced)' : ''}`;
+        if (job.status === 'running') label.style.color = 'var(--accent-color)';
+        row.appendChild(label);
+
+        const cancelBtn = document.createElement('button');
+        cancelBtn.className = 'btn btn-sm';
+        cancelBtn.textContent = job.status === 'running' ? 'Stop' : 'Cancel';
+        cancelBtn.addEventListener('click', async () => {
+            try {
+                await API.cancelJob(job.id);
+            } catch (e) {
+                alert(`Failed to cancel job: ${e.message}`);
+            }
+        });
+        row.appendChild(cancelBtn);
+
+        jobQueue.appendChild(row);
+    }
+}
+
+async function loadFailedDownloads() {
+    let retries;
+    try {
+        retries = await API.getRetries();
+    } catch (e) {
+        console.error('Failed to fetch failed downloads', e);
+        return;
+    }
+
+    failedDownloads.textContent = '';
+    if (retries.length === 0) {
+        failedDownloads.textContent = 'No failed downloads';
+        return;
+    }
+
+    for (const r of retries) {
+        const row = document.createElement('div');
+        row.style.display = 'flex';
+        row.style.justifyContent = 'space-between';
+        row.style.alignItems = 'center';
+        row.style.gap = '0.5rem';
+
+        const label = document.createElement('span');
+        let text = `${r.channel_id} / ${r.video_id}: ${r.error_class}, ${r.attempts} attempt(s)`;
+        if (r.status === 'dead') {
+            text += ', given up';
+            label.style.color = 'var(--danger-color)';
+        } else if (r.next_retry_at) {
+            text += `, retry ${new Date(r.next_retry_at * 1000).toLocaleString()}`;
+        }
+        label.textContent = text;
+        label.title = r.last_error || '';
+        row.appendChild(label);
+
+        const clearBtn = document.createElement('button');
+        clearBtn.className = 'btn btn-sm';
+        clearBtn.textContent = 'Clear';
+        clearBtn.addEventListener('click', async () => {
+            try {
+                await API.clearRetry(r.channel_id, r.video_id);
+                loadFailedDownloads();
+            } catch (e) {
+                alert(`Failed to clear download: ${e.message}`);
+            }
+        });
+        row.appendChild(clearBtn);
+
+        failedDownloads.appendChild(row);
+    }
+}
+
+function renderJobsStatus(status) {
+    systemStateLabel.textContent = status.running ? 'Running' : 'Idle';
+    systemStateLabel.className = status.running ? 'badge badge-accent' : 'badge';
+    
+    if (status.running) {
+        lastJobName.textContent = status.current_job;
+        lastJobCode.textContent = 'Running';
+        lastJobCode.style.color = 'var(--accent-color)';
+    } else {
+        lastJobName.textContent = status.current_job || 'None';
+        lastJobCode.textContent = status.last_exit_code === 0 ? 'Success' : `Failed (${status.last_exit_code})`;
+        lastJobCode.style.color = status.last_exit_code === 0 ? 'var(--success-color)' : 'var(--danger-color)';
+    }
+    renderProgress(status.progress);
+    renderQueue(status.queue);
+
+    // A finished sync may have recorded or resolved failed downloads
+    if (wasRunning && !status.running) loadFailedDownloads();
+    wasRunning = status.running;
+}
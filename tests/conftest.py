@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the data directory somewhere disposable first
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="podqueue-test-")
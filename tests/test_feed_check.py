@@ -0,0 +1,35 @@
+import requests
+from podqueue.config import settings
+from podqueue.core import feed_check
+from podqueue.core.db import get_db
+from podqueue.core.governor import governor
+
+CHANNEL_URL = "https://www.youtube.com/channel/UCaaaaaaaaaaaaaaaaaaaaaa/videos"
+
+class _Response:
+    status_code = 429
+    ok = False
+    headers = {}
+
+    def raise_for_status(self):
+        raise requests.exceptions.HTTPError("429 Client Error: Too Many Requests for url")
+
+def test_feed_check_uses_proxy_and_governor(monkeypatch):
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append(kwargs)
+        return _Response()
+
+    monkeypatch.setattr(feed_check.requests, "get", fake_get)
+    monkeypatch.setattr(settings, "YTDLP_PROXY", "socks5://127.0.0.1:40000")
+    before = governor.stats()
+    try:
+        assert feed_check.feed_has_new_uploads("feedchan", CHANNEL_URL, set()) is True
+        after = governor.stats()
+    finally:
+        get_db().execute("UPDATE governor SET cooldown_until = 0, backoff_level = 0 WHERE id = 1")
+    assert calls[0]["proxies"] == {"http": "socks5://127.0.0.1:40000", "https": "socks5://127.0.0.1:40000"}
+    assert after["requests"]["feed"] == before["requests"].get("feed", 0) + 1
+    assert after["throttles"]["feed"] == before["throttles"].get("feed", 0) + 1
+    assert after["cooldown_remaining"] > 0
@@ -0,0 +1,30 @@
+import time
+import pytest
+from podqueue.core.db import get_db
+from podqueue.core.governor import RequestBudgetExhausted, governor
+
+def _cool_down(seconds: float):
+    governor._try_acquire("scan")
+    get_db().execute("UPDATE governor SET cooldown_until = ? WHERE id = 1", (time.time() + seconds,))
+
+def test_acquire_with_max_wait_fails_fast_during_cooldown():
+    _cool_down(600)
+    started = time.monotonic()
+    with pytest.raises(RequestBudgetExhausted) as exc:
+        governor.acquire("resolve", max_wait=1)
+    assert time.monotonic() - started < 1
+    assert 590 < exc.value.retry_after <= 600
+    get_db().execute("UPDATE governor SET cooldown_until = 0 WHERE id = 1")
+
+def test_add_channel_answers_503_while_cooling_down(monkeypatch):
+    from fastapi.testclient import TestClient
+    from podqueue.api import channels
+    from podqueue.api.main import app
+    monkeypatch.setattr(channels, "require_auth", lambda request: None)
+    _cool_down(600)
+    try:
+        response = TestClient(app).post("/api/channels", json={"id": "handle", "url": "https://www.youtube.com/@handle"})
+    finally:
+        get_db().execute("UPDATE governor SET cooldown_until = 0 WHERE id = 1")
+    assert response.status_code == 503
+    assert 590 < int(response.headers["Retry-After"]) <= 601
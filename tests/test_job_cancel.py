@@ -0,0 +1,41 @@
+import pytest
+from podqueue.core import job_runner, worker
+from podqueue.core.worker import JobCancelled, cancel_job_workers, clear_job_cancellation, current_job_id
+
+class _FakeProcess:
+    started = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def start(self):
+        self.started.append(self)
+
+def test_cancelled_job_starts_no_more_workers(monkeypatch):
+    monkeypatch.setattr(worker._mp_context, "Process", _FakeProcess)
+    token = current_job_id.set(4242)
+    try:
+        # Cancelled while no worker runs, e.g. between a recycled worker and the next
+        assert cancel_job_workers(4242) == 0
+        with pytest.raises(JobCancelled):
+            worker.run_download_job_isolated(channel_ids=["a"])
+        with pytest.raises(JobCancelled):
+            job_runner.rss_pipeline(channel_ids=["a"])
+    finally:
+        clear_job_cancellation(4242)
+        current_job_id.reset(token)
+    assert not _FakeProcess.started
+
+def test_rss_step_skipped_after_cancel(monkeypatch):
+    calls = []
+    monkeypatch.setattr(job_runner.settings, "WORKER_ISOLATION", True)
+    monkeypatch.setattr(job_runner, "run_download_job_isolated", lambda **kwargs: (calls.append("sync"), cancel_job_workers(7)))
+    monkeypatch.setattr(job_runner, "run_rss_job_isolated", lambda **kwargs: calls.append("rss"))
+    token = current_job_id.set(7)
+    try:
+        with pytest.raises(JobCancelled):
+            job_runner.sync_pipeline(channel_ids=["a"])
+    finally:
+        clear_job_cancellation(7)
+        current_job_id.reset(token)
+    assert calls == ["sync"]
@@ -0,0 +1,54 @@
+import asyncio
+from podqueue.core.db import get_db
+from podqueue.core.job_queue import JobQueue
+
+def _clear_jobs():
+    get_db().execute("DELETE FROM jobs")
+
+def test_manual_sync_not_merged_into_unrelated_scheduled_batch():
+    _clear_jobs()
+    queue = JobQueue()
+    batch = queue.enqueue("sync", source="scheduled", channel_ids=["a", "b", "c"])
+    first_sync = queue.enqueue("sync", source="manual", channel_ids=["new"])
+    assert first_sync["id"] != batch["id"]
+    assert queue.get_job(batch["id"])["channel_ids"] == ["a", "b", "c"]
+
+def test_overlapping_or_same_source_requests_are_merged():
+    _clear_jobs()
+    queue = JobQueue()
+    batch = queue.enqueue("sync", source="scheduled", channel_ids=["a", "b"])
+    assert queue.enqueue("sync", source="scheduled", channel_ids=["c"])["id"] == batch["id"]
+    merged = queue.enqueue("sync", source="manual", channel_ids=["b", "d"])
+    assert merged["id"] == batch["id"]
+    assert merged["channel_ids"] == ["a", "b", "c", "d"]
+    assert merged["source"] == "manual"
+
+def test_deleted_channel_is_dropped_from_queued_jobs():
+    _clear_jobs()
+    queue = JobQueue()
+    alone = queue.enqueue("sync", source="manual", channel_ids=["gone"], force=True)
+    shared = queue.enqueue("sync", source="scheduled", channel_ids=["gone", "kept"])
+    asyncio.run(queue.cancel_channel_jobs("gone"))
+    assert queue.get_job(alone["id"])["status"] == "cancelled"
+    assert queue.get_job(shared["id"])["channel_ids"] == ["kept"]
+
+def test_running_job_of_deleted_channel_is_stopped_and_requeued_without_it():
+    _clear_jobs()
+    queue = JobQueue()
+    job = queue.enqueue("sync", source="scheduled", channel_ids=["gone", "kept"])
+    get_db().execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job["id"],))
+    queue._running[job["id"]] = job
+
+    async def delete_while_running():
+        deleting = asyncio.create_task(queue.cancel_channel_jobs("gone"))
+        await asyncio.sleep(0)
+        assert job["id"] in queue._cancelling and not deleting.done()
+        # What _run_job does once the cancelled worker exited
+        get_db().execute("UPDATE jobs SET status = 'cancelled' WHERE id = ?", (job["id"],))
+        del queue._running[job["id"]]
+        queue._resolve(job["id"], "cancelled")
+        await deleting
+
+    asyncio.run(delete_while_running())
+    requeued = [j for j in queue.list_jobs() if j["status"] == "queued"]
+    assert [j["channel_ids"] for j in requeued] == [["kept"]]
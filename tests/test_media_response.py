@@ -0,0 +1,50 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from podqueue.utils.media_response import media_file_response
+
+def _client(path):
+    app = FastAPI()
+
+    @app.get("/media")
+    async def media(request: Request):
+        return media_file_response(request, path)
+
+    return TestClient(app)
+
+def test_full_single_and_multiple_ranges(tmp_path):
+    path = tmp_path / "episode.m4a"
+    body = bytes(range(256)) * 2048
+    path.write_bytes(body)
+    client = _client(path)
+
+    full = client.get("/media")
+    assert full.status_code == 200 and full.content == body
+    assert full.headers["content-type"] == "audio/mp4"
+
+    single = client.get("/media", headers={"Range": "bytes=100-299"})
+    assert single.status_code == 206
+    assert single.content == body[100:300]
+    assert single.headers["content-range"] == f"bytes 100-299/{len(body)}"
+
+    multi = client.get("/media", headers={"Range": "bytes=0-9,1000-1009"})
+    assert multi.status_code == 206
+    assert multi.headers["content-type"].startswith("multipart/byteranges")
+    assert body[0:10] in multi.content and body[1000:1010] in multi.content
+
+    revalidated = client.get("/media", headers={"If-None-Match": full.headers["etag"]})
+    assert revalidated.status_code == 304
+
+def test_deleted_or_replaced_episode_is_not_served_from_cache(tmp_path):
+    path = tmp_path / "episode.m4a"
+    path.write_bytes(b"a" * 1000)
+    client = _client(path)
+    first = client.get("/media")
+    assert first.status_code == 200
+
+    path.unlink()
+    assert client.get("/media").status_code == 404
+
+    path.write_bytes(b"b" * 2000)
+    replaced = client.get("/media")
+    assert replaced.status_code == 200 and replaced.content == b"b" * 2000
+    assert replaced.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,11 @@
+from podqueue.core.metrics import MetricsRegistry
+
+def test_extra_counters_are_typed_as_counters():
+    text = MetricsRegistry().render(
+        {"jobs": ("Queued and running jobs", [({"status": "queued"}, 2)])},
+        {"youtube_requests_total": ("YouTube requests by kind", [({"kind": "scan"}, 7)])},
+    )
+    assert "# TYPE podqueue_jobs gauge" in text
+    assert 'podqueue_jobs{status="queued"} 2' in text
+    assert "# TYPE podqueue_youtube_requests_total counter" in text
+    assert 'podqueue_youtube_requests_total{kind="scan"} 7' in text
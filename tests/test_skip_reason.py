@@ -0,0 +1,8 @@
+from podqueue.core.downloader import get_skip_reason
+
+def test_only_live_and_upcoming_videos_are_deferred():
+    assert get_skip_reason({"live_status": "is_live"}) == "live"
+    assert get_skip_reason({"live_status": "is_upcoming"}) == "live"
+    # A finished stream still being processed is downloadable and must not hold the channel back
+    assert get_skip_reason({"live_status": "post_live", "duration": 3600}) is None
+    assert get_skip_reason({"live_status": "was_live", "duration": 3600}) is None
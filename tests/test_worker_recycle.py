@@ -0,0 +1,36 @@
+import asyncio
+import importlib
+from podqueue.config import settings
+from podqueue.core import downloader, worker
+from podqueue.core.channels import Channel, add_channel
+from podqueue.core.state import load_channel_state
+
+def _run_in_process(target: str, **kwargs):
+    module_name, func_name = target.split(":")
+    return getattr(importlib.import_module(module_name), func_name)(**kwargs)
+
+def test_recycled_channel_attempts_every_new_video(monkeypatch):
+    asyncio.run(add_channel(Channel(id="recycled", url="https://www.youtube.com/channel/UCrecycled", limit=10)))
+    uploads = [(f"v{i}", f"https://www.youtube.com/watch?v=v{i}") for i in range(8, 0, -1)]
+    attempted = []
+
+    def fake_scan(channel, ctx, precheck=True):
+        # Only the first scan sees new uploads: afterwards the feed says nothing changed
+        # and the newest video is archived, so a rescan would find nothing
+        return list(uploads) if not attempted else []
+
+    def fake_download(channel, video_id, video_url, ctx):
+        attempted.append(video_id)
+        return True
+
+    monkeypatch.setattr(downloader, "scan_channel", fake_scan)
+    monkeypatch.setattr(downloader, "download_video", fake_download)
+    monkeypatch.setattr(worker, "run_in_worker", _run_in_process)
+    monkeypatch.setattr(settings, "WORKER_MAX_VIDEOS", 3)
+    monkeypatch.setattr(settings, "WORKER_MAX_RSS_MB", 0)
+    monkeypatch.setattr(settings, "DOWNLOAD_WORKERS", 1)
+
+    worker.run_download_job_isolated(channel_ids=["recycled"])
+
+    assert attempted == [v[0] for v in uploads]
+    assert load_channel_state("recycled").get("last_check") is not None